@@ -11,6 +11,7 @@ else:
 # constants
 ELEVATED_POLICY = False  # type: bool
 GLOBAL_DEFAULT_TIMEOUT = 20.0  # type: float
+PMS_PORT = 32400  # type: int
 
 
 # open the plugin's Plist file and see if it has an elevated policy
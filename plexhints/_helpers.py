@@ -1,25 +1,1074 @@
 # future imports
 from __future__ import absolute_import  # import like python 3
 
+from future.moves.queue import Empty, Full, Queue
+from future.moves.urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
 # standard imports
+import base64
+from collections import deque, OrderedDict
 import datetime
+import copy
+import hashlib
+import io
+import json
+import math
+import os
+import threading
 import time
-from typing import Optional
+import zlib
+from typing import Iterator, Optional
 
 # lib imports
 import requests
+from requests.adapters import HTTPAdapter
 from requests.cookies import RequestsCookieJar
-import requests_cache
+from requests.structures import CaseInsensitiveDict
+from requests.hooks import dispatch_hook
 from requests_cache import CachedSession
+from requests_cache.backends import BaseCache, DbCache
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
 
 # local imports
 import plexhints
 from plexhints import GLOBAL_DEFAULT_TIMEOUT
+from plexhints.log_kit import _LogKit
+
+# setup logging
+_Log = _LogKit()
+
+DEFAULT_CACHE_MAX_SIZE = 52428800  # type: int
+DEFAULT_CACHE_COMPRESS_LEVEL = 6  # type: int
+CACHE_COMPRESS_MIN_SIZE = 1024  # type: int
+DEFAULT_CHUNK_SIZE = 65536  # type: int
+DEFAULT_MAX_WORKERS = 8  # type: int
+DEFAULT_PER_HOST_LIMIT = 4  # type: int
+DEFAULT_PRECACHE_WORKERS = 2  # type: int
+DEFAULT_PRECACHE_QUEUE_SIZE = 100  # type: int
+DEFAULT_STATS_SAMPLES = 1000  # type: int
+DEFAULT_POOL_SIZE = 10  # type: int
+MAX_POOLED_SESSIONS = 64  # type: int
+DEFAULT_RETRIES = 0  # type: int
+DEFAULT_RETRY_BACKOFF = 0.5  # type: float
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)  # type: tuple
+COALESCED_METHODS = ('GET', 'HEAD')  # type: tuple
 
 cookie_jar = RequestsCookieJar()
-session = CachedSession()
 
-# requests_cache.install_cache(cache_name='plexhints_cache', backend='memory')
+
+# rules for normalizing cache keys, parameter names are case-sensitive and header names are case-insensitive
+cache_key_rules = dict(
+    ignored_params=frozenset(),
+    vary_headers=frozenset(),
+)
+
+
+def set_cache_key_rules(ignored_params=None, vary_headers=None):
+    # type: (Optional[list], Optional[list]) -> dict
+    """
+    Change how requests are matched to cached responses.
+
+    Parameters
+    ----------
+    ignored_params : Optional[list]
+        Names of query and form parameters which are left out of the cache key, e.g. timestamps or nonces.
+        Unchanged if ``None``.
+    vary_headers : Optional[list]
+        Names of request headers which are part of the cache key, requests with different values for them are cached
+        separately. Other headers never affect the cache key. Unchanged if ``None``.
+
+    Returns
+    -------
+    dict
+        The updated rules.
+    """
+    if ignored_params is not None:
+        cache_key_rules['ignored_params'] = frozenset(ignored_params)
+    if vary_headers is not None:
+        cache_key_rules['vary_headers'] = frozenset(header.lower() for header in vary_headers)
+    return dict(cache_key_rules)
+
+
+def _to_bytes(value):
+    # type: (any) -> bytes
+    if isinstance(value, bytes):
+        return value
+    return u'{}'.format(value).encode('utf-8')
+
+
+def _normalize_params(params):
+    # type: (str) -> str
+    ignored_params = cache_key_rules['ignored_params']
+    return urlencode(sorted((name, value) for name, value in parse_qsl(params, keep_blank_values=True)
+                            if name not in ignored_params))
+
+
+def create_cache_key(request):
+    # type: (requests.PreparedRequest) -> str
+    """
+    Create the cache key of a request.
+
+    The key is made from the method, the url with its scheme and host in lower case, its query parameters sorted and
+    without the ignored parameters and its fragment removed, the body (normalized in the same way when it is form
+    encoded) and the values of the headers which vary.
+
+    Parameters
+    ----------
+    request : requests.PreparedRequest
+        The request.
+
+    Returns
+    -------
+    str
+        The cache key.
+    """
+    url = urlparse(request.url)
+    url = urlunparse((url.scheme.lower(), url.netloc.lower(), url.path, url.params, _normalize_params(url.query), ''))
+
+    body = request.body
+    if body and 'application/x-www-form-urlencoded' in request.headers.get('Content-Type', ''):
+        body = _normalize_params(body.decode('utf-8') if isinstance(body, bytes) else body)
+
+    key = hashlib.sha256()
+    key.update(_to_bytes(request.method.upper()))
+    key.update(_to_bytes(url))
+    if body:
+        key.update(_to_bytes(body))
+    for name in sorted(cache_key_rules['vary_headers']):
+        value = request.headers.get(name)
+        if value is not None:
+            key.update(_to_bytes(name))
+            key.update(_to_bytes(value))
+    return key.hexdigest()
+
+
+class _SizeLimitedCache(object):
+    """
+    Mixin for cache backends which keeps the size of the cached response bodies within a budget.
+
+    Once the budget is exceeded the least recently used responses are evicted. Cache keys are created by
+    ``create_cache_key``.
+
+    Response bodies of at least ``CACHE_COMPRESS_MIN_SIZE`` bytes are stored compressed with zlib at
+    ``compress_level``, and decompressed when they are read. The budget applies to the stored size.
+    """
+    name = None  # type: Optional[str]
+    compress_level = DEFAULT_CACHE_COMPRESS_LEVEL  # type: int
+
+    def create_key(self, request):
+        # type: (requests.PreparedRequest) -> str
+        return create_cache_key(request)
+
+    def _setup_size_limit(self, max_size):
+        # type: (Optional[int]) -> None
+        self.max_size = max_size
+        self.current_size = 0
+        self._sizes = OrderedDict()  # least recently used first
+        self._size_lock = threading.RLock()
+
+        # account for responses which were persisted by a previous process
+        for key in list(self.responses):
+            try:
+                response, _ = self.responses[key]
+            except KeyError:
+                continue
+            self._track(key=key, size=len(getattr(response, '_content', None) or b''))
+        self._evict()
+
+    def _track(self, key, size):
+        # type: (str, int) -> None
+        with self._size_lock:
+            self.current_size -= self._sizes.pop(key, 0)
+            self._sizes[key] = size
+            self.current_size += size
+
+    def _touch(self, key):
+        # type: (str) -> None
+        with self._size_lock:
+            if key not in self._sizes and key in self.keys_map:
+                key = self.keys_map[key]
+            if key in self._sizes:
+                self._sizes[key] = self._sizes.pop(key)
+
+    def _evict(self, max_size=None):
+        # type: (Optional[int]) -> int
+        max_size = self.max_size if max_size is None else max_size
+        if max_size is None:
+            return 0
+        evicted = 0
+        with self._size_lock:
+            while self.current_size > max_size and self._sizes:
+                key = next(iter(self._sizes))
+                self.delete(key)
+                evicted += 1
+        return evicted
+
+    def _entries(self):
+        # type: () -> Iterator[tuple]
+        for key in list(self.responses):
+            try:
+                response, created_at = self.responses[key]
+            except KeyError:
+                continue
+            yield key, response, created_at
+
+    def resize(self, max_size):
+        # type: (Optional[int]) -> None
+        """
+        Change the size budget of the cache, evicting responses if the new budget is exceeded.
+
+        Parameters
+        ----------
+        max_size : Optional[int]
+            The maximum size (in bytes) of the cached response bodies. If ``None``, the cache is unbounded.
+        """
+        with self._size_lock:
+            self.max_size = max_size
+            self._evict()
+
+    def info(self):
+        # type: () -> dict
+        """
+        Get the size of the cache.
+
+        Returns
+        -------
+        dict
+            Dictionary containing the ``backend`` name, the number of ``entries``, the size of the cached response
+            bodies in ``bytes`` and the ``max_size`` budget.
+        """
+        with self._size_lock:
+            return dict(backend=self.name, entries=len(self._sizes), bytes=self.current_size, max_size=self.max_size)
+
+    def prune(self, older_than=None, max_bytes=None):
+        # type: (Optional[float], Optional[int]) -> int
+        """
+        Remove old responses, and the least recently used responses until the cache fits in a size.
+
+        Parameters
+        ----------
+        older_than : Optional[float]
+            Remove the responses which were cached more than this number of seconds ago.
+        max_bytes : Optional[int]
+            Remove the least recently used responses until the size of the cached response bodies is at most this
+            number of bytes.
+
+        Returns
+        -------
+        int
+            The number of removed responses.
+        """
+        removed = 0
+        if older_than is not None:
+            created_before = datetime.datetime.utcnow() - datetime.timedelta(seconds=older_than)
+            for key, _, created_at in self._entries():
+                if created_at < created_before:
+                    self.delete(key)
+                    removed += 1
+        if max_bytes is not None:
+            removed += self._evict(max_size=max_bytes)
+        return removed
+
+    def invalidate(self, prefix):
+        # type: (str) -> int
+        """
+        Remove the responses of all urls starting with a prefix.
+
+        Parameters
+        ----------
+        prefix : str
+            The url prefix, e.g. ``https://api.example.com/v1/``.
+
+        Returns
+        -------
+        int
+            The number of removed responses.
+        """
+        removed = 0
+        for key, response, _ in self._entries():
+            urls = (getattr(getattr(response, 'request', None), 'url', None) or '', getattr(response, 'url', '') or '')
+            if any(url.startswith(prefix) for url in urls):
+                self.delete(key)
+                removed += 1
+        return removed
+
+    def reduce_response(self, response, seen=None):
+        result = super(_SizeLimitedCache, self).reduce_response(response, seen=seen)
+        content = result._content
+        if self.compress_level and content and len(content) >= CACHE_COMPRESS_MIN_SIZE and \
+                not getattr(result, 'compression', None):
+            compressed = zlib.compress(content, self.compress_level)
+            if len(compressed) < len(content):
+                result._content = compressed
+                result.compression = 'zlib'
+        return result
+
+    def restore_response(self, response, seen=None):
+        if getattr(response, 'compression', None) == 'zlib':
+            # the stored response is shared by memory backends, so it must not be modified
+            response = copy.copy(response)
+            response._content = zlib.decompress(response._content)
+            response.compression = None
+        return super(_SizeLimitedCache, self).restore_response(response, seen=seen)
+
+    def save_response(self, key, response):
+        reduced_response = self.reduce_response(response)
+        self.responses[key] = reduced_response, datetime.datetime.utcnow()
+        self._track(key=key, size=len(reduced_response._content or b''))
+        self._evict()
+
+    def get_response_and_time(self, key, default=(None, None)):
+        response, timestamp = super(_SizeLimitedCache, self).get_response_and_time(key, default=default)
+        if response is not None:
+            self._touch(key=key)
+        return response, timestamp
+
+    def delete(self, key):
+        with self._size_lock:
+            if key not in self._sizes:
+                key = self.keys_map.get(key, key)
+            super(_SizeLimitedCache, self).delete(key)
+            self.current_size -= self._sizes.pop(key, 0)
+
+    def clear(self):
+        with self._size_lock:
+            super(_SizeLimitedCache, self).clear()
+            self._sizes.clear()
+            self.current_size = 0
+
+
+class MemoryCache(_SizeLimitedCache, BaseCache):
+    """
+    In memory cache backend with a least recently used eviction policy.
+
+    Parameters
+    ----------
+    max_size : Optional[int]
+        The maximum size (in bytes) of the cached response bodies. If ``None``, the cache is unbounded.
+    compress_level : int, default=6
+        The zlib compression level (1-9) of the cached response bodies. If ``0``, they are not compressed.
+    """
+    name = 'memory'
+
+    def __init__(self, max_size=DEFAULT_CACHE_MAX_SIZE, compress_level=DEFAULT_CACHE_COMPRESS_LEVEL, **options):
+        # type: (Optional[int], int, **any) -> None
+        BaseCache.__init__(self, **options)
+        self.compress_level = compress_level
+        self._setup_size_limit(max_size=max_size)
+
+
+class SQLiteCache(_SizeLimitedCache, DbCache):
+    """
+    Persistent SQLite cache backend with a least recently used eviction policy.
+
+    Parameters
+    ----------
+    location : str
+        The path of the database file, without the ``.sqlite`` extension.
+    max_size : Optional[int]
+        The maximum size (in bytes) of the cached response bodies. If ``None``, the cache is unbounded.
+    compress_level : int, default=6
+        The zlib compression level (1-9) of the cached response bodies. If ``0``, they are not compressed.
+    """
+    name = 'sqlite'
+
+    def __init__(self, location, max_size=DEFAULT_CACHE_MAX_SIZE, compress_level=DEFAULT_CACHE_COMPRESS_LEVEL,
+                 **options):
+        # type: (str, Optional[int], int, **any) -> None
+        DbCache.__init__(self, location=location, **options)
+        self.compress_level = compress_level
+        self._setup_size_limit(max_size=max_size)
+
+
+cache_backends = dict(
+    memory=MemoryCache,
+    sqlite=SQLiteCache,
+)
+
+
+class RateLimiter(object):
+    """
+    Token bucket rate limiter, safe to share between threads.
+
+    Parameters
+    ----------
+    requests_per_second : float
+        The rate at which tokens are added to the bucket.
+    burst : int, default=1
+        The size of the bucket, the number of requests that can be made at once without waiting.
+
+    Raises
+    ------
+    ValueError
+        If `requests_per_second` is not greater than 0.
+    """
+
+    def __init__(self, requests_per_second, burst=1):
+        # type: (float, int) -> None
+        if not float(requests_per_second) > 0:  # also rejects nan
+            raise ValueError('requests_per_second must be greater than 0, got %r' % requests_per_second)
+        self.requests_per_second = float(requests_per_second)
+        self.burst = max(int(burst), 1)
+        self.requests = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self._tokens = float(self.burst)
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        # type: () -> float
+        """
+        Take a token from the bucket, pausing the current thread until one is available.
+
+        Returns
+        -------
+        float
+            The time (in seconds) the thread was paused for.
+        """
+        with self._lock:
+            now = time.time()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.requests_per_second)
+            self._updated = now
+
+            # reserve the token now, so waiting threads are served in order without holding the lock
+            self._tokens -= 1
+            wait = -self._tokens / self.requests_per_second if self._tokens < 0 else 0.0
+
+            self.requests += 1
+            if wait:
+                self.waits += 1
+                self.wait_time += wait
+
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def stats(self):
+        # type: () -> dict
+        """
+        Get the configuration and metrics of the rate limiter.
+
+        Returns
+        -------
+        dict
+            Dictionary with the ``requests_per_second``, ``burst``, ``requests``, ``waits`` and ``wait_time`` of the
+            rate limiter.
+        """
+        with self._lock:
+            return dict(
+                requests_per_second=self.requests_per_second,
+                burst=self.burst,
+                requests=self.requests,
+                waits=self.waits,
+                wait_time=self.wait_time,
+            )
+
+
+rate_limiters = dict()  # type: dict
+_rate_limiters_lock = threading.Lock()
+
+
+def set_rate_limit(host, requests_per_second, burst=1):
+    # type: (str, Optional[float], int) -> None
+    """
+    Limit the rate of network requests made to a host, from all threads.
+
+    Parameters
+    ----------
+    host : str
+        The host, e.g. ``api.example.com`` or ``localhost:8000``.
+    requests_per_second : Optional[float]
+        The maximum sustained rate of requests. If ``None``, the rate limit for the host is removed.
+    burst : int, default=1
+        The number of requests that can be made at once before the rate applies.
+
+    Raises
+    ------
+    ValueError
+        If `requests_per_second` is not greater than 0.
+    """
+    host = host.lower()
+    with _rate_limiters_lock:
+        if requests_per_second is None:
+            rate_limiters.pop(host, None)
+        else:
+            rate_limiters[host] = RateLimiter(requests_per_second=requests_per_second, burst=burst)
+
+
+def get_rate_limiter(url):
+    # type: (str) -> Optional[RateLimiter]
+    """
+    Get the rate limiter for the host of a url.
+
+    Parameters
+    ----------
+    url : str
+        The url.
+
+    Returns
+    -------
+    Optional[RateLimiter]
+        The rate limiter for the host and port of the url, or the host only, if there is one.
+    """
+    if not rate_limiters:
+        return None
+
+    parsed_url = urlparse(url)
+    limiter = rate_limiters.get(parsed_url.netloc.lower())
+    if limiter is None and parsed_url.hostname:
+        limiter = rate_limiters.get(parsed_url.hostname.lower())
+    return limiter
+
+
+# cache times of error responses, keyed by status code (e.g. ``404``) or status class (e.g. ``'5xx'``)
+negative_cache_times = dict()  # type: dict
+
+
+def set_negative_cache_time(status, cache_time):
+    # type: (any, Optional[float]) -> None
+    """
+    Cache error responses with the given status for a limited time, so repeated requests do not reach the server.
+
+    Parameters
+    ----------
+    status : Union[int, str]
+        The status code, e.g. ``404``, or the status class, e.g. ``'4xx'``. A status code takes precedence over its
+        class.
+    cache_time : Optional[float]
+        The maximum age (in seconds) of the cached error responses. If ``None``, they are no longer cached.
+
+    Raises
+    ------
+    ValueError
+        If the status is not a status code or status class.
+    """
+    key = str(status).lower()
+    if key.isdigit():
+        key = int(key)
+    elif len(key) != 3 or key[0] not in '12345' or key[1:] != 'xx':
+        raise ValueError("Invalid status '%s', use a status code like 404 or a status class like '4xx'" % status)
+
+    if cache_time is None:
+        negative_cache_times.pop(key, None)
+    else:
+        negative_cache_times[key] = cache_time
+
+
+def get_negative_cache_time(status_code):
+    # type: (int) -> Optional[float]
+    """
+    Get the cache time of error responses with a status code.
+
+    Parameters
+    ----------
+    status_code : int
+        The status code.
+
+    Returns
+    -------
+    Optional[float]
+        The cache time (in seconds) of the status code, or of its class, if there is one.
+    """
+    if not negative_cache_times:
+        return None
+
+    cache_time = negative_cache_times.get(status_code)
+    if cache_time is None:
+        cache_time = negative_cache_times.get('%dxx' % (status_code // 100))
+    return cache_time
+
+
+class Cassette(object):
+    """
+    Records network responses to a file, and replays them instead of making network requests.
+
+    Responses are matched to requests with ``create_cache_key``, so the cache key rules apply. While a cassette is in
+    use (as a context manager), it applies to requests made by all threads. It is saved when the context exits::
+
+        with Cassette(path='tests/cassettes/tvdb.json', mode='replay'):
+            JSON.ObjectFromURL(url)
+
+    Parameters
+    ----------
+    path : str
+        The path of the cassette file (JSON).
+    mode : str, default='auto'
+        ``replay`` only uses recorded responses and raises a ``requests.exceptions.ConnectionError`` for other
+        requests, ``record`` makes every request over the network and records its response, and ``auto`` replays
+        recorded responses and records the others.
+
+    Raises
+    ------
+    ValueError
+        If the mode is not supported.
+    """
+    modes = ('auto', 'record', 'replay')
+
+    def __init__(self, path, mode='auto'):
+        # type: (str, str) -> None
+        if mode not in self.modes:
+            raise ValueError('Unsupported cassette mode "%s", use one of: %s' % (mode, ', '.join(self.modes)))
+
+        self.path = path
+        self.mode = mode
+        self.plays = 0
+        self.recordings = 0
+        self._lock = threading.Lock()
+        self._previous = None  # type: Optional[Cassette]
+        self._modified = False
+        self._pending = []  # type: list
+
+        self.entries = dict()  # type: dict
+        if os.path.isfile(path):
+            with io.open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def __enter__(self):
+        # type: () -> Cassette
+        global active_cassette
+        self._previous = active_cassette
+        active_cassette = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        global active_cassette
+        active_cassette = self._previous
+        self._previous = None
+        self.save()
+
+    def play(self, request):
+        # type: (requests.PreparedRequest) -> Optional[requests.Response]
+        """
+        Get the recorded response of a request.
+
+        Parameters
+        ----------
+        request : requests.PreparedRequest
+            The request.
+
+        Returns
+        -------
+        Optional[requests.Response]
+            The recorded response, or ``None`` if the request should be made over the network.
+
+        Raises
+        ------
+        requests.exceptions.ConnectionError
+            If the request has no recorded response in ``replay`` mode.
+        """
+        self._record_pending()
+        if self.mode == 'record':
+            return None
+
+        with self._lock:
+            entry = self.entries.get(create_cache_key(request))
+
+        if entry is None:
+            if self.mode == 'replay':
+                raise requests.exceptions.ConnectionError(
+                    'No recorded response for %s %s in cassette %s' % (request.method, request.url, self.path),
+                    request=request)
+            return None
+
+        if 'base64' in entry:
+            content = base64.b64decode(entry['base64'])
+        else:
+            content = entry['text'].encode('utf-8')
+
+        response = requests.Response()
+        response.status_code = entry['status_code']
+        response.reason = entry['reason']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = entry['encoding']
+        response.url = entry['url']
+        response.request = request
+        response.elapsed = datetime.timedelta(0)
+        response._content = content
+        response._content_consumed = True
+        response.replayed = True
+        for cookie in entry.get('cookies', []):
+            response.cookies.set(**cookie)
+
+        with self._lock:
+            self.plays += 1
+        return response
+
+    def record(self, request, response):
+        # type: (requests.PreparedRequest, requests.Response) -> None
+        """
+        Record the response of a request. The body of the response is read.
+
+        Parameters
+        ----------
+        request : requests.PreparedRequest
+            The request.
+        response : requests.Response
+            The response.
+        """
+        content = response.content or b''
+
+        # the body is recorded decoded
+        headers = dict((name, value) for name, value in response.headers.items()
+                       if name.lower() not in ('content-encoding', 'content-length', 'transfer-encoding'))
+        headers['Content-Length'] = str(len(content))
+
+        entry = dict(
+            method=request.method,
+            url=response.url,
+            status_code=response.status_code,
+            reason=response.reason,
+            headers=headers,
+            encoding=response.encoding,
+            cookies=[dict(name=cookie.name, value=cookie.value, domain=cookie.domain, path=cookie.path)
+                     for cookie in response.cookies],
+        )
+        try:
+            entry['text'] = content.decode('utf-8')
+        except UnicodeDecodeError:
+            entry['base64'] = base64.b64encode(content).decode('ascii')
+
+        with self._lock:
+            self.entries[create_cache_key(request)] = entry
+            self.recordings += 1
+            self._modified = True
+
+    def defer(self, request, response):
+        # type: (requests.PreparedRequest, requests.Response) -> None
+        """
+        Record the response of a request which was made with ``stream=True`` once its body has been read, so the body
+        is not read before a maximum size can be enforced. Responses which are closed before their body is read are
+        not recorded.
+
+        Parameters
+        ----------
+        request : requests.PreparedRequest
+            The request.
+        response : requests.Response
+            The response.
+        """
+        response.request = request
+        response.cassette = self
+        with self._lock:
+            self._pending.append(response)
+
+    def record_streamed(self, response):
+        # type: (requests.Response) -> None
+        """
+        Record a response passed to ``defer``, after its body has been read.
+
+        Parameters
+        ----------
+        response : requests.Response
+            The response.
+        """
+        if getattr(response, 'cassette', None) is not self:
+            return  # not deferred, or already recorded
+        response.cassette = None
+
+        with self._lock:
+            self._pending = [pending for pending in self._pending if pending is not response]
+        self.record(request=response.request, response=response)
+
+    def _record_pending(self):
+        # type: () -> None
+        with self._lock:
+            pending = list(self._pending)
+
+        for response in pending:
+            if response._content_consumed and isinstance(response._content, bytes):
+                self.record_streamed(response=response)
+            elif getattr(response.raw, 'closed', True):
+                # closed before the body was read, e.g. because it was too large
+                response.cassette = None
+                with self._lock:
+                    self._pending = [item for item in self._pending if item is not response]
+
+    def save(self):
+        # type: () -> None
+        """
+        Write the recorded responses to the cassette file, if there are new recordings.
+        """
+        self._record_pending()
+        with self._lock:
+            if not self._modified:
+                return
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            data = json.dumps(self.entries, indent=2, sort_keys=True)
+            with io.open(self.path, 'w', encoding='utf-8') as f:
+                f.write(u'{}'.format(data))
+            self._modified = False
+
+
+# the cassette in use, see ``Cassette``
+active_cassette = None  # type: Optional[Cassette]
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """
+    Transport adapter which applies the rate limit of the host before sending a request.
+
+    Only requests which are sent over the network pass through the adapter, responses from the cache are not limited.
+    When a ``Cassette`` is in use, recorded responses are returned without a network request or rate limit.
+    """
+
+    def send(self, request, **kwargs):
+        cassette = active_cassette
+        if cassette is not None:
+            response = cassette.play(request)
+            if response is not None:
+                return response
+
+        limiter = get_rate_limiter(url=request.url)
+        if limiter is not None:
+            limiter.acquire()
+        response = super(RateLimitedAdapter, self).send(request, **kwargs)
+
+        if cassette is not None:
+            if kwargs.get('stream') and not response.is_redirect:
+                # the body is recorded once it has been read, so a maximum size is enforced first
+                cassette.defer(request=request, response=response)
+            else:
+                cassette.record(request=request, response=response)
+        return response
+
+
+# connection settings of the adapters mounted on every session
+adapter_settings = dict(
+    pool_size=DEFAULT_POOL_SIZE,
+    retries=DEFAULT_RETRIES,
+    retry_backoff=DEFAULT_RETRY_BACKOFF,
+    keep_alive=True,
+)
+
+
+def _mount_adapters(new_session):
+    # type: (requests.Session) -> None
+    retries = Retry(
+        total=adapter_settings['retries'],
+        connect=adapter_settings['retries'],
+        read=adapter_settings['retries'] or False,  # like requests, raise read timeouts directly when not retrying
+        redirect=None,
+        status=adapter_settings['retries'],
+        status_forcelist=RETRY_STATUS_CODES,
+        backoff_factor=adapter_settings['retry_backoff'],
+        raise_on_redirect=False,
+        raise_on_status=False,
+    )
+    for prefix in ('http://', 'https://'):
+        new_session.mount(prefix, RateLimitedAdapter(
+            pool_connections=adapter_settings['pool_size'],
+            pool_maxsize=adapter_settings['pool_size'],
+            max_retries=retries,
+        ))
+
+    if adapter_settings['keep_alive']:
+        new_session.headers.pop('Connection', None)
+    else:
+        new_session.headers['Connection'] = 'close'
+
+
+class HTTPSession(CachedSession):
+    """
+    Cached session which revalidates expired responses with the server.
+
+    When a cached response has expired and has an ``ETag`` or ``Last-Modified`` header, a conditional request is made
+    using ``If-None-Match`` or ``If-Modified-Since``. If the server responds with ``304 Not Modified``, the cached
+    response is used and its age is reset, otherwise the new response replaces it.
+
+    If a ``stale_time`` is set, a response which expired less than ``stale_time`` ago is returned immediately, marked
+    as ``stale``, and is refreshed by a ``precache_queue`` worker.
+
+    Responses are requested with every content encoding urllib3 can decode (``gzip``, ``deflate``, and ``br`` when
+    brotli is installed), unless the request sets its own ``Accept-Encoding`` header.
+
+    Error responses with a negative cache time (see ``set_negative_cache_time``) are cached for that time, or for the
+    cache time of the session if it is shorter. They are never revalidated or served stale.
+
+    Parameters
+    ----------
+    stale_time : Optional[float]
+        The time (in seconds) after expiry during which a cached response is served while it is refreshed.
+    **kwargs
+        Keyword arguments passed to ``CachedSession``.
+    """
+
+    def __init__(self, stale_time=None, **kwargs):
+        # type: (Optional[float], **any) -> None
+        super(HTTPSession, self).__init__(**kwargs)
+        self._stale_time = datetime.timedelta(seconds=stale_time) if stale_time else None
+
+        # every encoding urllib3 can decode, including brotli when it is installed
+        self.headers['Accept-Encoding'] = ACCEPT_ENCODING
+
+    def send(self, request, **kwargs):
+        if self._is_cache_disabled or request.method not in self._cache_allowable_methods:
+            response = requests.Session.send(self, request, **kwargs)
+            response.from_cache = False
+            return response
+
+        cache_key = self.cache.create_key(request)
+
+        try:
+            cached_response, timestamp = self.cache.get_response_and_time(cache_key)
+        except (ImportError, TypeError):
+            cached_response, timestamp = None, None
+
+        if cached_response is not None:
+            age = datetime.datetime.utcnow() - timestamp
+
+            if cached_response.status_code not in self._cache_allowable_codes:
+                negative_cache_time = self._negative_cache_time(status_code=cached_response.status_code)
+                if negative_cache_time is not None and age <= negative_cache_time:
+                    cached_response.from_cache = True
+                    return dispatch_hook('response', request.hooks, cached_response, **kwargs)
+
+                self.cache.delete(cache_key)
+                return self._send_and_cache(request=request, cache_key=cache_key, **kwargs)
+            if self._cache_expire_after is None or age <= self._cache_expire_after:
+                cached_response.from_cache = True
+                return dispatch_hook('response', request.hooks, cached_response, **kwargs)
+
+            if self._stale_time is not None and age <= self._cache_expire_after + self._stale_time:
+                precache_queue.put(key=('refresh', cache_key), func=self._refresh, request=request,
+                                   cache_key=cache_key, **kwargs)
+                cached_response.from_cache = True
+                cached_response.stale = True
+                return dispatch_hook('response', request.hooks, cached_response, **kwargs)
+
+            conditional_headers = self._conditional_headers(cached_response)
+            if conditional_headers:
+                return self._revalidate(request=request, cache_key=cache_key, cached_response=cached_response,
+                                        conditional_headers=conditional_headers, **kwargs)
+
+            self.cache.delete(cache_key)
+
+        return self._send_and_cache(request=request, cache_key=cache_key, **kwargs)
+
+    def _negative_cache_time(self, status_code):
+        # type: (int) -> Optional[datetime.timedelta]
+        cache_time = get_negative_cache_time(status_code=status_code)
+        if cache_time is None:
+            return None
+
+        cache_time = datetime.timedelta(seconds=cache_time)
+        if self._cache_expire_after is not None:
+            cache_time = min(cache_time, self._cache_expire_after)
+        return cache_time
+
+    def _is_cacheable(self, response):
+        # type: (requests.Response) -> bool
+        return response.status_code in self._cache_allowable_codes or \
+            get_negative_cache_time(status_code=response.status_code) is not None
+
+    @staticmethod
+    def _conditional_headers(response):
+        # type: (requests.Response) -> dict
+        headers = dict()
+        if response.headers.get('ETag'):
+            headers['If-None-Match'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            headers['If-Modified-Since'] = response.headers['Last-Modified']
+        return headers
+
+    def _save_response(self, cache_key, response, stream=False):
+        # type: (str, requests.Response, bool) -> None
+        if stream:
+            # saving reads the whole body, so streamed responses are saved once the body has been read
+            response.cache_key = cache_key
+        else:
+            self.cache.save_response(cache_key, response)
+
+    def save_streamed_response(self, response):
+        # type: (requests.Response) -> None
+        """
+        Save a response which was requested with ``stream=True`` to the cache, and record it in the cassette in use,
+        after its body has been read.
+
+        Parameters
+        ----------
+        response : requests.Response
+            The response.
+        """
+        cassette = getattr(response, 'cassette', None)
+        if cassette is not None:
+            cassette.record_streamed(response=response)
+
+        cache_key = getattr(response, 'cache_key', None)
+        if cache_key is not None:
+            response.cache_key = None
+            self.cache.save_response(cache_key, response)
+
+    def _send_and_cache(self, request, cache_key, **kwargs):
+        # type: (requests.PreparedRequest, str, **any) -> requests.Response
+        response = requests.Session.send(self, request, **kwargs)
+        if self._is_cacheable(response):
+            self._save_response(cache_key=cache_key, response=response, stream=kwargs.get('stream', False))
+        response.from_cache = False
+        return response
+
+    def _refresh(self, request, cache_key, **kwargs):
+        # type: (requests.PreparedRequest, str, **any) -> None
+        kwargs['stream'] = False
+
+        try:
+            cached_response, timestamp = self.cache.get_response_and_time(cache_key)
+        except (ImportError, TypeError):
+            cached_response, timestamp = None, None
+
+        if cached_response is not None and datetime.datetime.utcnow() - timestamp <= self._cache_expire_after:
+            return  # already refreshed
+
+        conditional_headers = self._conditional_headers(cached_response) if cached_response is not None else None
+        if conditional_headers:
+            response = self._revalidate(request=request, cache_key=cache_key, cached_response=cached_response,
+                                        conditional_headers=conditional_headers, **kwargs)
+        else:
+            response = self._send_and_cache(request=request, cache_key=cache_key, **kwargs)
+        response.close()
+
+    def _revalidate(self, request, cache_key, cached_response, conditional_headers, **kwargs):
+        # type: (requests.PreparedRequest, str, requests.Response, dict, **any) -> requests.Response
+        conditional_request = request.copy()
+        conditional_request.headers.update(conditional_headers)
+
+        try:
+            response = requests.Session.send(self, conditional_request, **kwargs)
+        except Exception:
+            if self._return_old_data_on_error:
+                cached_response.from_cache = True
+                return cached_response
+            raise
+
+        if response.status_code != 304:
+            if self._is_cacheable(response):
+                self._save_response(cache_key=cache_key, response=response, stream=kwargs.get('stream', False))
+            else:
+                self.cache.delete(cache_key)
+            response.from_cache = False
+            return response
+
+        # not modified, keep the cached body with the updated headers and reset its age
+        response.close()
+        for name, value in response.headers.items():
+            if name.lower() not in ('content-encoding', 'content-length', 'transfer-encoding'):
+                cached_response.headers[name] = value
+        self.cache.save_response(cache_key, cached_response)
+        cached_response.from_cache = True
+        cached_response.revalidated = True
+        return dispatch_hook('response', request.hooks, cached_response, **kwargs)
+
+
+session = HTTPSession(backend=MemoryCache())
+_mount_adapters(session)
+
+# sessions are pooled by cache policy and host, every pooled session shares the cache backend and cookies of
+# ``session``, the least recently used sessions are dropped once there are ``MAX_POOLED_SESSIONS``
+_session_pool = OrderedDict()  # type: OrderedDict
+_session_pool_lock = threading.Lock()
 
 
 def check_port(url):
@@ -42,46 +1091,903 @@ def check_port(url):
         raise Exception("Accessing the media server's HTTP interface is not permitted.")
 
 
+def get_session(url, cache_time=None, stale_time=None):
+    # type: (str, Optional[float], Optional[float]) -> HTTPSession
+    """
+    Get the pooled session to use for the given url and cache time.
+
+    Each session has a fixed cache expiry, so concurrent requests with different cache times never modify shared
+    state. The sessions share a single cache backend and cookie jar, so a response cached, or a cookie set, by one
+    session is available to the others. At most ``MAX_POOLED_SESSIONS`` sessions are kept.
+
+    Parameters
+    ----------
+    url : str
+        The url that will be requested.
+    cache_time : Optional[float]
+        The maximum age (in seconds) of cached data. If not set, the session will not use the cache.
+    stale_time : Optional[float]
+        The time (in seconds) after expiry during which cached data is served while it is refreshed in the background.
+
+    Returns
+    -------
+    HTTPSession
+        The session for the host of the url and the cache time.
+    """
+    cache_time = cache_time if cache_time else None
+    stale_time = stale_time if cache_time and stale_time else None
+    key = (urlparse(url).netloc.lower(), cache_time, stale_time)
+
+    with _session_pool_lock:
+        try:
+            pooled_session = _session_pool.pop(key)
+        except KeyError:
+            pass
+        else:
+            _session_pool[key] = pooled_session  # most recently used
+            return pooled_session
+
+        pooled_session = HTTPSession(backend=session.cache, expire_after=cache_time, stale_time=stale_time)
+        pooled_session.cookies = session.cookies
+        _mount_adapters(pooled_session)
+        if cache_time is None:
+            # disable the cache for the lifetime of this session, so it never needs to be toggled between requests
+            pooled_session._is_cache_disabled = True
+
+        _session_pool[key] = pooled_session
+        while len(_session_pool) > MAX_POOLED_SESSIONS:
+            # requests which are using the session keep a reference to it, so it is not closed
+            _session_pool.popitem(last=False)
+        return pooled_session
+
+
+def set_cache_backend(backend, location=None, max_size=DEFAULT_CACHE_MAX_SIZE,
+                      compress_level=DEFAULT_CACHE_COMPRESS_LEVEL):
+    # type: (str, Optional[str], Optional[int], int) -> BaseCache
+    """
+    Replace the cache backend used by all sessions.
+
+    Parameters
+    ----------
+    backend : str
+        The name of the backend, ``memory`` or ``sqlite``.
+    location : Optional[str]
+        The path of the database file, without the extension. Required for the ``sqlite`` backend.
+    max_size : Optional[int]
+        The maximum size (in bytes) of the cached response bodies. If ``None``, the cache is unbounded.
+    compress_level : int, default=6
+        The zlib compression level (1-9) of the cached response bodies. If ``0``, they are not compressed.
+
+    Returns
+    -------
+    BaseCache
+        The new cache backend.
+
+    Raises
+    ------
+    ValueError
+        If the backend is not supported.
+    """
+    try:
+        backend_class = cache_backends[backend]
+    except KeyError:
+        raise ValueError('Unsupported cache backend "%s", use one of: %s' %
+                         (backend, ', '.join(sorted(cache_backends))))
+
+    if backend_class is SQLiteCache:
+        new_cache = SQLiteCache(location=location, max_size=max_size, compress_level=compress_level)
+    else:
+        new_cache = backend_class(max_size=max_size, compress_level=compress_level)
+
+    with _session_pool_lock:
+        session.cache = new_cache
+        for pooled_session in _session_pool.values():
+            pooled_session.cache = new_cache
+
+    return new_cache
+
+
+def configure_adapters(pool_size=None, retries=None, retry_backoff=None, keep_alive=None):
+    # type: (Optional[int], Optional[int], Optional[float], Optional[bool]) -> dict
+    """
+    Change the connection settings of all sessions.
+
+    New adapters are mounted on ``session`` and every pooled session. Requests which are already running finish with
+    the previous adapters.
+
+    Parameters
+    ----------
+    pool_size : Optional[int]
+        The number of connections kept open to each host. Unchanged if ``None``.
+    retries : Optional[int]
+        The number of times a request is retried after a connection error or a ``429``, ``500``, ``502``, ``503`` or
+        ``504`` response. Only idempotent methods are retried. Unchanged if ``None``.
+    retry_backoff : Optional[float]
+        The backoff factor (in seconds) between retries, the sleep doubles after each retry. A ``Retry-After``
+        header sent by the server is respected. Unchanged if ``None``.
+    keep_alive : Optional[bool]
+        Whether connections are reused between requests. Unchanged if ``None``.
+
+    Returns
+    -------
+    dict
+        The updated settings.
+    """
+    with _session_pool_lock:
+        for name, value in (('pool_size', pool_size), ('retries', retries), ('retry_backoff', retry_backoff),
+                            ('keep_alive', keep_alive)):
+            if value is not None:
+                adapter_settings[name] = value
+
+        for pooled_session in [session] + list(_session_pool.values()):
+            _mount_adapters(pooled_session)
+
+        return dict(adapter_settings)
+
+
+def map_urls(func, urls, max_workers=DEFAULT_MAX_WORKERS, per_host_limit=DEFAULT_PER_HOST_LIMIT):
+    # type: (callable, list, int, Optional[int]) -> list
+    """
+    Call a function for each url using a bounded pool of threads.
+
+    Parameters
+    ----------
+    func : callable
+        The function to call, it is passed the url as the only argument.
+    urls : list
+        The urls.
+    max_workers : int, default=8
+        The maximum number of threads.
+    per_host_limit : Optional[int], default=4
+        The maximum number of calls for the same host that may run at once. If ``None``, there is no limit.
+
+    Returns
+    -------
+    list
+        The return values of the function, in the same order as `urls`.
+
+    Raises
+    ------
+    Exception
+        The first exception raised by the function, in the order of `urls`, after all calls have finished.
+    """
+    urls = list(urls)
+    results = [None] * len(urls)
+    errors = [None] * len(urls)
+
+    host_semaphores = dict()
+    for url in urls:
+        host = urlparse(url).netloc.lower()
+        if host not in host_semaphores and per_host_limit:
+            host_semaphores[host] = threading.BoundedSemaphore(per_host_limit)
+
+    work = Queue()
+    for index, url in enumerate(urls):
+        work.put((index, url))
+
+    def worker():
+        while True:
+            try:
+                index, url = work.get_nowait()
+            except Empty:
+                return
+
+            semaphore = host_semaphores.get(urlparse(url).netloc.lower())
+            if semaphore is not None:
+                semaphore.acquire()
+            try:
+                results[index] = func(url)
+            except Exception as e:
+                errors[index] = e
+            finally:
+                if semaphore is not None:
+                    semaphore.release()
+
+    threads = [threading.Thread(target=worker) for _ in range(min(max(max_workers, 1), len(urls)))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for error in errors:
+        if error is not None:
+            raise error
+
+    return results
+
+
+def iter_content(response, max_size=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    # type: (requests.Response, Optional[int], int) -> Iterator[bytes]
+    """
+    Iterate over the body of a response, without reading more than the maximum size into memory.
+
+    Parameters
+    ----------
+    response : requests.Response
+        The response, requested with ``stream=True``.
+    max_size : Optional[int]
+        The maximum size, in bytes, to accept.
+    chunk_size : int, default=65536
+        The number of bytes to read at a time.
+
+    Yields
+    ------
+    bytes
+        The chunks of the body.
+
+    Raises
+    ------
+    Exception
+        If the body is larger than `max_size`. The response is closed before raising.
+    """
+    if max_size is not None:
+        try:
+            content_length = int(response.headers.get('Content-Length'))
+        except (TypeError, ValueError):
+            pass
+        else:
+            # only check uncompressed bodies, the length of a compressed body is not the length of the data
+            if content_length > max_size and not response.headers.get('Content-Encoding'):
+                response.close()
+                raise Exception("Data of size %d is greater than the maximum size %d" % (content_length, max_size))
+
+    size = 0
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        size += len(chunk)
+        if max_size is not None and size > max_size:
+            response.close()
+            raise Exception("Data of size %d is greater than the maximum size %d" % (size, max_size))
+        yield chunk
+
+
+def iter_streamed_content(response, max_size=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    # type: (requests.Response, Optional[int], int) -> Iterator[bytes]
+    """
+    Iterate over the body of a streamed response like ``iter_content``, and save the response to the cache once the
+    whole body has been read, if it was requested with a cache time. The response is also recorded in the
+    ``Cassette`` in use.
+
+    Only responses which will be cached or recorded keep their body in memory while it is read.
+
+    Parameters
+    ----------
+    response : requests.Response
+        The response, requested with ``stream=True``.
+    max_size : Optional[int]
+        The maximum size, in bytes, to accept.
+    chunk_size : int, default=65536
+        The number of bytes to read at a time.
+
+    Yields
+    ------
+    bytes
+        The chunks of the body.
+    """
+    if getattr(response, 'cache_key', None) is None and getattr(response, 'cassette', None) is None:
+        for chunk in iter_content(response=response, max_size=max_size, chunk_size=chunk_size):
+            yield chunk
+        return
+
+    chunks = []
+    for chunk in iter_content(response=response, max_size=max_size, chunk_size=chunk_size):
+        chunks.append(chunk)
+        yield chunk
+
+    response._content = b''.join(chunks)
+    response._content_consumed = True
+    session.save_streamed_response(response)
+
+
+class ResponseReader(object):
+    """
+    Read-only file-like object for the body of a streamed response, which can be passed directly to parsers.
+
+    The body is read with ``iter_streamed_content``, so the response is cached, and recorded in the ``Cassette`` in use,
+    once it has been read in full.
+
+    Parameters
+    ----------
+    response : requests.Response
+        The response, requested with ``stream=True``.
+    max_size : Optional[int]
+        The maximum size, in bytes, to accept. Reading raises an ``Exception`` once it has been exceeded.
+    chunk_size : int, default=65536
+        The number of bytes to read from the response at a time.
+    """
+
+    def __init__(self, response, max_size=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        # type: (requests.Response, Optional[int], int) -> None
+        self._chunks = iter_streamed_content(response=response, max_size=max_size, chunk_size=chunk_size)
+        self._buffer = b''
+
+    def read(self, size=-1):
+        # type: (Optional[int]) -> bytes
+        if size is None or size < 0:
+            data = self._buffer + b''.join(self._chunks)
+            self._buffer = b''
+            return data
+
+        while len(self._buffer) < size:
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                break
+
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def percentile(values, percent):
+    # type: (list, float) -> Optional[float]
+    """
+    Get the percentile of a list of values, using the nearest-rank method.
+
+    Parameters
+    ----------
+    values : list
+        The values.
+    percent : float
+        The percentile, between 0 and 100.
+
+    Returns
+    -------
+    Optional[float]
+        The percentile, or ``None`` if there are no values.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    rank = int(math.ceil(percent / 100.0 * len(values))) - 1
+    return values[min(max(rank, 0), len(values) - 1)]
+
+
+class RequestStats(object):
+    """
+    Timing and cache metrics for the requests made by ``http_request``, aggregated per host.
+
+    Each request is recorded with its host, method, status code, whether it was served from the cache, whether the
+    cached response was revalidated, whether it shared the response of an identical concurrent request
+    (``coalesced``), the time until the response headers were received (``elapsed``), the total time including reading
+    the body (``total_time``) and the size of the body. The records are passed to the registered callbacks, and the
+    most recent timings of each host are kept to calculate percentiles.
+
+    .. Note:: ``requests`` does not expose DNS and connect times, they are included in ``elapsed``.
+
+    Parameters
+    ----------
+    max_samples : int, default=1000
+        The number of recent timings to keep for each host.
+    """
+
+    def __init__(self, max_samples=DEFAULT_STATS_SAMPLES):
+        # type: (int) -> None
+        self.max_samples = max_samples
+        self._hosts = dict()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def add_callback(self, callback):
+        # type: (callable) -> None
+        """
+        Register a function which is called with the record (a dictionary) of each request.
+
+        Parameters
+        ----------
+        callback : callable
+            The function.
+        """
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        # type: (callable) -> None
+        """
+        Unregister a function added with ``add_callback``.
+
+        Parameters
+        ----------
+        callback : callable
+            The function.
+        """
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def record(self, url, method, response, total_time):
+        # type: (str, str, Optional[requests.Response], float) -> dict
+        """
+        Record a request.
+
+        Parameters
+        ----------
+        url : str
+            The requested url.
+        method : str
+            The request method.
+        response : Optional[requests.Response]
+            The response, or ``None`` if the request raised an exception.
+        total_time : float
+            The total time (in seconds) of the request.
+
+        Returns
+        -------
+        dict
+            The record.
+        """
+        content = getattr(response, '_content', None)
+        elapsed = getattr(response, 'elapsed', None)
+        entry = dict(
+            url=url,
+            host=urlparse(url).netloc.lower(),
+            method=method,
+            status_code=getattr(response, 'status_code', None),
+            error=response is None,
+            from_cache=getattr(response, 'from_cache', False),
+            revalidated=getattr(response, 'revalidated', False),
+            coalesced=getattr(response, 'coalesced', False),
+            elapsed=elapsed.total_seconds() if elapsed is not None else None,
+            total_time=total_time,
+            size=len(content) if isinstance(content, bytes) else None,
+        )
+
+        with self._lock:
+            try:
+                host = self._hosts[entry['host']]
+            except KeyError:
+                host = self._hosts[entry['host']] = dict(
+                    requests=0,
+                    errors=0,
+                    cache_hits=0,
+                    revalidations=0,
+                    coalesced=0,
+                    bytes=0,
+                    status_codes=dict(),
+                    elapsed=deque(maxlen=self.max_samples),
+                    total_time=deque(maxlen=self.max_samples),
+                )
+            host['requests'] += 1
+            host['errors'] += entry['error']
+            host['cache_hits'] += entry['from_cache']
+            host['revalidations'] += entry['revalidated']
+            host['coalesced'] += entry['coalesced']
+            host['bytes'] += entry['size'] or 0
+            if entry['status_code'] is not None:
+                host['status_codes'][entry['status_code']] = host['status_codes'].get(entry['status_code'], 0) + 1
+            if entry['elapsed'] is not None:
+                host['elapsed'].append(entry['elapsed'])
+            host['total_time'].append(total_time)
+            callbacks = list(self._callbacks)
+
+        for callback in callbacks:
+            try:
+                callback(entry)
+            except Exception:
+                _Log.Exception('Error in request stats callback')
+
+        return entry
+
+    def summary(self):
+        # type: () -> dict
+        """
+        Get the aggregated metrics of each host.
+
+        Returns
+        -------
+        dict
+            Dictionary keyed by host. Each value contains the number of ``requests``, ``errors``, ``cache_hits``,
+            ``cache_misses``, ``revalidations`` and ``coalesced`` requests, the ``hit_ratio``, the total ``bytes``,
+            the count of each of the ``status_codes``, and the ``p50``, ``p90``, ``p99`` and ``max`` of the recent
+            ``elapsed`` and ``total_time`` timings (in seconds).
+        """
+        summary = dict()
+        with self._lock:
+            for name, host in self._hosts.items():
+                summary[name] = dict(
+                    requests=host['requests'],
+                    errors=host['errors'],
+                    cache_hits=host['cache_hits'],
+                    cache_misses=host['requests'] - host['errors'] - host['cache_hits'] - host['coalesced'],
+                    revalidations=host['revalidations'],
+                    coalesced=host['coalesced'],
+                    hit_ratio=float(host['cache_hits']) / host['requests'],
+                    bytes=host['bytes'],
+                    status_codes=dict(host['status_codes']),
+                )
+                for timing in ('elapsed', 'total_time'):
+                    values = list(host[timing])
+                    summary[name][timing] = dict(
+                        p50=percentile(values, 50),
+                        p90=percentile(values, 90),
+                        p99=percentile(values, 99),
+                        max=max(values) if values else None,
+                    )
+        return summary
+
+    def reset(self):
+        # type: () -> None
+        """
+        Discard all recorded metrics. Registered callbacks are kept.
+        """
+        with self._lock:
+            self._hosts.clear()
+
+
+request_stats = RequestStats()
+
+
+class SingleFlight(object):
+    """
+    Deduplicate concurrent calls with the same key.
+
+    The first caller of a key runs the function, callers with the same key which arrive while it is running wait for
+    it to finish and share its result, or its exception.
+    """
+
+    def __init__(self):
+        self._flights = dict()
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        # type: (any, callable) -> tuple
+        """
+        Run a function, unless a call with the same key is already running.
+
+        Parameters
+        ----------
+        key : any
+            Hashable key identifying the call.
+        func : callable
+            The function to run, without arguments.
+
+        Returns
+        -------
+        tuple
+            The result of the function, and ``True`` if it was shared from a concurrent call, otherwise ``False``.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = dict(event=threading.Event(), result=None, error=None)
+
+        if not leader:
+            flight['event'].wait()
+            if flight['error'] is not None:
+                raise flight['error']
+            return flight['result'], True
+
+        try:
+            flight['result'] = func()
+        except Exception as e:
+            flight['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight['event'].set()
+
+        return flight['result'], False
+
+    def __len__(self):
+        # type: () -> int
+        with self._lock:
+            return len(self._flights)
+
+
+in_flight = SingleFlight()
+
+
+def _flight_key(method, url, body, headers, max_size, follow_redirects=True, cache_time=None, stale_time=None,
+                timeout=None):
+    # type: (str, str, any, Optional[dict], Optional[int], bool, Optional[float], Optional[float], any) -> tuple
+    if isinstance(body, dict):
+        body = repr(sorted(body.items()))
+    headers = tuple(sorted((str(k).lower(), str(v)) for k, v in headers.items())) if headers else None
+
+    # requests which would use different pooled sessions, or follow redirects differently, get different responses
+    cache_time = cache_time if cache_time else None
+    stale_time = stale_time if cache_time and stale_time else None
+    return method, url, body, headers, max_size, bool(follow_redirects), cache_time, stale_time, timeout
+
+
+def _share_response(response):
+    # type: (requests.Response) -> requests.Response
+    shared = requests.Response()
+    shared.__dict__.update(response.__dict__)
+    shared.coalesced = True
+    return shared
+
+
 def http_request(url, values=None, headers=None, cache_time=None, encoding=None, errors=None,
                  timeout=GLOBAL_DEFAULT_TIMEOUT, immediate=False, sleep=0, data=None, opener=None,
-                 follow_redirects=True, method=None):
-    # type: (str, Optional[dict], Optional[dict], Optional[float], Optional[str], Optional[str], float, bool, float, Optional[str], Optional[any], bool, Optional[str]) -> requests.Response  # noqa: E501  # is it possible to have multiline type hints in python2?
+                 follow_redirects=True, method=None, stream=False, max_size=None, stale_time=None):
+    # type: (str, Optional[dict], Optional[dict], Optional[float], Optional[str], Optional[str], float, bool, float, Optional[str], Optional[any], bool, Optional[str], bool, Optional[int], Optional[float]) -> requests.Response  # noqa: E501  # is it possible to have multiline type hints in python2?
 
     # todo - implement the following parameters:
     # encoding
     # errors
-    # immediate
     # opener
 
+    # `immediate` is handled by `HTTPRequest`, this function always makes the request
+
     if method is None:
         method = 'GET'
 
-    # sleep
-    time.sleep(sleep)
+    pooled_session = get_session(url=url, cache_time=cache_time, stale_time=stale_time)
 
-    cache_option = requests_cache.enabled() if cache_time else session.cache_disabled()
+    request_methods = dict(
+        GET=pooled_session.get,
+        POST=pooled_session.post,
+        HEAD=pooled_session.head,
+        DELETE=pooled_session.delete,
+        PUT=pooled_session.put,
+        OPTIONS=pooled_session.options
+    )
 
-    if cache_time:
-        session._cache_expire_after = datetime.timedelta(seconds=cache_time)
-
-    with cache_option:
-        request_methods = dict(
-            GET=session.get,
-            POST=session.post,
-            HEAD=session.head,
-            DELETE=session.delete,
-            PUT=session.put,
-            OPTIONS=session.options
-        )
+    def fetch():
+        # a maximum size is enforced while the body is downloaded, instead of after it has been read into memory
+        response = request_methods[method](url=url,
+                                           data=values if values else data,
+                                           headers=headers,
+                                           timeout=timeout,
+                                           allow_redirects=follow_redirects,
+                                           stream=stream or max_size is not None,
+                                           )
+
+        if not stream and max_size is not None:
+            response._content = b''.join(iter_content(response=response, max_size=max_size))
+            response._content_consumed = True
+            pooled_session.save_streamed_response(response)
+        return response
 
-    response = request_methods[method](url=url,
-                                       data=values if values else data,
-                                       headers=headers,
-                                       timeout=timeout,
-                                       allow_redirects=follow_redirects,
-                                       )
+    start = time.time()
+    try:
+        if stream or method not in COALESCED_METHODS or values or data:
+            # a streamed body can only be read once, so it cannot be shared, and requests which send data may change
+            # state on the server, so each of them must be made
+            response = fetch()
+        else:
+            # identical concurrent requests wait for a single fetch and share its response
+            response, coalesced = in_flight.do(
+                key=_flight_key(method=method, url=url, body=values if values else data, headers=headers,
+                                max_size=max_size, follow_redirects=follow_redirects, cache_time=cache_time,
+                                stale_time=stale_time, timeout=timeout),
+                func=fetch,
+            )
+            if coalesced:
+                response = _share_response(response)
+    except Exception:
+        request_stats.record(url=url, method=method, response=None, total_time=time.time() - start)
+        raise
+
+    request_stats.record(url=url, method=method, response=response, total_time=time.time() - start)
 
     if cache_time:
-        cookie_jar.set(name='plexhints_cache', value=response.cookies)
+        cookie_jar.update(response.cookies)
+
+    # only pause after a network request, responses from the cache or a concurrent request put no burden on the server
+    if sleep and not getattr(response, 'from_cache', False) and not getattr(response, 'coalesced', False):
+        time.sleep(sleep)
 
     return response
+
+
+class HTTPRequest(object):
+    """
+    A HTTP request which is only made when the data it returns is accessed.
+
+    Attributes of the ``requests.Response`` (e.g. ``status_code``, ``text`` or ``cookies``) are available directly on
+    this object, accessing any of them will make the request if it has not been made yet.
+    Converting the object to a string returns the content of the response.
+
+    Parameters
+    ----------
+    url : str
+        The URL to use for the request.
+    immediate : bool, default=False
+        If set to ``True``, the request is made when the object is created.
+    **kwargs : **any
+        Keyword arguments passed to ``http_request``.
+    """
+
+    def __init__(self, url, immediate=False, **kwargs):
+        # type: (str, bool, **any) -> None
+        self._url = url
+        self._kwargs = kwargs
+        self._response = None  # type: Optional[requests.Response]
+        self._lock = threading.Lock()
+        self._prefetch_thread = None  # type: Optional[threading.Thread]
+
+        if immediate:
+            self.load()
+
+    def load(self):
+        # type: () -> requests.Response
+        """
+        Make the request, if it has not been made yet.
+
+        Returns
+        -------
+        requests.Response
+            The Response of the http request.
+        """
+        with self._lock:
+            if self._response is None:
+                self._response = http_request(url=self._url, **self._kwargs)
+            return self._response
+
+    def prefetch(self):
+        # type: () -> None
+        """
+        Make the request in a background thread, if it has not been made yet.
+
+        Accessing the data of the request while the prefetch is in progress will wait for it to complete.
+        """
+        with self._lock:
+            if self._response is not None or self._prefetch_thread is not None:
+                return
+
+            # the thread waits for the lock to be released before making the request
+            self._prefetch_thread = threading.Thread(target=self._prefetch)
+            self._prefetch_thread.daemon = True
+            self._prefetch_thread.start()
+
+    def _prefetch(self):
+        # type: () -> None
+        try:
+            self.load()
+        except Exception:
+            # the request is made again, and any exception raised, when the data is accessed
+            pass
+
+    @property
+    def loaded(self):
+        # type: () -> bool
+        """
+        bool
+            ``True`` if the request has been made, otherwise ``False``.
+        """
+        return self._response is not None
+
+    @property
+    def url(self):
+        # type: () -> str
+        """
+        str
+            The URL of the request.
+        """
+        return self._url
+
+    @property
+    def content(self):
+        # type: () -> bytes
+        """
+        bytes
+            The content of the response.
+        """
+        return self.load().content
+
+    @property
+    def headers(self):
+        # type: () -> dict
+        """
+        dict
+            The headers of the response.
+        """
+        return self.load().headers
+
+    def __getattr__(self, name):
+        # type: (str) -> any
+        if name.startswith('_'):
+            raise AttributeError("'%s' object has no attribute '%s'" % (type(self).__name__, name))
+        return getattr(self.load(), name)
+
+    def __len__(self):
+        # type: () -> int
+        return len(self.content)
+
+    def __str__(self):
+        # type: () -> str
+        content = self.content
+        # ``__str__`` must return text on python 3
+        return content if isinstance(content, str) else self.load().text
+
+
+class PrefetchQueue(object):
+    """
+    Bounded queue of requests which are made by a pool of background daemon threads.
+
+    A request which is already queued or in progress is not queued again.
+
+    Parameters
+    ----------
+    workers : int, default=2
+        The number of background threads.
+    max_size : int, default=100
+        The maximum number of queued requests. Requests are dropped while the queue is full.
+    """
+
+    def __init__(self, workers=DEFAULT_PRECACHE_WORKERS, max_size=DEFAULT_PRECACHE_QUEUE_SIZE):
+        # type: (int, int) -> None
+        self.workers = workers
+        self._queue = Queue(maxsize=max_size)
+        self._pending = set()
+        self._condition = threading.Condition()
+        self._threads = []
+
+    def put(self, key, func, **kwargs):
+        # type: (any, callable, **any) -> bool
+        """
+        Queue a function call.
+
+        Parameters
+        ----------
+        key : any
+            Hashable key identifying the request, used to skip duplicates.
+        func : callable
+            The function to call in a background thread.
+        **kwargs : **any
+            Keyword arguments for the function.
+
+        Returns
+        -------
+        bool
+            ``True`` if the call was queued, ``False`` if it was a duplicate or the queue is full.
+        """
+        with self._condition:
+            if key in self._pending:
+                return False
+            try:
+                self._queue.put_nowait((key, func, kwargs))
+            except Full:
+                _Log.Debug('Pre-cache queue is full, skipping: %s' % (key,))
+                return False
+            self._pending.add(key)
+
+            if len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work)
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+        return True
+
+    def _work(self):
+        # type: () -> None
+        while True:
+            key, func, kwargs = self._queue.get()
+            try:
+                func(**kwargs)
+            except Exception:
+                _Log.Exception('Error pre-caching: %s' % (key,))
+            finally:
+                with self._condition:
+                    self._pending.discard(key)
+                    self._condition.notify_all()
+
+    def join(self, timeout=None):
+        # type: (Optional[float]) -> bool
+        """
+        Wait until all queued calls have finished.
+
+        Parameters
+        ----------
+        timeout : Optional[float]
+            The maximum time (in seconds) to wait. If ``None``, wait indefinitely.
+
+        Returns
+        -------
+        bool
+            ``True`` if all calls finished, ``False`` if the timeout expired first.
+        """
+        end = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while self._pending:
+                remaining = None if end is None else end - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+
+precache_queue = PrefetchQueue()
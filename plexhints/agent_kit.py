@@ -4,12 +4,21 @@ from __future__ import absolute_import  # import like python 3
 # standard imports
 from typing import Optional
 
+# lib imports
+from lxml import etree
+import requests
+
 # local imports
+import plexhints
+from plexhints._helpers import http_request
 from plexhints.log_kit import _LogKit
 
 # setup logging
 _Log = _LogKit()
 
+# the server is local, so media objects do not wait long for a server which is not running
+MEDIA_TREE_TIMEOUT = 2  # type: float
+
 
 class MediaObject(object):
     """
@@ -54,7 +63,11 @@ class MediaObject(object):
         if self.id is not None:
             try:
                 setattr(self, 'tree', _Media.TreeForDatabaseID(dbid=self.id, level_names=type(self)._level_names,
-                                                               level_attribute_keys=type(self)._level_attribute_keys))
+                                                               level_attribute_keys=type(self)._level_attribute_keys,
+                                                               timeout=MEDIA_TREE_TIMEOUT))
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                # expected when no server is running, e.g. outside of Plex Media Server
+                _Log.Debug("Unable to get the media tree for database id %s: %s" % (self.id, e))
             except Exception:
                 _Log.Exception(fmt="Exception when constructing media object")
 
@@ -77,14 +90,130 @@ class MediaObject(object):
             return object.__getattribute__(self, name)
 
 
+class _MediaElement(object):
+    """
+    An element of a media tree. The attributes of the XML element are available as attributes of this object.
+
+    Parameters
+    ----------
+    el : etree._Element
+        The XML element.
+    """
+
+    def __init__(self, el):
+        for name, value in el.attrib.items():
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return '<%s id=%s>' % (type(self).__name__, getattr(self, 'id', None))
+
+
+class MediaStream(_MediaElement):
+    """
+    A stream (e.g. video, audio or subtitles) of a media part.
+    """
+
+
+class MediaPart(_MediaElement):
+    """
+    A file of a media item, with its ``streams``.
+    """
+
+    def __init__(self, el):
+        super(MediaPart, self).__init__(el)
+        self.streams = [MediaStream(stream_el) for stream_el in el.findall('MediaStream')]
+
+
+class MediaItem(_MediaElement):
+    """
+    A version of a media item, with its ``parts``.
+    """
+
+    def __init__(self, el):
+        super(MediaItem, self).__init__(el)
+        self.parts = [MediaPart(part_el) for part_el in el.findall('MediaPart')]
+
+
+class MediaTree(_MediaElement):
+    """
+    A metadata item from the media tree of Plex Media Server, with its media ``items`` and ``children``.
+
+    The children are also available as a dictionary named after the first level name, keyed by the first level
+    attribute key (``index`` by default), e.g. ``tree.seasons['1'].episodes['2']`` for a TV show.
+
+    Parameters
+    ----------
+    el : etree._Element
+        The ``MetadataItem`` element.
+    level_names : list
+        The names of the child levels, e.g. ``['seasons', 'episodes']``.
+    level_attribute_keys : list
+        The attributes used to key the children of each level.
+    parent : Optional[MediaTree]
+        The parent item.
+    """
+
+    def __init__(self, el, level_names=[], level_attribute_keys=[], parent=None):
+        super(MediaTree, self).__init__(el)
+        self.parent = parent
+        self.items = [MediaItem(item_el) for item_el in el.findall('MediaItem')]
+        self.children = [MediaTree(child_el, level_names=level_names[1:], level_attribute_keys=level_attribute_keys[1:],
+                                   parent=self) for child_el in el.findall('MetadataItem')]
+
+        if level_names:
+            key = level_attribute_keys[0] if level_attribute_keys else 'index'
+            setattr(self, level_names[0], dict((getattr(child, key, None), child) for child in self.children))
+
+
 class _Media(object):
 
     @classmethod
-    def TreeForDatabaseID(cls, dbid, level_names=[], host='127.0.0.1', parent_id=None, level_attribute_keys=[]):
-        # type: (str, list, str, Optional[str], list) -> Optional[dict]
-        # todo
-        tree = None
-        return tree
+    def TreeForDatabaseID(cls, dbid, level_names=[], host='127.0.0.1', parent_id=None, level_attribute_keys=[],
+                          timeout=plexhints.GLOBAL_DEFAULT_TIMEOUT):
+        # type: (str, list, str, Optional[str], list, float) -> Optional[MediaTree]
+        """
+        Get the media tree of a metadata item from Plex Media Server.
+
+        Parameters
+        ----------
+        dbid : str
+            The database id of the metadata item.
+        level_names : list
+            The names of the child levels, e.g. ``['seasons', 'episodes']``.
+        host : str, default='127.0.0.1'
+            The host of the server. The port is ``plexhints.PMS_PORT``, unless the host includes one.
+        parent_id : Optional[str]
+            Unused.
+        level_attribute_keys : list
+            The attributes used to key the children of each level, ``index`` by default.
+        timeout : float, default=20
+            The maximum amount of time (in seconds) to wait for the server.
+
+            .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+
+        Raises
+        ------
+        requests.exceptions.RequestException
+            If the server cannot be reached, or responds with an error other than ``404``.
+
+        Returns
+        -------
+        Optional[MediaTree]
+            The media tree, or ``None`` if the server has no metadata item with the id.
+        """
+        if ':' not in host:
+            host = '%s:%d' % (host, plexhints.PMS_PORT)
+
+        # the framework itself is not limited by the plug-in's code policy, so ``check_port`` is not used
+        response = http_request(url='http://%s/library/metadata/%s/tree' % (host, dbid), timeout=timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        el = etree.fromstring(response.content).find('MetadataItem')
+        if el is None:
+            return None
+        return MediaTree(el, level_names=level_names, level_attribute_keys=level_attribute_keys)
 
     class Movie(MediaObject):
         def __init__(self, **kwargs):
@@ -103,12 +232,13 @@ class _Media(object):
             self.title = None  # type: Optional[str]
 
     class TV_Show(MediaObject):
+        _level_names = ['seasons', 'episodes']
+
         def __init__(self, **kwargs):
             super(_Media.TV_Show, self).__init__(**kwargs)
             self._model_name = 'TV_Show'
             self._type_id = 2
             self._attrs = dict()  # removed in favor of defining values below
-            self._level_names = ['seasons', 'episodes']
 
             self.show = None  # type: Optional[str]
             self.season = None  # type: Optional[int]
@@ -120,6 +250,8 @@ class _Media(object):
             self.episodic = True  # type: bool
 
     class Album(MediaObject):
+        _level_names = ['tracks']
+
         def __init__(self, **kwargs):
             super(_Media.Album, self).__init__(**kwargs)
             self._model_name = 'LegacyAlbum'
@@ -129,7 +261,6 @@ class _Media(object):
             self._parent_set_attr_name = 'albums'
             self._type_id = 9
             self._attrs = dict()  # removed in favor of defining values below
-            self._level_names = ['tracks']
 
             self.name = None  # type: Optional[str]
             self.artist = None  # type: Optional[str]
@@ -139,6 +270,9 @@ class _Media(object):
             self.parentGUID = None  # type: Optional[str]
 
     class Artist(MediaObject):
+        _level_names = ['albums', 'tracks']
+        _level_attribute_keys = ['guid']
+
         def __init__(self, **kwargs):
             super(_Media.Artist, self).__init__(**kwargs)
             self._model_name = 'LegacyArtist'
@@ -148,8 +282,6 @@ class _Media(object):
             self._media_type_name = 'Artist'
             self._type_id = 8
             self._attrs = dict()  # removed in favor of defining values below
-            self._level_names = ['albums', 'tracks']
-            self._level_attribute_keys = ['guid']
 
             self.artist = None  # type: Optional[str]
             self.album = None  # type: Optional[str]
@@ -157,12 +289,13 @@ class _Media(object):
             self.index = None  # type: Optional[int]
 
     class PhotoAlbum(MediaObject):
+        _level_names = ['photos']
+
         def __init__(self, **kwargs):
             super(_Media.PhotoAlbum, self).__init__(**kwargs)
             self._model_name = 'PhotoAlbum'
             self._type_id = 12
             self._attrs = dict()
-            self._level_names = ['photos']
 
     class Photo(MediaObject):
         def __init__(self, **kwargs):
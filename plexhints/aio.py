@@ -0,0 +1,159 @@
+"""
+Asyncio variants of the HTTP and parsing kits.
+
+Each method runs the matching blocking method in a shared thread pool and returns an :class:`asyncio.Future`, so the
+same cache, size checks, rate limits and ``check_port`` policy apply. Call the methods from a coroutine::
+
+    from plexhints.aio import JSON
+
+    results = await asyncio.gather(*[JSON.ObjectFromURL(url, cacheTime=3600) for url in urls])
+
+.. Note:: This is missing from the Plex Framework, it is only available in plexhints. Requires Python 3.6 or newer.
+"""
+
+# future imports
+from __future__ import absolute_import  # import like python 3
+
+# standard imports
+import functools
+import sys
+import threading
+
+if sys.version_info < (3, 6):
+    raise ImportError('plexhints.aio requires Python 3.6 or newer')
+
+import asyncio  # noqa: E402
+from concurrent.futures import ThreadPoolExecutor  # noqa: E402
+
+# local imports
+from plexhints import network_kit, parse_kit  # noqa: E402
+
+DEFAULT_AIO_WORKERS = 64  # type: int
+
+_executor = None
+_executor_lock = threading.Lock()
+_max_workers = DEFAULT_AIO_WORKERS
+
+
+def set_max_workers(max_workers):
+    # type: (int) -> None
+    """
+    Set the number of threads used to run the blocking requests.
+
+    Requests which are already running finish in the previous thread pool.
+
+    Parameters
+    ----------
+    max_workers : int
+        The maximum number of concurrent requests.
+    """
+    global _executor, _max_workers
+    with _executor_lock:
+        _max_workers = max_workers
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+def get_executor():
+    # type: () -> ThreadPoolExecutor
+    """
+    Get the thread pool used to run the blocking requests, creating it if needed.
+
+    Returns
+    -------
+    ThreadPoolExecutor
+        The thread pool.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_max_workers, thread_name_prefix='plexhints-aio')
+        return _executor
+
+
+def run(func, *args, **kwargs):
+    # type: (callable, *any, **any) -> asyncio.Future
+    """
+    Run a blocking function in the shared thread pool.
+
+    Parameters
+    ----------
+    func : callable
+        The function to run.
+    *args
+        Positional arguments for the function.
+    **kwargs
+        Keyword arguments for the function.
+
+    Returns
+    -------
+    asyncio.Future
+        Future of the return value, bound to the current event loop.
+    """
+    return asyncio.wrap_future(get_executor().submit(func, *args, **kwargs))
+
+
+class _AsyncKit(object):
+    """
+    Exposes the given methods of a blocking kit as methods returning an :class:`asyncio.Future`.
+
+    Parameters
+    ----------
+    kit : object
+        The blocking kit, e.g. ``parse_kit.JSON``.
+    methods : tuple
+        The names of the methods to expose.
+    """
+
+    def __init__(self, kit, methods):
+        # type: (object, tuple) -> None
+        self._kit = kit
+        self._methods = frozenset(methods)
+
+    def __getattr__(self, name):
+        # type: (str) -> callable
+        if name.startswith('_') or name not in self._methods:
+            raise AttributeError(name)
+
+        func = getattr(self._kit, name)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return run(func, *args, **kwargs)
+
+        return wrapper
+
+    def __dir__(self):
+        return sorted(self._methods)
+
+
+class _AsyncHTTPKit(_AsyncKit):
+    """
+    Asyncio variant of ``HTTP``. ``Request`` always loads the response before the future is resolved.
+    """
+
+    def __init__(self):
+        super(_AsyncHTTPKit, self).__init__(kit=network_kit.HTTP, methods=('Request',))
+
+    def Request(self, url, **kwargs):
+        # type: (str, **any) -> asyncio.Future
+        """
+        Request a url in the shared thread pool. Accepts the same arguments as ``HTTP.Request``.
+
+        Returns
+        -------
+        asyncio.Future
+            Future of the loaded :class:`HTTPRequest`.
+        """
+        kwargs['immediate'] = True
+        return run(self._kit.Request, url, **kwargs)
+
+
+HTML = _AsyncKit(kit=parse_kit.HTML, methods=('ElementFromURL',))
+HTTP = _AsyncHTTPKit()
+JSON = _AsyncKit(kit=parse_kit.JSON, methods=('ObjectFromURL',))
+Plist = _AsyncKit(kit=parse_kit.Plist, methods=('ObjectFromURL',))
+RSS = _AsyncKit(kit=parse_kit.RSS, methods=('FeedFromURL',))
+XML = _AsyncKit(kit=parse_kit.XML, methods=('ElementFromURL', 'ObjectFromURL'))
+YAML = _AsyncKit(kit=parse_kit.YAML, methods=('ObjectFromURL',))
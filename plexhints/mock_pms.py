@@ -0,0 +1,184 @@
+# future imports
+from __future__ import absolute_import  # import like python 3
+
+from future.moves.http.server import BaseHTTPRequestHandler, HTTPServer
+from future.moves.socketserver import ThreadingMixIn
+from future.moves.urllib.parse import urlparse
+
+# standard imports
+import io
+import os
+import threading
+from typing import Optional
+
+# local imports
+from plexhints.log_kit import _LogKit
+
+# setup logging
+_Log = _LogKit()
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep connections alive
+
+    def do_GET(self):
+        self.server.mock.requests.append(self.path)
+        body, content_type = self.server.mock.get(path=urlparse(self.path).path)
+        if body is None:
+            body, content_type, status = b'<MediaContainer size="0"/>', 'application/xml', 404
+        else:
+            status = 200
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # requests are recorded in ``MockPlexServer.requests`` instead
+
+
+class MockPlexServer(object):
+    """
+    A local stand-in for Plex Media Server, serving XML responses from memory or from a fixtures directory.
+
+    A request for ``/library/metadata/1/tree`` is answered with the route added for that path, or with the
+    ``library/metadata/1/tree.xml`` file in the fixtures directory, otherwise with a 404 response.
+
+    Point ``plexhints.PMS_PORT`` at the ``port`` of the server to use it for ``Media.TreeForDatabaseID``::
+
+        with MockPlexServer(fixtures='tests/data/pms') as server:
+            plexhints.PMS_PORT = server.port
+            tree = Media.TreeForDatabaseID(dbid=1, level_names=['seasons', 'episodes'])
+
+    .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+
+    Parameters
+    ----------
+    fixtures : Optional[str]
+        The directory containing the XML files to serve.
+    host : str, default='127.0.0.1'
+        The address to listen on.
+    port : int, default=0
+        The port to listen on. If ``0``, a free port is used.
+    """
+
+    def __init__(self, fixtures=None, host='127.0.0.1', port=0):
+        # type: (Optional[str], str, int) -> None
+        self.fixtures = fixtures
+        self.host = host
+        self.port = port
+        self.routes = dict()  # type: dict
+        self.requests = []  # type: list
+        self._server = None  # type: Optional[_ThreadingHTTPServer]
+        self._thread = None  # type: Optional[threading.Thread]
+
+    def __enter__(self):
+        # type: () -> MockPlexServer
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def url(self):
+        # type: () -> str
+        """
+        str
+            The base url of the server, e.g. ``http://127.0.0.1:32400``.
+        """
+        return 'http://%s:%d' % (self.host, self.port)
+
+    def add_route(self, path, body, content_type='application/xml'):
+        # type: (str, any, str) -> None
+        """
+        Serve a response for a path.
+
+        Parameters
+        ----------
+        path : str
+            The path, e.g. ``/library/sections``.
+        body : Union[str, bytes]
+            The body of the response.
+        content_type : str, default='application/xml'
+            The content type of the response.
+        """
+        if not isinstance(body, bytes):
+            body = body.encode('utf-8')
+        self.routes[path] = (body, content_type)
+
+    def add_tree(self, dbid, xml):
+        # type: (any, any) -> None
+        """
+        Serve the media tree of a metadata item.
+
+        Parameters
+        ----------
+        dbid : Union[int, str]
+            The database id of the metadata item.
+        xml : Union[str, bytes]
+            The ``MediaContainer`` XML of the tree.
+        """
+        self.add_route(path='/library/metadata/%s/tree' % dbid, body=xml)
+
+    def get(self, path):
+        # type: (str) -> tuple
+        """
+        Get the response for a path.
+
+        Parameters
+        ----------
+        path : str
+            The path.
+
+        Returns
+        -------
+        tuple
+            The body and the content type, the body is ``None`` if there is no response for the path.
+        """
+        try:
+            return self.routes[path]
+        except KeyError:
+            pass
+
+        if self.fixtures is not None:
+            root = os.path.abspath(self.fixtures)
+            fixture = os.path.abspath(os.path.join(root, path.strip('/') + '.xml'))
+            if fixture.startswith(root + os.sep) and os.path.isfile(fixture):
+                with io.open(fixture, 'rb') as f:
+                    return f.read(), 'application/xml'
+
+        return None, None
+
+    def start(self):
+        # type: () -> None
+        """
+        Start serving requests in a background thread.
+        """
+        self._server = _ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._server.mock = self
+        self.port = self._server.server_address[1]
+
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        _Log.Debug('Mock Plex Media Server listening on %s' % self.url)
+
+    def stop(self):
+        # type: () -> None
+        """
+        Stop the server.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+            self._thread = None
@@ -4,18 +4,21 @@ from __future__ import absolute_import  # import like python 3
 from future.moves.urllib.request import HTTPPasswordMgrWithDefaultRealm
 
 # standard imports
-import threading
+import os
 from typing import Optional
 
 # lib imports
 from deprecation import deprecated
-import requests
 from requests.cookies import RequestsCookieJar
 
 # local imports
-from plexhints._helpers import check_port, cookie_jar, http_request
+from plexhints import _helpers
+from plexhints._helpers import Cassette, check_port, cookie_jar, DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST_LIMIT, \
+    http_request, HTTPRequest, map_urls, precache_queue, request_stats, RequestStats, set_negative_cache_time, \
+    set_rate_limit
 from plexhints import GLOBAL_DEFAULT_TIMEOUT
 from plexhints.const import PLEX_FRAMEWORK_VERSION
+from plexhints.core_kit import Core
 from plexhints.log_kit import _LogKit
 
 # setup logging
@@ -49,6 +52,166 @@ class _HTTPKit:
         # type: (int) -> None
         self._cache_time = value
 
+    @property
+    def CacheBackend(self):
+        # type: () -> str
+        """
+        str
+            The backend used to store cached HTTP responses. Use ``memory`` to keep responses in memory, or
+            ``sqlite`` to persist them in a database in the plug-in's data directory, so they survive a restart. By
+            default, this value is ``memory``.
+
+            .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+        """
+        return _helpers.session.cache.name
+
+    @CacheBackend.setter
+    def CacheBackend(self, value):
+        # type: (str) -> None
+        _helpers.set_cache_backend(backend=value, location=os.path.join(Core.storage.data_path, 'HTTPCache'),
+                                   max_size=self.CacheMaxSize, compress_level=self.CacheCompressLevel)
+
+    @property
+    def CacheCompressLevel(self):
+        # type: () -> int
+        """
+        int
+            The zlib compression level (1-9) used to store cached HTTP response bodies of at least 1 KiB. Higher levels
+            use less memory or disk space, but take longer to compress. If ``0``, bodies are stored uncompressed. The
+            level applies to responses cached after it is changed. By default, this value is 6.
+
+            .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+        """
+        return _helpers.session.cache.compress_level
+
+    @CacheCompressLevel.setter
+    def CacheCompressLevel(self, value):
+        # type: (int) -> None
+        _helpers.session.cache.compress_level = value
+
+    @property
+    def CacheMaxSize(self):
+        # type: () -> Optional[int]
+        """
+        Optional[int]
+            The maximum size (in bytes) of the cached HTTP responses. Once exceeded, the least recently used
+            responses are evicted. If ``None``, the cache is unbounded. By default, this value is 52428800 (50 MiB).
+
+            .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+        """
+        return _helpers.session.cache.max_size
+
+    @CacheMaxSize.setter
+    def CacheMaxSize(self, value):
+        # type: (Optional[int]) -> None
+        _helpers.session.cache.resize(max_size=value)
+
+    @property
+    def CacheIgnoredParams(self):
+        # type: () -> list
+        """
+        list
+            Names of query and form parameters which are ignored when matching requests to cached responses, e.g.
+            timestamps or nonces which change with every request. Query parameters are always matched regardless of
+            their order. By default, this list is empty::
+
+                HTTP.CacheIgnoredParams = ['_', 'timestamp']
+
+            .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+        """
+        return sorted(_helpers.cache_key_rules['ignored_params'])
+
+    @CacheIgnoredParams.setter
+    def CacheIgnoredParams(self, value):
+        # type: (list) -> None
+        _helpers.set_cache_key_rules(ignored_params=value)
+
+    @property
+    def CacheVaryHeaders(self):
+        # type: () -> list
+        """
+        list
+            Names of request headers which are matched when looking up cached responses, requests with different
+            values for these headers are cached separately. Other headers, such as a randomized ``User-Agent``, never
+            prevent a cached response from being used. By default, this list is empty.
+
+            .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+        """
+        return sorted(_helpers.cache_key_rules['vary_headers'])
+
+    @CacheVaryHeaders.setter
+    def CacheVaryHeaders(self, value):
+        # type: (list) -> None
+        _helpers.set_cache_key_rules(vary_headers=value)
+
+    @property
+    def PoolSize(self):
+        # type: () -> int
+        """
+        int
+            The number of connections kept open to each host. Increase it when many threads make requests to the same
+            host. By default, this value is 10.
+
+            .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+        """
+        return _helpers.adapter_settings['pool_size']
+
+    @PoolSize.setter
+    def PoolSize(self, value):
+        # type: (int) -> None
+        _helpers.configure_adapters(pool_size=value)
+
+    @property
+    def Retries(self):
+        # type: () -> int
+        """
+        int
+            The number of times a ``GET``, ``HEAD``, ``PUT``, ``DELETE`` or ``OPTIONS`` request is retried after a
+            connection error or a ``429``, ``500``, ``502``, ``503`` or ``504`` response. By default, this value is 0.
+
+            .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+        """
+        return _helpers.adapter_settings['retries']
+
+    @Retries.setter
+    def Retries(self, value):
+        # type: (int) -> None
+        _helpers.configure_adapters(retries=value)
+
+    @property
+    def RetryBackoff(self):
+        # type: () -> float
+        """
+        float
+            The backoff factor (in seconds) between retries, the sleep doubles after each retry. A ``Retry-After``
+            header sent by the server is respected. By default, this value is 0.5.
+
+            .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+        """
+        return _helpers.adapter_settings['retry_backoff']
+
+    @RetryBackoff.setter
+    def RetryBackoff(self, value):
+        # type: (float) -> None
+        _helpers.configure_adapters(retry_backoff=value)
+
+    @property
+    def KeepAlive(self):
+        # type: () -> bool
+        """
+        bool
+            Whether connections are reused between requests. If ``False``, a ``Connection: close`` header is sent with
+            each request. By default, this value is ``True``.
+
+            .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+        """
+        return _helpers.adapter_settings['keep_alive']
+
+    @KeepAlive.setter
+    def KeepAlive(self, value):
+        # type: (bool) -> None
+        _helpers.configure_adapters(keep_alive=value)
+
     @property
     def Headers(self):
         """
@@ -83,8 +246,8 @@ class _HTTPKit:
 
     def Request(self, url, values=None, headers={}, cacheTime=None, encoding=None, errors=None,
                 timeout=GLOBAL_DEFAULT_TIMEOUT, immediate=False, sleep=0, data=None, follow_redirects=True,
-                method=None):
-        # type: (str, Optional[dict], dict, Optional[int], Optional[str], Optional[str], float, bool, float, Optional[str], bool, Optional[str]) -> requests.Response  # noqa: E501  # is it possible to have multiline type hints in python2?
+                method=None, staleTime=None):
+        # type: (str, Optional[dict], dict, Optional[int], Optional[str], Optional[str], float, bool, float, Optional[str], bool, Optional[str], Optional[float]) -> HTTPRequest  # noqa: E501  # is it possible to have multiline type hints in python2?
         """
         Creates and returns a new :class:`HTTPRequest` object.
 
@@ -97,7 +260,8 @@ class _HTTPKit:
         headers : dict, default={}
             Any custom HTTP headers that should be added to this request.
         cacheTime : Optional[int]
-            The maximum age (in second) of cached data before it should be considered invalid.
+            The maximum age (in second) of cached data before it should be considered invalid. Invalid data with an
+            ``ETag`` or ``Last-Modified`` header is revalidated with the server, and reused if it has not changed.
         encoding : Optional[str]
             The string encoding to use for the downloaded data. If no encoding is provided, the framework will attempt
             to guess the encoding.
@@ -123,11 +287,18 @@ class _HTTPKit:
             framework will raise a RedirectError when encountering a redirected response.
         method : Optional[str]
             Supported methods: `GET`, `HEAD`, `POST`, `DELETE`, `PUT`, `OPTIONS`.
+        staleTime : Optional[float]
+            The time (in seconds) after `cacheTime` has expired during which the expired cached data is returned
+            immediately, while it is refreshed in the background. Stale responses have a ``stale`` attribute set to
+            ``True``.
+
+            .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
 
         Returns
         -------
-        requests.Response
-            The Response of the http request.
+        HTTPRequest
+            The request. Attributes of the ``requests.Response``, such as ``content``, ``headers`` and
+            ``status_code``, can be accessed directly on this object.
         """
 
         # Update the cache time
@@ -136,15 +307,16 @@ class _HTTPKit:
         check_port(url=url)
         all_headers = headers
 
-        return http_request(
+        return HTTPRequest(
             url=url,
+            immediate=immediate,
             values=values,
             headers=all_headers,
             cache_time=cacheTime,
+            stale_time=staleTime,
             encoding=encoding,
             errors=errors,
             timeout=timeout,
-            immediate=immediate,
             sleep=sleep,
             data=data,
             opener=None,  # todo
@@ -152,6 +324,143 @@ class _HTTPKit:
             method=method,
         )
 
+    def RequestMany(self, urls, max_workers=DEFAULT_MAX_WORKERS, per_host_limit=DEFAULT_PER_HOST_LIMIT, values=None,
+                    headers={}, cacheTime=None, encoding=None, errors=None, timeout=GLOBAL_DEFAULT_TIMEOUT, sleep=0,
+                    data=None, follow_redirects=True, method=None):
+        # type: (list, int, Optional[int], Optional[dict], dict, Optional[int], Optional[str], Optional[str], float, float, Optional[str], bool, Optional[str]) -> list  # noqa: E501  # is it possible to have multiline type hints in python2?
+        """
+        Makes a HTTP request for each of the given URLs concurrently, using a bounded pool of threads.
+
+        .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+
+        Parameters
+        ----------
+        urls : list
+            The URLs to request.
+        max_workers : int, default=8
+            The maximum number of requests to make at once.
+        per_host_limit : Optional[int], default=4
+            The maximum number of requests to make at once to the same host. If ``None``, there is no limit.
+        values : Optional[dict]
+            Keys and values to be URL encoded and provided as the request's POST body.
+        headers : dict, default={}
+            Any custom HTTP headers that should be added to the requests.
+        cacheTime : Optional[int]
+            The maximum age (in second) of cached data before it should be considered invalid.
+        encoding : Optional[str]
+            The string encoding to use for the downloaded data. If no encoding is provided, the framework will attempt
+            to guess the encoding.
+        errors : Optional[str]
+            The error handling method to use. If `errors` is `'strict'` (the default), a `ValueError` is raised on
+            errors, while a value of `'ignore'` causes errors to be silently ignored, and a value of `'replace'`
+            causes the official Unicode replacement character, U+FFFD, to be used to replace input characters which
+            cannot be decoded.
+        timeout : float, default=20
+            The maximum amount of time (in seconds) to wait for each request to return a response before timing out.
+        sleep : float, default=0
+            The amount of time (in seconds) to pause after issuing a HTTP request, before another request is made to
+            the same host in its place. Combined with `per_host_limit` this limits the rate of requests to each host.
+        data : Optional[str]
+            The raw POST data that should be sent with the requests. This attribute cannot be used in conjunction with
+            `values`.
+        follow_redirects : bool, default=True
+            Specifies whether redirects should be followed, or if an exception should be raised. If False, the
+            framework will raise a RedirectError when encountering a redirected response.
+        method : Optional[str]
+            Supported methods: `GET`, `HEAD`, `POST`, `DELETE`, `PUT`, `OPTIONS`.
+
+        Returns
+        -------
+        list
+            The completed :class:`HTTPRequest` objects, in the same order as `urls`.
+        """
+        def request(url):
+            return self.Request(url=url, values=values, headers=headers, cacheTime=cacheTime, encoding=encoding,
+                                errors=errors, timeout=timeout, immediate=True, sleep=sleep, data=data,
+                                follow_redirects=follow_redirects, method=method)
+
+        return map_urls(func=request, urls=urls, max_workers=max_workers, per_host_limit=per_host_limit)
+
+    def SetRateLimit(self, host, requests_per_second, burst=1):
+        # type: (str, Optional[float], int) -> None
+        """
+        Limits the rate of HTTP requests made to the given host, across all threads. Requests which would exceed the
+        limit pause the current thread until they are permitted. Responses retrieved from the cache are not limited.
+
+        .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+
+        Parameters
+        ----------
+        host : str
+            The host to limit, e.g. ``api.example.com``. Include the port, e.g. ``localhost:8000``, to only limit
+            requests to that port.
+        requests_per_second : Optional[float]
+            The maximum sustained rate of requests. If ``None``, the rate limit for the host is removed.
+        burst : int, default=1
+            The number of requests that can be made at once before the rate applies.
+
+        Raises
+        ------
+        ValueError
+            If `requests_per_second` is not greater than 0.
+        """
+        set_rate_limit(host=host, requests_per_second=requests_per_second, burst=burst)
+
+    def SetNegativeCacheTime(self, status, cacheTime):
+        # type: (any, Optional[float]) -> None
+        """
+        Caches error responses with the given status for a limited time, so repeated requests for missing or failing
+        URLs are answered from the cache. Only requests which use the cache (with a ``cacheTime``) are affected, and
+        the shorter of the two times applies. By default, error responses are not cached::
+
+            HTTP.SetNegativeCacheTime(404, 3600)
+            HTTP.SetNegativeCacheTime('5xx', 60)
+
+        .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+
+        Parameters
+        ----------
+        status : Union[int, str]
+            The status code, e.g. ``404``, or the status class, e.g. ``'5xx'``. A status code takes precedence over
+            its class.
+        cacheTime : Optional[float]
+            The maximum age (in seconds) of the cached error responses. If ``None``, they are no longer cached.
+
+        Raises
+        ------
+        ValueError
+            If the status is not a status code or status class.
+        """
+        set_negative_cache_time(status=status, cache_time=cacheTime)
+
+    @property
+    def RateLimitStats(self):
+        # type: () -> dict
+        """
+        dict
+            A dictionary of the configured rate limits, keyed by host. Each value is a dictionary containing the
+            ``requests_per_second`` and ``burst`` of the limit, and the number of ``requests`` made, the number of
+            ``waits`` and the total ``wait_time`` (in seconds) spent waiting for the limit.
+
+            .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+        """
+        return dict((host, limiter.stats()) for host, limiter in list(_helpers.rate_limiters.items()))
+
+    @property
+    def Stats(self):
+        # type: () -> RequestStats
+        """
+        RequestStats
+            The timing and cache metrics of HTTP requests. Use ``HTTP.Stats.summary()`` to get the number of requests,
+            cache hits, bytes, status codes and timing percentiles of each host, ``HTTP.Stats.add_callback(func)``
+            to receive a record of each request and ``HTTP.Stats.reset()`` to discard the metrics::
+
+                slowest = max(HTTP.Stats.summary().items(), key=lambda host: host[1]['total_time']['p90'])
+
+            .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+        """
+        return request_stats
+
     def CookiesForURL(self, url):
         # type: (str) -> Optional[dict]
         """
@@ -167,7 +476,7 @@ class _HTTPKit:
         dict
             Dictionary of cookies for the given url if there are cookies, otherwise ``None``.
         """
-        response = requests.post(url=url)
+        response = http_request(url=url, method='POST')
         cookies = response.cookies
 
         return cookies if cookies else None
@@ -189,9 +498,69 @@ class _HTTPKit:
         Instructs the framework to pre-cache the result of a given HTTP request in a background
         thread. This method returns nothing - it is designed to ensure that cached data is
         available for future calls to `HTTP.Request`.
+
+        Requests are made by a small pool of daemon threads. A request which is already waiting to be pre-cached is
+        not queued again, and requests are dropped while the queue is full.
         """
-        threading.Thread(target=self.Request, kwargs=dict(url=url, values=values, headers=headers, cacheTime=cacheTime,
-                                                          encoding=encoding, errors=errors))
+        check_port(url=url)
+
+        cache_time = cacheTime if cacheTime is not None else self.CacheTime
+        # requests which differ in any of the options used to make or cache them are queued separately
+        key = (url, repr(sorted(values.items())) if values else None,
+               repr(sorted(headers.items())) if headers else None, cache_time)
+        precache_queue.put(key, func=http_request, url=url, values=values, headers=headers, cache_time=cache_time,
+                           encoding=encoding, errors=errors)
+
+    def FlushPreCache(self, timeout=None):
+        # type: (Optional[float]) -> bool
+        """
+        Waits for all requests queued by `HTTP.PreCache` to finish.
+
+        .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+
+        Parameters
+        ----------
+        timeout : Optional[float]
+            The maximum time (in seconds) to wait. If ``None``, wait indefinitely.
+
+        Returns
+        -------
+        bool
+            ``True`` if all requests finished, ``False`` if the timeout expired first.
+        """
+        return precache_queue.join(timeout=timeout)
+
+    def Cassette(self, path, mode='auto'):
+        # type: (str, str) -> Cassette
+        """
+        Records the responses of HTTP requests to a file, and replays them instead of making network requests. Use it
+        as a context manager, it applies to the requests made by all threads and is saved when the context exits::
+
+            with HTTP.Cassette(path='tests/cassettes/search.json', mode='replay'):
+                JSON.ObjectFromURL(url)
+
+        .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+
+        Parameters
+        ----------
+        path : str
+            The path of the cassette file (JSON).
+        mode : str, default='auto'
+            ``replay`` only uses recorded responses and raises a ``requests.exceptions.ConnectionError`` for other
+            requests, ``record`` makes every request over the network and records its response, and ``auto`` replays
+            recorded responses and records the others.
+
+        Returns
+        -------
+        Cassette
+            The cassette.
+
+        Raises
+        ------
+        ValueError
+            If the mode is not supported.
+        """
+        return Cassette(path=path, mode=mode)
 
     @property
     def Cookies(self):
@@ -213,7 +582,72 @@ class _HTTPKit:
         """
         Clears the plug-in's HTTP cache.
         """
-        pass
+        _helpers.session.cache.clear()
+
+    def CacheInfo(self):
+        # type: () -> dict
+        """
+        Returns information about the plug-in's HTTP cache.
+
+        .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+
+        Returns
+        -------
+        dict
+            Dictionary containing the ``backend`` name, the number of ``entries``, the size of the cached response
+            bodies in ``bytes``, the ``max_size`` budget, and the number of ``requests``, ``cache_hits`` and the
+            ``hit_ratio`` of all requests recorded by ``HTTP.Stats``.
+        """
+        info = _helpers.session.cache.info()
+        hosts = request_stats.summary().values()
+        info['requests'] = sum(host['requests'] for host in hosts)
+        info['cache_hits'] = sum(host['cache_hits'] for host in hosts)
+        info['hit_ratio'] = float(info['cache_hits']) / info['requests'] if info['requests'] else 0.0
+        return info
+
+    def PruneCache(self, older_than=None, max_bytes=None):
+        # type: (Optional[float], Optional[int]) -> int
+        """
+        Removes old responses from the plug-in's HTTP cache, and the least recently used responses until the cache
+        fits in the given size. Responses are also evicted automatically once ``HTTP.CacheMaxSize`` is exceeded.
+
+        .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+
+        Parameters
+        ----------
+        older_than : Optional[float]
+            Remove the responses which were cached more than this number of seconds ago.
+        max_bytes : Optional[int]
+            Remove the least recently used responses until the size of the cached response bodies is at most this
+            number of bytes.
+
+        Returns
+        -------
+        int
+            The number of removed responses.
+        """
+        return _helpers.session.cache.prune(older_than=older_than, max_bytes=max_bytes)
+
+    def InvalidateCache(self, prefix):
+        # type: (str) -> int
+        """
+        Removes the cached responses of all URLs starting with the given prefix from the plug-in's HTTP cache::
+
+            HTTP.InvalidateCache('https://api.example.com/v1/series/')
+
+        .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+
+        Parameters
+        ----------
+        prefix : str
+            The URL prefix.
+
+        Returns
+        -------
+        int
+            The number of removed responses.
+        """
+        return _helpers.session.cache.invalidate(prefix=prefix)
 
     @deprecated(deprecated_in=None, removed_in=None, current_version=PLEX_FRAMEWORK_VERSION,
                 details='Randomized user agent strings are no longer supported.')
@@ -2,9 +2,14 @@
 from __future__ import absolute_import  # import like python 3
 
 # standard imports
+import codecs
+from collections import namedtuple, OrderedDict
+import json
 import plistlib
+import re
 import sys
-from typing import Optional
+import threading
+from typing import Iterator, Optional
 
 # lib imports
 import feedparser
@@ -15,19 +20,134 @@ import simplejson
 import yaml
 
 # local imports
-from plexhints._helpers import check_port, http_request
+from plexhints._helpers import check_port, DEFAULT_CHUNK_SIZE, DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST_LIMIT, \
+    http_request, iter_streamed_content, map_urls
 from plexhints import GLOBAL_DEFAULT_TIMEOUT
 from plexhints.log_kit import _LogKit
 
 # setup logging
 _Log = _LogKit()
 
+# redefine unicode
+try:
+    unicode
+except NameError:
+    unicode = str
+
 # conditional imports
 if sys.version_info.major < 3:
     import demjson
 else:
     import demjson3 as demjson
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+_JSONBackend = namedtuple('_JSONBackend', ['name', 'loads', 'dumps', 'errors'])
+
+# registered backends, fastest first as measured by ``scripts/benchmark_json.py``
+json_backends = OrderedDict()  # type: OrderedDict
+
+json_settings = dict(
+    decoder=None,  # the fastest registered backend if not set
+    encoder='simplejson',  # other encoders format some objects differently, e.g. namedtuples
+    strict=False,  # never fall back to demjson
+)  # type: dict
+
+
+def register_json_backend(name, loads, dumps, errors=(ValueError,)):
+    # type: (str, callable, callable, tuple) -> None
+    """
+    Register a JSON backend, which can then be selected with ``set_json_backend``.
+
+    Parameters
+    ----------
+    name : str
+        The name of the backend.
+    loads : callable
+        Function converting a JSON-formatted ``str`` or ``bytes`` (UTF-8) into a Python object.
+    dumps : callable
+        Function converting a Python object into a JSON-formatted ``str``.
+    errors : tuple, default=(ValueError,)
+        The exceptions raised by the backend for invalid documents or unsupported objects.
+    """
+    json_backends[name] = _JSONBackend(name=name, loads=loads, dumps=dumps, errors=tuple(errors))
+
+
+def set_json_backend(decoder=None, encoder=None, strict=None):
+    # type: (Optional[str], Optional[str], Optional[bool]) -> None
+    """
+    Select the backends used to decode and encode JSON.
+
+    Parameters
+    ----------
+    decoder : Optional[str]
+        The name of the backend used to decode JSON, e.g. ``orjson``. If ``None``, the decoder is not changed.
+        Use ``auto`` to select the fastest installed backend again.
+    encoder : Optional[str]
+        The name of the backend used to encode JSON, ``simplejson`` by default. If ``None``, the encoder is not
+        changed. Use ``auto`` to select the fastest installed backend.
+    strict : Optional[bool]
+        If ``True``, invalid documents and unsupported objects raise an error instead of being handled by demjson. If
+        ``None``, the setting is not changed.
+
+    Raises
+    ------
+    ValueError
+        If a backend is not registered.
+    """
+    for setting, name in (('decoder', decoder), ('encoder', encoder)):
+        if name is None:
+            continue
+        if name != 'auto' and name not in json_backends:
+            raise ValueError('Unknown JSON backend: %s' % name)
+        json_settings[setting] = None if name == 'auto' else name
+
+    if strict is not None:
+        json_settings['strict'] = strict
+
+
+def get_json_backend(encoder=False):
+    # type: (bool) -> _JSONBackend
+    """
+    Get the backend used to decode or encode JSON.
+
+    Parameters
+    ----------
+    encoder : bool, default=False
+        Get the encoder instead of the decoder.
+
+    Returns
+    -------
+    _JSONBackend
+        The backend.
+    """
+    name = json_settings['encoder' if encoder else 'decoder']
+    if name is not None:
+        return json_backends[name]
+    return next(iter(json_backends.values()))
+
+
+if orjson is not None:
+    register_json_backend(name='orjson', loads=orjson.loads, dumps=lambda obj: orjson.dumps(obj).decode('utf-8'),
+                          errors=(ValueError, TypeError))
+if ujson is not None:
+    register_json_backend(name='ujson', loads=ujson.loads, dumps=ujson.dumps, errors=(ValueError, TypeError,
+                                                                                      OverflowError))
+register_json_backend(name='simplejson', loads=simplejson.loads, dumps=simplejson.dumps,
+                      errors=(ValueError, TypeError, OverflowError))
+if sys.version_info >= (3, 6):
+    # the standard library only decodes ``bytes`` from python 3.6, and decodes slower than simplejson
+    register_json_backend(name='json', loads=json.loads, dumps=json.dumps,
+                          errors=(ValueError, TypeError, OverflowError))
+
 
 def check_size(data, max_size=5242880):
     # type: (str, int) -> None
@@ -52,19 +172,310 @@ def check_size(data, max_size=5242880):
 
 def json_from_string(json_string, encoding=None):
     # type: (str, Optional[str]) -> dict
+    backend = get_json_backend()
+    if backend.name != 'simplejson':
+        data = json_string
+        if encoding and isinstance(data, bytes) and codecs.lookup(encoding).name != 'utf-8':
+            data = data.decode(encoding)
+        try:
+            return backend.loads(data)
+        except backend.errors:
+            pass  # simplejson is more tolerant, e.g. of ``NaN``, and reports the position of the error
+
     try:
         return simplejson.loads(json_string, encoding)
     except simplejson.scanner.JSONDecodeError as e:
+        if json_settings['strict']:
+            raise
         _Log.Warn("Error decoding with simplejson, using demjson instead (this will cause a performance hit)")
         _Log.Exception('JSON decoding error - %s' % e)
         return demjson.decode(json_string, encoding)
 
 
+# runs of a container which do not change its depth, including complete strings
+_JSON_CONTAINER_RUN = re.compile(r'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*', re.DOTALL)
+# the rest of a string, up to its closing quote or a backslash at the end of the text
+_JSON_STRING_RUN = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+_JSON_SCALAR_END = re.compile(r'[\s,:\]}]')
+
+
+class _JSONStreamReader(object):
+    """
+    Incremental JSON parser, which decodes the values at a path as soon as they have been read.
+
+    The end of each value is found by scanning the text as it is read, then values on the path are decoded once with
+    ``simplejson``. Values which are not on the path are skipped without being kept in memory or decoded, so their
+    content is not validated.
+
+    Parameters
+    ----------
+    chunks : iterable
+        The chunks of the document, ``bytes`` or ``str``.
+    encoding : Optional[str]
+        The encoding of the document. UTF-8 (with an optional BOM) by default.
+    """
+    whitespace = u' \t\r\n'
+
+    def __init__(self, chunks, encoding=None):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder(encoding or 'utf-8-sig')()
+        self._json = simplejson.JSONDecoder()
+        self._buffer = u''
+        self._pos = 0
+        self._offset = 0  # the number of characters dropped from the start of the buffer
+        self._done = False
+
+    def _read(self):
+        # type: () -> bool
+        if self._done:
+            return False
+
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._done = True
+            text = self._decoder.decode(b'', True)
+        else:
+            text = self._decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+
+        # drop the text which has been parsed
+        self._offset += self._pos
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        # type: () -> str
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in self.whitespace:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read():
+                return u''
+
+    def _position(self):
+        # type: () -> int
+        return self._offset + self._pos
+
+    def _consume(self, char):
+        # type: (str) -> None
+        if self._peek() != char:
+            raise ValueError('Expecting %r at character %d of the JSON stream' % (char, self._position()))
+        self._pos += 1
+
+    def _scan(self, keep):
+        # type: (bool) -> Optional[str]
+        """
+        Move past the value at the current position, reading as much of the stream as needed.
+
+        Parameters
+        ----------
+        keep : bool
+            Return the text of the value. Otherwise, the text is discarded as soon as it has been scanned.
+
+        Returns
+        -------
+        Optional[str]
+            The text of the value, if `keep` is ``True``.
+        """
+        char = self._peek()
+        if not char:
+            raise ValueError('Expecting value at character %d of the JSON stream' % self._position())
+
+        parts = []
+        pos = start = self._pos
+        depth = 0
+        in_string = escape = scalar = False
+        if char == u'"':
+            in_string = True
+            pos += 1
+        elif char in u'[{':
+            depth = 1
+            pos += 1
+        else:
+            scalar = True
+
+        while True:
+            buffer = self._buffer
+            length = len(buffer)
+            done = False
+            while not done:
+                if escape:
+                    if pos >= length:
+                        break
+                    pos += 1
+                    escape = False
+
+                if scalar:
+                    match = _JSON_SCALAR_END.search(buffer, pos)
+                    if match is None:
+                        pos = length
+                        break
+                    pos = match.start()
+                    done = True
+                elif in_string:
+                    pos = _JSON_STRING_RUN.match(buffer, pos).end()
+                    if pos >= length:
+                        break
+                    if buffer[pos] == u'\\':
+                        # the escaped character is in the next chunk
+                        pos = length
+                        escape = True
+                        break
+                    pos += 1
+                    in_string = False
+                    done = depth == 0
+                else:
+                    pos = _JSON_CONTAINER_RUN.match(buffer, pos).end()
+                    if pos >= length:
+                        break
+                    char = buffer[pos]
+                    pos += 1
+                    if char == u'"':
+                        in_string = True  # a string which continues in the next chunk
+                    elif char in u'[{':
+                        depth += 1
+                    else:
+                        depth -= 1
+                        done = depth == 0
+
+            if done:
+                self._pos = pos
+                if keep:
+                    parts.append(buffer[start:pos])
+                    return u''.join(parts)
+                return None
+
+            # the whole buffer is part of the value
+            if keep:
+                parts.append(buffer[start:])
+            self._offset += length
+            self._buffer = u''
+            self._pos = pos = start = 0
+            if not self._read():
+                if not scalar:
+                    raise ValueError('Unexpected end of the JSON stream')
+                return u''.join(parts) if keep else None
+
+    def _skip(self):
+        # type: () -> None
+        self._scan(keep=False)
+
+    def _value(self):
+        # type: () -> any
+        text = self._scan(keep=True)
+        value, end = self._json.raw_decode(text)
+        if end != len(text):
+            raise ValueError('Invalid JSON value %r' % text[:100])
+        return value
+
+    def end(self):
+        # type: () -> None
+        """
+        Read the rest of the document, which must only contain whitespace.
+
+        Raises
+        ------
+        ValueError
+            If there is data after the document.
+        """
+        if self._peek():
+            raise ValueError('Extra data at character %d of the JSON stream' % self._position())
+
+    def iter_path(self, segments):
+        # type: (list) -> Iterator[any]
+        """
+        Iterate over the values at a path.
+
+        Parameters
+        ----------
+        segments : list
+            The keys of the path. ``item`` matches each item of an array.
+
+        Yields
+        ------
+        any
+            The values.
+        """
+        if not segments:
+            yield self._value()
+            return
+
+        char = self._peek()
+        if segments[0] == 'item' and char == u'[':
+            self._consume(u'[')
+            if self._peek() == u']':
+                self._consume(u']')
+                return
+            while True:
+                for value in self.iter_path(segments[1:]):
+                    yield value
+                if self._peek() != u',':
+                    self._consume(u']')
+                    return
+                self._consume(u',')
+        elif char == u'{':
+            self._consume(u'{')
+            if self._peek() == u'}':
+                self._consume(u'}')
+                return
+            while True:
+                key = self._value()
+                self._consume(u':')
+                if key == segments[0]:
+                    for value in self.iter_path(segments[1:]):
+                        yield value
+                else:
+                    self._skip()
+                if self._peek() != u',':
+                    self._consume(u'}')
+                    return
+                self._consume(u',')
+        else:
+            self._skip()
+
+
+def iter_json_items(chunks, path='item', encoding=None):
+    # type: (any, str, Optional[str]) -> Iterator[any]
+    """
+    Iterate over the values at a path of a JSON document, while it is being read.
+
+    Parameters
+    ----------
+    chunks : iterable
+        The chunks of the document, ``bytes`` or ``str``.
+    path : str, default='item'
+        The dotted path of the values, ``item`` matches each item of an array, e.g. ``results.item``.
+    encoding : Optional[str]
+        The encoding of the document. UTF-8 by default.
+
+    Yields
+    ------
+    any
+        The values.
+    """
+    segments = [segment for segment in path.split('.') if segment] if path else []
+    reader = _JSONStreamReader(chunks=chunks, encoding=encoding)
+    for value in reader.iter_path(segments=segments):
+        yield value
+    reader.end()
+
+
 def json_to_string(obj):
     # type: (dict) -> str
+    backend = get_json_backend(encoder=True)
+    if backend.name != 'simplejson':
+        try:
+            return backend.dumps(obj)
+        except backend.errors:
+            pass  # simplejson supports more types, e.g. ``Decimal``
+
     try:
         return simplejson.dumps(obj)
     except Exception:
+        if json_settings['strict']:
+            raise
         _Log.Warn("Error encoding with simplejson, trying demjson instead. This will cause a performance hit.")
         _Log.Exception('JSON encoding error')
         return demjson.encode(obj)
@@ -126,11 +537,137 @@ def xml_element(name, text, **kwargs):
     return el
 
 
+# byte order marks and encoding declarations lxml detects by itself
+_MARKUP_BOMS = (codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)  # the utf-32 marks start with these
+_XML_DECLARATION = re.compile(br'\s*<\?xml[^>]+encoding\s*=', re.IGNORECASE)
+_HTML_CHARSET = re.compile(br'<meta[^>]+charset\s*=', re.IGNORECASE)
+_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+
+
+def markup_encoding(data, is_html=False):
+    # type: (bytes, bool) -> Optional[str]
+    """
+    Find out how lxml should decode markup, without decoding it.
+
+    Parameters
+    ----------
+    data : bytes
+        The markup.
+    is_html : bool
+        Also look for a ``<meta charset>`` declaration at the start of the markup.
+
+    Returns
+    -------
+    Optional[str]
+        ``''`` if the encoding is declared by a byte order mark or the markup itself, ``'utf-8'`` if the markup is
+        UTF-8 (or XML, which is UTF-8 unless declared otherwise) and ``None`` if the encoding has to be guessed.
+    """
+    head = data[:1024]
+    if head.startswith(_MARKUP_BOMS) or _XML_DECLARATION.match(head) or (is_html and _HTML_CHARSET.search(head)):
+        return ''
+    if not is_html:
+        return 'utf-8'  # lxml raises an error if it is not
+
+    # validate a chunk at a time, so a large document is not decoded into memory at once
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        for start in range(0, len(data), DEFAULT_CHUNK_SIZE):
+            decoder.decode(data[start:start + DEFAULT_CHUNK_SIZE])
+        decoder.decode(b'', True)
+    except UnicodeDecodeError:
+        return None
+    return 'utf-8'
+
+
+def response_charset(response):
+    # type: (requests.Response) -> Optional[str]
+    """
+    Get the charset given by the ``Content-Type`` header of a response.
+
+    Parameters
+    ----------
+    response : requests.Response
+        The response.
+
+    Returns
+    -------
+    Optional[str]
+        The charset, or ``None`` if the header does not include one.
+    """
+    match = _CHARSET.search(response.headers.get('Content-Type', ''))
+    return match.group(1) if match else None
+
+
+# lxml parsers can be reused, but not by several threads at once
+_parsers = threading.local()
+
+
+def get_parser(kind='xml', encoding=None, remove_blank_text=False):
+    # type: (str, Optional[str], bool) -> etree.XMLParser
+    """
+    Get a parser for the current thread, which is created on first use and then reused.
+
+    Parameters
+    ----------
+    kind : str, default='xml'
+        The kind of parser, ``xml``, ``html`` or ``objectify``.
+    encoding : Optional[str]
+        The encoding the parser decodes documents with. If ``None``, the encoding is detected.
+    remove_blank_text : bool, default=False
+        Remove white space between elements. Objectify parsers always remove it.
+
+    Returns
+    -------
+    etree.XMLParser
+        The parser.
+
+    Raises
+    ------
+    LookupError
+        If lxml does not support the encoding.
+    ValueError
+        If the kind of parser is unknown.
+    """
+    try:
+        parsers = _parsers.cache
+    except AttributeError:
+        parsers = _parsers.cache = dict()
+
+    key = (kind, encoding, remove_blank_text)
+    try:
+        return parsers[key]
+    except KeyError:
+        pass
+
+    if kind == 'xml':
+        parser = etree.XMLParser(encoding=encoding, remove_blank_text=remove_blank_text)
+    elif kind == 'html':
+        parser = HTMLParser(encoding=encoding, remove_blank_text=remove_blank_text)
+    elif kind == 'objectify':
+        parser = objectify.makeparser(encoding=encoding, remove_blank_text=True)
+    else:
+        raise ValueError('Unknown parser: %s' % kind)
+
+    parsers[key] = parser
+    return parser
+
+
+def _guess_markup(string, is_html):
+    # type: (bytes, bool) -> bytes
+    ud = UnicodeDammit(string, is_html=is_html)
+    if ud.unicode_markup is None:
+        return string.decode('utf-8', 'replace').encode('utf-8')
+    return ud.unicode_markup.encode('utf-8')
+
+
 def xml_element_from_string(string, is_html=False, encoding=None, remove_blank_text=False):
     # type: (str, bool, Optional[str], bool ) -> etree.Element
     """
     Create an element from a string.
 
+    Bytes are passed to lxml without being decoded when the encoding is given, declared by a byte order mark or the
+    markup, or the markup is UTF-8. Otherwise, the encoding is guessed with ``UnicodeDammit``.
+
     Parameters
     ----------
     string : str
@@ -150,20 +687,45 @@ def xml_element_from_string(string, is_html=False, encoding=None, remove_blank_t
     if string is None:
         return None
 
-    if encoding is None:
-        ud = UnicodeDammit(str(string), is_html=is_html)
-        markup = ud.markup.encode('utf-8')
+    guessed = False
+    if not isinstance(string, bytes):
+        markup = (string if isinstance(string, unicode) else str(string)).encode('utf-8')
+        parser_encoding = 'utf-8'
+    elif encoding is not None:
+        markup = string
+        parser_encoding = codecs.lookup(encoding).name
     else:
-        markup = str(string).encode(encoding)
+        markup = string
+        parser_encoding = markup_encoding(data=string, is_html=is_html)
+        if parser_encoding is None:
+            markup = _guess_markup(string=string, is_html=is_html)
+            parser_encoding = 'utf-8'
+            guessed = True
+
+    try:
+        parser = get_parser(kind='html' if is_html else 'xml', encoding=parser_encoding or None,
+                            remove_blank_text=remove_blank_text and not is_html)
+    except LookupError:
+        # an encoding libxml2 does not support
+        markup = markup.decode(parser_encoding).encode('utf-8')
+        return xml_element_from_string(string=markup, is_html=is_html, encoding='utf-8',
+                                       remove_blank_text=remove_blank_text)
 
     if is_html:
         try:
-            return html.fromstring(markup, parser=HTMLParser(encoding='utf-8'))
+            return html.fromstring(markup, parser=parser)
         except Exception:
             _Log.Exception('Error parsing with lxml, falling back to soupparser')
             return soupparser.fromstring(string)
-    else:
-        return etree.fromstring(markup, parser=(etree.XMLParser(remove_blank_text=True) if remove_blank_text else None))
+
+    try:
+        return etree.fromstring(markup, parser=parser)
+    except etree.XMLSyntaxError:
+        if guessed or encoding is not None or not isinstance(string, bytes):
+            raise
+        # the declared encoding, or utf-8, may be wrong
+        return xml_element_from_string(string=_guess_markup(string=string, is_html=False), encoding='utf-8',
+                                       remove_blank_text=remove_blank_text)
 
 
 def xml_element_to_string(el, encoding='utf-8', method=None):
@@ -207,7 +769,7 @@ def xml_element_to_string(el, encoding='utf-8', method=None):
 
 def xml_object_from_string(string):
     # type: (str) -> objectify.Element
-    return objectify.fromstring(xml=string)
+    return objectify.fromstring(xml=string, parser=get_parser(kind='objectify'))
 
 
 def xml_object_to_string(obj, encoding='utf-8'):
@@ -215,6 +777,70 @@ def xml_object_to_string(obj, encoding='utf-8'):
     return etree.tostring(obj, pretty_print=True, encoding=encoding).decode(encoding)
 
 
+def _read_elements(parser):
+    # type: (etree.XMLPullParser) -> Iterator[etree.Element]
+    for _, element in parser.read_events():
+        yield element
+
+        # free the processed element, and its siblings which were skipped
+        element.clear()
+        parent = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
+
+
+def iter_xml_elements(chunks, tag, encoding=None):
+    # type: (any, any, Optional[str]) -> Iterator[etree.Element]
+    """
+    Iterate over the elements with the given tag of an XML document, while it is being read.
+
+    Each element is complete when it is yielded, and is cleared, along with the siblings before it, when the next
+    element is requested, so memory use does not grow with the size of the document.
+
+    Parameters
+    ----------
+    chunks : iterable
+        The chunks of the document, ``bytes`` or ``str``.
+    tag : Union[str, list]
+        The tag, or tags, of the elements, e.g. ``Video`` or ``{http://www.w3.org/2005/Atom}entry``.
+    encoding : Optional[str]
+        The encoding of the document. If not set, the encoding declared in the document is used, otherwise UTF-8.
+
+    Yields
+    ------
+    etree.Element
+        The elements, in document order of their end tags.
+
+    Raises
+    ------
+    etree.XMLSyntaxError
+        If the document is not well-formed.
+    """
+    decoder = None
+    if encoding is not None:
+        encoding = codecs.lookup(encoding).name
+        try:
+            parser = etree.XMLPullParser(events=('end',), tag=tag, encoding=encoding)
+        except LookupError:
+            # an encoding libxml2 does not support
+            parser = etree.XMLPullParser(events=('end',), tag=tag)
+            decoder = codecs.getincrementaldecoder(encoding)()
+    else:
+        parser = etree.XMLPullParser(events=('end',), tag=tag)
+
+    for chunk in chunks:
+        if decoder is not None and isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        parser.feed(chunk)
+        for element in _read_elements(parser=parser):
+            yield element
+
+    parser.close()
+    for element in _read_elements(parser=parser):
+        yield element
+
+
 class _HTMLKit:
     """
     The HTML API is similar to the XML API, but is better suited to parsing HTML content. It is powered by the lxml
@@ -264,8 +890,8 @@ class _HTMLKit:
         """
         return xml_element_to_string(el=el, encoding=encoding, method='html')
 
-    def ElementFromString(self, string, max_size=None):
-        # type: (str, Optional[int]) -> html.HtmlElement
+    def ElementFromString(self, string, max_size=None, encoding=None):
+        # type: (str, Optional[int], Optional[str]) -> html.HtmlElement
         """
         Converts `string` to an HTML element object.
 
@@ -275,6 +901,11 @@ class _HTMLKit:
             The string to convert.
         max_size : Optional[int]
             The maximum size, in bytes, to accept.
+        encoding : Optional[str]
+            The encoding of `string`, if it is ``bytes``. If not set, the encoding declared in the document is used,
+            otherwise it is guessed.
+
+            .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
 
         Returns
         -------
@@ -282,11 +913,12 @@ class _HTMLKit:
             An `html.HtmlElement <https://lxml.de/lxmlhtml.html#html-element-methods>`_ object.
         """
         check_size(data=string, max_size=max_size)
-        return xml_element_from_string(string, is_html=True)
+        return xml_element_from_string(string, is_html=True, encoding=encoding)
 
     def ElementFromURL(self, url, values=None, headers={}, cacheTime=None, encoding=None, errors=None,
-                       timeout=GLOBAL_DEFAULT_TIMEOUT, sleep=0, follow_redirects=True, method=None, max_size=None):
-        # type: (str, Optional[dict], dict, Optional[float], Optional[str], Optional[str], float, float, bool, Optional[str], Optional[int]) -> html.HtmlElement  # noqa: E501  # is it possible to have multiline type hints in python2?
+                       timeout=GLOBAL_DEFAULT_TIMEOUT, sleep=0, follow_redirects=True, method=None, max_size=None,
+                       staleTime=None):
+        # type: (str, Optional[dict], dict, Optional[float], Optional[str], Optional[str], float, float, bool, Optional[str], Optional[int], Optional[float]) -> html.HtmlElement  # noqa: E501  # is it possible to have multiline type hints in python2?
         """
         Retrieves the content for a given HTTP request and parses it as HTML using the above method.
 
@@ -320,6 +952,9 @@ class _HTMLKit:
             Supported methods: `GET`, `HEAD`, `POST`, `DELETE`, `PUT`, `OPTIONS`.
         max_size : Optional[int]
             The maximum size, in bytes, to accept.
+        staleTime : Optional[float]
+            The time (in seconds) after `cacheTime` has expired during which the expired cached data is returned
+            immediately, while it is refreshed in the background.
 
         Raises
         ------
@@ -335,7 +970,7 @@ class _HTMLKit:
         check_port(url=url)
 
         all_headers = headers
-        return self.ElementFromString(http_request(
+        response = http_request(
             url=url,
             values=values,
             headers=all_headers,
@@ -345,9 +980,14 @@ class _HTMLKit:
             timeout=timeout,
             sleep=sleep,
             opener=None,  # todo
+            max_size=max_size,
+            stale_time=staleTime,
             follow_redirects=follow_redirects,
             method=method,
-        ).text, max_size=max_size)
+        )
+        # the raw body is parsed, so it is not decoded twice
+        return self.ElementFromString(response.content, max_size=max_size,
+                                      encoding=encoding or response_charset(response=response))
 
 
 class _JSONKit:
@@ -386,8 +1026,9 @@ class _JSONKit:
         return json_from_string(json_string=string, encoding=encoding)
 
     def ObjectFromURL(self, url, values=None, headers={}, cacheTime=None, encoding=None, errors=None,
-                      timeout=GLOBAL_DEFAULT_TIMEOUT, sleep=0, follow_redirects=True, method=None, max_size=None):
-        # type: (str, Optional[dict], dict, Optional[float], Optional[str], Optional[str], float, float, bool, Optional[str], Optional[int]) -> dict  # noqa: E501  # is it possible to have multiline type hints in python2?
+                      timeout=GLOBAL_DEFAULT_TIMEOUT, sleep=0, follow_redirects=True, method=None, max_size=None,
+                      staleTime=None):
+        # type: (str, Optional[dict], dict, Optional[float], Optional[str], Optional[str], float, float, bool, Optional[str], Optional[int], Optional[float]) -> dict  # noqa: E501  # is it possible to have multiline type hints in python2?
         """
         Retrieves the content for a given HTTP request and parses it as JSON-formatted content using the above method.
 
@@ -421,6 +1062,9 @@ class _JSONKit:
             Supported methods: `GET`, `HEAD`, `POST`, `DELETE`, `PUT`, `OPTIONS`.
         max_size : Optional[int]
             The maximum size, in bytes, to accept.
+        staleTime : Optional[float]
+            The time (in seconds) after `cacheTime` has expired during which the expired cached data is returned
+            immediately, while it is refreshed in the background.
 
         Raises
         ------
@@ -448,10 +1092,198 @@ class _JSONKit:
             timeout=timeout,
             sleep=sleep,
             opener=None,  # todo
+            max_size=max_size,
+            stale_time=staleTime,
             follow_redirects=follow_redirects,
             method=method,
         ).content, encoding, max_size=max_size)
 
+    def ObjectsFromURLs(self, urls, max_workers=DEFAULT_MAX_WORKERS, per_host_limit=DEFAULT_PER_HOST_LIMIT,
+                        values=None, headers={}, cacheTime=None, encoding=None, errors=None,
+                        timeout=GLOBAL_DEFAULT_TIMEOUT, sleep=0, follow_redirects=True, method=None, max_size=None,
+                        staleTime=None):
+        # type: (list, int, Optional[int], Optional[dict], dict, Optional[float], Optional[str], Optional[str], float, float, bool, Optional[str], Optional[int], Optional[float]) -> list  # noqa: E501  # is it possible to have multiline type hints in python2?
+        """
+        Retrieves the content for each of the given URLs concurrently and parses them as JSON-formatted content using
+        the above method.
+
+        .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+
+        Parameters
+        ----------
+        urls : list
+            The URLs to retrieve content from.
+        max_workers : int, default=8
+            The maximum number of URLs to retrieve at once.
+        per_host_limit : Optional[int], default=4
+            The maximum number of URLs to retrieve at once from the same host. If ``None``, there is no limit.
+        values : Optional[dict]
+            Values to pass as URL encoded content for a POST request.
+        headers : dict, default={}
+            Custom HTTP headers to add to the requests.
+        cacheTime : Optional[float]
+            The maximum age (in seconds) that cached data should still be considered valid.
+        encoding : Optional[str]
+            The string encoding to use for the downloaded data. If no encoding is provided, the framework will attempt
+            to guess the encoding.
+        errors : Optional[str]
+            The error handling method to use. If `errors` is `'strict'` (the default), a `ValueError` is raised on
+            errors, while a value of `'ignore'` causes errors to be silently ignored, and a value of `'replace'`
+            causes the official Unicode replacement character, U+FFFD, to be used to replace input characters which
+            cannot be decoded.
+        timeout : float, default=20
+            The maximum amount of time (in seconds) that the framework should wait for a response before aborting.
+        sleep : float, default=0
+            The number of seconds to pause after a network request was made, before another request is made to the
+            same host in its place. Combined with `per_host_limit` this limits the rate of requests to each host.
+        follow_redirects : bool, default=True
+            Specifies whether redirects should be followed, or if an exception should be raised. If False, the
+            framework will raise a RedirectError when encountering a redirected response.
+        method : Optional[str]
+            Supported methods: `GET`, `HEAD`, `POST`, `DELETE`, `PUT`, `OPTIONS`.
+        max_size : Optional[int]
+            The maximum size, in bytes, to accept for each response.
+        staleTime : Optional[float]
+            The time (in seconds) after `cacheTime` has expired during which the expired cached data is returned
+            immediately, while it is refreshed in the background.
+
+        Raises
+        ------
+        Exception
+            If accessing a Plex server url and not using an elevated `PlexPluginCodePolicy` in the plist file.
+            Plex Framework will raise ``Framework.exceptions.FrameworkException`` instead.
+
+        Returns
+        -------
+        list
+            The parsed objects, in the same order as `urls`.
+        """
+        def object_from_url(url):
+            return self.ObjectFromURL(url=url, values=values, headers=headers, cacheTime=cacheTime,
+                                      encoding=encoding, errors=errors, timeout=timeout, sleep=sleep,
+                                      follow_redirects=follow_redirects, method=method, max_size=max_size,
+                                      staleTime=staleTime)
+
+        return map_urls(func=object_from_url, urls=urls, max_workers=max_workers, per_host_limit=per_host_limit)
+
+    def IterItemsFromString(self, string, path='item', encoding=None, max_size=None):
+        # type: (str, str, Optional[str], Optional[int]) -> Iterator[any]
+        """
+        Parses a JSON-formatted string and yields the values at the given path, without creating the whole object.
+
+        .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+
+        Parameters
+        ----------
+        string : str
+            The string to parse.
+        path : str, default='item'
+            The dotted path of the values to yield. ``item`` matches each item of an array, e.g. ``results.item``
+            yields each item of the ``results`` array of the top level object. An empty path yields the whole object.
+        encoding : Optional[str]
+            The encoding of the string, if it is ``bytes``. UTF-8 by default.
+        max_size : Optional[int]
+            The maximum size, in bytes, to accept.
+
+        Yields
+        ------
+        any
+            The values at the path.
+        """
+        check_size(data=string, max_size=max_size)
+        return iter_json_items(chunks=[string], path=path, encoding=encoding)
+
+    def IterItemsFromURL(self, url, path='item', values=None, headers={}, cacheTime=None, encoding=None,
+                         errors=None, timeout=GLOBAL_DEFAULT_TIMEOUT, sleep=0, follow_redirects=True, method=None,
+                         max_size=None, staleTime=None):
+        # type: (str, str, Optional[dict], dict, Optional[float], Optional[str], Optional[str], float, float, bool, Optional[str], Optional[int], Optional[float]) -> Iterator[any]  # noqa: E501  # is it possible to have multiline type hints in python2?
+        """
+        Retrieves the content for a given HTTP request and yields the values at the given path while the content is
+        being downloaded, so large responses are processed without holding the whole object in memory::
+
+            for movie in JSON.IterItemsFromURL(url, path='results.item'):
+                Log(movie['title'])
+
+        Values which are not on the path are skipped without being kept in memory. The body is kept in memory only if
+        it will be cached, i.e. if `cacheTime` is set.
+
+        .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+
+        Parameters
+        ----------
+        url : str
+            The URL to retrieve content from.
+        path : str, default='item'
+            The dotted path of the values to yield. ``item`` matches each item of an array, e.g. ``results.item``
+            yields each item of the ``results`` array of the top level object. An empty path yields the whole object.
+        values : Optional[dict]
+            Values to pass as URL encoded content for a POST request.
+        headers : dict, default={}
+            Custom HTTP headers to add to the request.
+        cacheTime : Optional[float]
+            The maximum age (in seconds) that cached data should still be considered valid.
+        encoding : Optional[str]
+            The string encoding of the downloaded data. UTF-8 by default.
+        errors : Optional[str]
+            The error handling method to use. If `errors` is `'strict'` (the default), a `ValueError` is raised on
+            errors, while a value of `'ignore'` causes errors to be silently ignored, and a value of `'replace'`
+            causes the official Unicode replacement character, U+FFFD, to be used to replace input characters which
+            cannot be decoded.
+        timeout : float, default=20
+            The maximum amount of time (in seconds) that the framework should wait for a response before aborting.
+        sleep : float, default=0
+            The number of seconds the current thread should pause for if a network request was made, ensuring undue
+            burden isn't placed on web servers. If cached data was used, this value is ignored.
+        follow_redirects : bool, default=True
+            Specifies whether redirects should be followed, or if an exception should be raised. If False, the
+            framework will raise a RedirectError when encountering a redirected response.
+        method : Optional[str]
+            Supported methods: `GET`, `HEAD`, `POST`, `DELETE`, `PUT`, `OPTIONS`.
+        max_size : Optional[int]
+            The maximum size, in bytes, to accept.
+        staleTime : Optional[float]
+            The time (in seconds) after `cacheTime` has expired during which the expired cached data is returned
+            immediately, while it is refreshed in the background.
+
+        Raises
+        ------
+        Exception
+            If accessing a Plex server url and not using an elevated `PlexPluginCodePolicy` in the plist file.
+            Plex Framework will raise ``Framework.exceptions.FrameworkException`` instead.
+
+        Yields
+        ------
+        any
+            The values at the path.
+        """
+        check_port(url=url)
+
+        all_headers = {'Accept': 'text/*, application/json'}
+        all_headers.update(headers)
+
+        response = http_request(
+            url=url,
+            values=values,
+            headers=all_headers,
+            cache_time=cacheTime,
+            encoding=encoding,
+            errors=errors,
+            timeout=timeout,
+            sleep=sleep,
+            opener=None,  # todo
+            max_size=max_size,
+            stale_time=staleTime,
+            follow_redirects=follow_redirects,
+            method=method,
+            stream=True,
+        )
+        try:
+            for value in iter_json_items(chunks=iter_streamed_content(response=response, max_size=max_size),
+                                         path=path, encoding=encoding):
+                yield value
+        finally:
+            response.close()
+
     def StringFromObject(self, obj):
         # type: (dict) -> str
         """
@@ -469,6 +1301,37 @@ class _JSONKit:
         """
         return json_to_string(obj)
 
+    def SetBackend(self, decoder=None, encoder=None, strict=None):
+        # type: (Optional[str], Optional[str], Optional[bool]) -> None
+        """
+        Selects the libraries used to parse and create JSON. By default, the fastest installed library out of
+        ``orjson``, ``ujson`` and ``simplejson`` is used to parse JSON, and ``simplejson`` is used to create it. The
+        standard library ``json`` (Python 3.6 or newer) can also be selected. Documents the selected library rejects
+        are parsed with ``simplejson``, then with ``demjson`` unless `strict` is enabled::
+
+            JSON.SetBackend(decoder='orjson', strict=True)
+
+        .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+
+        Parameters
+        ----------
+        decoder : Optional[str]
+            The library used to parse JSON. If ``None``, the library is not changed. Use ``auto`` to select the fastest
+            installed library again.
+        encoder : Optional[str]
+            The library used to create JSON. If ``None``, the library is not changed. Use ``auto`` to select the
+            fastest installed library, which may format the string differently.
+        strict : Optional[bool]
+            If ``True``, invalid documents and unsupported objects raise an error instead of falling back to the slow
+            ``demjson`` library. If ``None``, the setting is not changed.
+
+        Raises
+        ------
+        ValueError
+            If a library is not installed.
+        """
+        set_json_backend(decoder=decoder, encoder=encoder, strict=strict)
+
 
 class _PlistKit:
     """
@@ -512,8 +1375,9 @@ class _PlistKit:
                 return plistlib.loads(string)
 
     def ObjectFromURL(self, url, values=None, headers={}, cacheTime=None, encoding=None, errors=None,
-                      timeout=GLOBAL_DEFAULT_TIMEOUT, sleep=0, follow_redirects=True, method=None, max_size=None):
-        # type: (str, Optional[dict], dict, Optional[float], Optional[str], Optional[str], float, float, bool, Optional[str], Optional[int]) -> dict  # noqa: E501  # is it possible to have multiline type hints in python2?
+                      timeout=GLOBAL_DEFAULT_TIMEOUT, sleep=0, follow_redirects=True, method=None, max_size=None,
+                      staleTime=None):
+        # type: (str, Optional[dict], dict, Optional[float], Optional[str], Optional[str], float, float, bool, Optional[str], Optional[int], Optional[float]) -> dict  # noqa: E501  # is it possible to have multiline type hints in python2?
         """
         Retrieves the content for a given HTTP request and parses it as a Plist using the above method.
 
@@ -547,6 +1411,9 @@ class _PlistKit:
             Supported methods: `GET`, `HEAD`, `POST`, `DELETE`, `PUT`, `OPTIONS`.
         max_size : Optional[int]
             The maximum size, in bytes, to accept.
+        staleTime : Optional[float]
+            The time (in seconds) after `cacheTime` has expired during which the expired cached data is returned
+            immediately, while it is refreshed in the background.
 
         Raises
         ------
@@ -572,6 +1439,8 @@ class _PlistKit:
             timeout=timeout,
             sleep=sleep,
             opener=None,  # todo
+            max_size=max_size,
+            stale_time=staleTime,
             follow_redirects=follow_redirects,
             method=method,
         ).content, max_size=max_size)
@@ -630,8 +1499,9 @@ class _RSSKit:
         return feedparser.parse(string)
 
     def FeedFromURL(self, url, values=None, headers={}, cacheTime=None, encoding=None, errors=None,
-                    timeout=GLOBAL_DEFAULT_TIMEOUT, sleep=0, follow_redirects=True, method=None, max_size=None):
-        # type: (str, Optional[dict], dict, Optional[float], Optional[str], Optional[str], float, float, bool, Optional[str], Optional[int]) -> feedparser.FeedParserDict  # noqa: E501  # is it possible to have multiline type hints in python2?
+                    timeout=GLOBAL_DEFAULT_TIMEOUT, sleep=0, follow_redirects=True, method=None, max_size=None,
+                    staleTime=None):
+        # type: (str, Optional[dict], dict, Optional[float], Optional[str], Optional[str], float, float, bool, Optional[str], Optional[int], Optional[float]) -> feedparser.FeedParserDict  # noqa: E501  # is it possible to have multiline type hints in python2?
         """
         Retrieves the content for a given HTTP request and parses it as an RSS, RDF or ATOM feed using the above method.
 
@@ -665,6 +1535,9 @@ class _RSSKit:
             Supported methods: `GET`, `HEAD`, `POST`, `DELETE`, `PUT`, `OPTIONS`.
         max_size : Optional[int]
             The maximum size, in bytes, to accept.
+        staleTime : Optional[float]
+            The time (in seconds) after `cacheTime` has expired during which the expired cached data is returned
+            immediately, while it is refreshed in the background.
 
         Raises
         ------
@@ -690,6 +1563,8 @@ class _RSSKit:
             timeout=timeout,
             sleep=sleep,
             opener=None,  # todo
+            max_size=max_size,
+            stale_time=staleTime,
             follow_redirects=follow_redirects,
             method=method,
         ).content, max_size=max_size)
@@ -717,6 +1592,12 @@ class _XMLKit:
         See below.
     ElementFromURL:
         See below.
+    ElementsFromURLs:
+        See below.
+    IterElementsFromString:
+        See below.
+    IterElementsFromURL:
+        See below.
     ObjectFromString:
         See below.
     StringFromObject:
@@ -793,8 +1674,9 @@ class _XMLKit:
         return xml_element_from_string(string=string, encoding=encoding)
 
     def ElementFromURL(self, url, values=None, headers={}, cacheTime=None, encoding=None, errors=None,
-                       timeout=GLOBAL_DEFAULT_TIMEOUT, sleep=0, follow_redirects=True, method=None, max_size=None):
-        # type: (str, Optional[dict], dict, Optional[float], Optional[str], Optional[str], float, float, bool, Optional[str], Optional[int]) -> etree.Element  # noqa: E501  # is it possible to have multiline type hints in python2?
+                       timeout=GLOBAL_DEFAULT_TIMEOUT, sleep=0, follow_redirects=True, method=None, max_size=None,
+                       staleTime=None):
+        # type: (str, Optional[dict], dict, Optional[float], Optional[str], Optional[str], float, float, bool, Optional[str], Optional[int], Optional[float]) -> etree.Element  # noqa: E501  # is it possible to have multiline type hints in python2?
         """
         Retrieves the content for a given HTTP request and parses it as XML using the above method.
 
@@ -828,6 +1710,9 @@ class _XMLKit:
             Supported methods: `GET`, `HEAD`, `POST`, `DELETE`, `PUT`, `OPTIONS`.
         max_size : Optional[int]
             The maximum size, in bytes, to accept.
+        staleTime : Optional[float]
+            The time (in seconds) after `cacheTime` has expired during which the expired cached data is returned
+            immediately, while it is refreshed in the background.
 
         Raises
         ------
@@ -843,7 +1728,192 @@ class _XMLKit:
         check_port(url=url)
 
         all_headers = headers
-        return self.ElementFromString(string=http_request(
+        response = http_request(
+            url=url,
+            values=values,
+            headers=all_headers,
+            cache_time=cacheTime,
+            encoding=encoding,
+            errors=errors,
+            timeout=timeout,
+            sleep=sleep,
+            opener=None,  # todo
+            max_size=max_size,
+            stale_time=staleTime,
+            follow_redirects=follow_redirects,
+            method=method,
+        )
+        # the raw body is parsed, so it is not decoded twice
+        return self.ElementFromString(string=response.content, encoding=encoding or response_charset(response=response),
+                                      max_size=max_size)
+
+    def ElementsFromURLs(self, urls, max_workers=DEFAULT_MAX_WORKERS, per_host_limit=DEFAULT_PER_HOST_LIMIT,
+                         values=None, headers={}, cacheTime=None, encoding=None, errors=None,
+                         timeout=GLOBAL_DEFAULT_TIMEOUT, sleep=0, follow_redirects=True, method=None, max_size=None,
+                         staleTime=None):
+        # type: (list, int, Optional[int], Optional[dict], dict, Optional[float], Optional[str], Optional[str], float, float, bool, Optional[str], Optional[int], Optional[float]) -> list  # noqa: E501  # is it possible to have multiline type hints in python2?
+        """
+        Retrieves the content for each of the given URLs concurrently and parses them as XML using the above method.
+
+        .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+
+        Parameters
+        ----------
+        urls : list
+            The URLs to retrieve content from.
+        max_workers : int, default=8
+            The maximum number of URLs to retrieve at once.
+        per_host_limit : Optional[int], default=4
+            The maximum number of URLs to retrieve at once from the same host. If ``None``, there is no limit.
+        values : Optional[dict]
+            Values to pass as URL encoded content for a POST request.
+        headers : dict, default={}
+            Custom HTTP headers to add to the requests.
+        cacheTime : Optional[float]
+            The maximum age (in seconds) that cached data should still be considered valid.
+        encoding : Optional[str]
+            The string encoding to use for the downloaded data. If no encoding is provided, the framework will attempt
+            to guess the encoding.
+        errors : Optional[str]
+            The error handling method to use. If `errors` is `'strict'` (the default), a `ValueError` is raised on
+            errors, while a value of `'ignore'` causes errors to be silently ignored, and a value of `'replace'`
+            causes the official Unicode replacement character, U+FFFD, to be used to replace input characters which
+            cannot be decoded.
+        timeout : float, default=20
+            The maximum amount of time (in seconds) that the framework should wait for a response before aborting.
+        sleep : float, default=0
+            The number of seconds to pause after a network request was made, before another request is made to the
+            same host in its place. Combined with `per_host_limit` this limits the rate of requests to each host.
+        follow_redirects : bool, default=True
+            Specifies whether redirects should be followed, or if an exception should be raised. If False, the
+            framework will raise a RedirectError when encountering a redirected response.
+        method : Optional[str]
+            Supported methods: `GET`, `HEAD`, `POST`, `DELETE`, `PUT`, `OPTIONS`.
+        max_size : Optional[int]
+            The maximum size, in bytes, to accept for each response.
+        staleTime : Optional[float]
+            The time (in seconds) after `cacheTime` has expired during which the expired cached data is returned
+            immediately, while it is refreshed in the background.
+
+        Raises
+        ------
+        Exception
+            If accessing a Plex server url and not using an elevated `PlexPluginCodePolicy` in the plist file.
+            Plex Framework will raise ``Framework.exceptions.FrameworkException`` instead.
+
+        Returns
+        -------
+        list
+            The elements, in the same order as `urls`.
+        """
+        def element_from_url(url):
+            return self.ElementFromURL(url=url, values=values, headers=headers, cacheTime=cacheTime,
+                                       encoding=encoding, errors=errors, timeout=timeout, sleep=sleep,
+                                       follow_redirects=follow_redirects, method=method, max_size=max_size,
+                                       staleTime=staleTime)
+
+        return map_urls(func=element_from_url, urls=urls, max_workers=max_workers, per_host_limit=per_host_limit)
+
+    def IterElementsFromString(self, string, tag, encoding=None, max_size=None):
+        # type: (str, any, Optional[str], Optional[int]) -> Iterator[etree.Element]
+        """
+        Parses `string` as XML and yields the elements with the given tag, without keeping the whole tree in memory.
+
+        Each element is cleared, along with the siblings before it, when the next element is requested. Copy an
+        element, or the values needed from it, to keep it. Matching elements nested in another matching element are
+        cleared before the outer element is yielded.
+
+        .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+
+        Parameters
+        ----------
+        string : str
+            The string to parse.
+        tag : Union[str, list]
+            The tag, or tags, of the elements to yield, e.g. ``Video`` or ``{http://www.w3.org/2005/Atom}entry``.
+        encoding : Optional[str]
+            The encoding of `string`, if it is ``bytes``. If not set, the encoding declared in the document is used,
+            otherwise UTF-8.
+        max_size : Optional[int]
+            The maximum size, in bytes, to accept.
+
+        Yields
+        ------
+        etree.Element
+            The elements.
+        """
+        check_size(data=string, max_size=max_size)
+        if not isinstance(string, bytes):
+            string, encoding = string.encode('utf-8'), 'utf-8'
+        return iter_xml_elements(chunks=[string], tag=tag, encoding=encoding)
+
+    def IterElementsFromURL(self, url, tag, values=None, headers={}, cacheTime=None, encoding=None, errors=None,
+                            timeout=GLOBAL_DEFAULT_TIMEOUT, sleep=0, follow_redirects=True, method=None,
+                            max_size=None, staleTime=None):
+        # type: (str, any, Optional[dict], dict, Optional[float], Optional[str], Optional[str], float, float, bool, Optional[str], Optional[int], Optional[float]) -> Iterator[etree.Element]  # noqa: E501  # is it possible to have multiline type hints in python2?
+        """
+        Retrieves the content for a given HTTP request and yields the elements with the given tag while the content is
+        being downloaded, so large documents are processed without keeping the whole tree in memory::
+
+            for video in XML.IterElementsFromURL(url, tag='Video'):
+                Log(video.get('title'))
+
+        Each element is cleared, along with the siblings before it, when the next element is requested. The body is
+        kept in memory only if it will be cached, i.e. if `cacheTime` is set.
+
+        .. Note:: This is missing from the Plex Framework, it is only available in plexhints.
+
+        Parameters
+        ----------
+        url : str
+            The URL to retrieve content from.
+        tag : Union[str, list]
+            The tag, or tags, of the elements to yield, e.g. ``Video`` or ``{http://www.w3.org/2005/Atom}entry``.
+        values : Optional[dict]
+            Values to pass as URL encoded content for a POST request.
+        headers : dict, default={}
+            Custom HTTP headers to add to the request.
+        cacheTime : Optional[float]
+            The maximum age (in seconds) that cached data should still be considered valid.
+        encoding : Optional[str]
+            The string encoding of the downloaded data. If not set, the charset of the response or the encoding
+            declared in the document is used, otherwise UTF-8.
+        errors : Optional[str]
+            The error handling method to use. If `errors` is `'strict'` (the default), a `ValueError` is raised on
+            errors, while a value of `'ignore'` causes errors to be silently ignored, and a value of `'replace'`
+            causes the official Unicode replacement character, U+FFFD, to be used to replace input characters which
+            cannot be decoded.
+        timeout : float, default=20
+            The maximum amount of time (in seconds) that the framework should wait for a response before aborting.
+        sleep : float, default=0
+            The number of seconds the current thread should pause for if a network request was made, ensuring undue
+            burden isn't placed on web servers. If cached data was used, this value is ignored.
+        follow_redirects : bool, default=True
+            Specifies whether redirects should be followed, or if an exception should be raised. If False,
+            the framework will raise a RedirectError when encountering a redirected response.
+        method : Optional[str]
+            Supported methods: `GET`, `HEAD`, `POST`, `DELETE`, `PUT`, `OPTIONS`.
+        max_size : Optional[int]
+            The maximum size, in bytes, to accept.
+        staleTime : Optional[float]
+            The time (in seconds) after `cacheTime` has expired during which the expired cached data is returned
+            immediately, while it is refreshed in the background.
+
+        Raises
+        ------
+        Exception
+            If accessing a Plex server url and not using an elevated `PlexPluginCodePolicy` in the plist file.
+            Plex Framework will raise ``Framework.exceptions.FrameworkException`` instead.
+
+        Yields
+        ------
+        etree.Element
+            The elements.
+        """
+        check_port(url=url)
+
+        all_headers = headers
+        response = http_request(
             url=url,
             values=values,
             headers=all_headers,
@@ -853,9 +1923,18 @@ class _XMLKit:
             timeout=timeout,
             sleep=sleep,
             opener=None,  # todo
+            max_size=max_size,
+            stale_time=staleTime,
             follow_redirects=follow_redirects,
             method=method,
-        ).text, encoding=encoding, max_size=max_size)
+            stream=True,
+        )
+        try:
+            for element in iter_xml_elements(chunks=iter_streamed_content(response=response, max_size=max_size),
+                                             tag=tag, encoding=encoding or response_charset(response=response)):
+                yield element
+        finally:
+            response.close()
 
     def ObjectFromString(self, string, max_size=None):
         # type: (str, Optional[int]) -> objectify.ObjectifiedElement
@@ -898,8 +1977,9 @@ class _XMLKit:
         return xml_object_to_string(obj=obj, encoding=encoding)
 
     def ObjectFromURL(self, url, values=None, headers={}, cacheTime=None, encoding=None, errors=None,
-                      timeout=GLOBAL_DEFAULT_TIMEOUT, sleep=0, max_size=None):
-        # type: (str, Optional[dict], dict, Optional[float], Optional[str], Optional[str], float, float, Optional[int]) -> objectify.ObjectifiedElement  # noqa: E501  # is it possible to have multiline type hints in python2?
+                      timeout=GLOBAL_DEFAULT_TIMEOUT, sleep=0, max_size=None,
+                      staleTime=None):
+        # type: (str, Optional[dict], dict, Optional[float], Optional[str], Optional[str], float, float, Optional[int], Optional[float]) -> objectify.ObjectifiedElement  # noqa: E501  # is it possible to have multiline type hints in python2?
         """
         Retrieves the content for a given HTTP request and parses it as objectified XML using the above method.
 
@@ -928,6 +2008,9 @@ class _XMLKit:
             burden isn't placed on web servers. If cached data was used, this value is ignored.
         max_size : Optional[int]
             The maximum size, in bytes, to accept.
+        staleTime : Optional[float]
+            The time (in seconds) after `cacheTime` has expired during which the expired cached data is returned
+            immediately, while it is refreshed in the background.
         follow_redirects : bool
             Specifies whether redirects should be followed, or if an exception should be raised. If False,
             the framework will raise a RedirectError when encountering a redirected response.
@@ -959,6 +2042,8 @@ class _XMLKit:
             timeout=timeout,
             sleep=sleep,
             opener=None,  # todo
+            max_size=max_size,
+            stale_time=staleTime,
         ).content, max_size=max_size)
 
 
@@ -985,8 +2070,9 @@ class _YAMLKit:
         return obj
 
     def ObjectFromURL(self, url, values=None, headers={}, cacheTime=None, encoding=None, errors=None,
-                      timeout=GLOBAL_DEFAULT_TIMEOUT, sleep=0, follow_redirects=True, method=None, max_size=None):
-        # type: (str, Optional[dict], dict, Optional[float], Optional[str], Optional[str], float, float, bool, Optional[str], Optional[int]) -> dict  # noqa: E501  # is it possible to have multiline type hints in python2?
+                      timeout=GLOBAL_DEFAULT_TIMEOUT, sleep=0, follow_redirects=True, method=None, max_size=None,
+                      staleTime=None):
+        # type: (str, Optional[dict], dict, Optional[float], Optional[str], Optional[str], float, float, bool, Optional[str], Optional[int], Optional[float]) -> dict  # noqa: E501  # is it possible to have multiline type hints in python2?
         """
         Retrieves the content for a given HTTP request and parses it as YAML-formatted content using the above method.
 
@@ -1019,6 +2105,9 @@ class _YAMLKit:
             the method automatically.
         max_size : Optional[int]
             The maximum size, in bytes, to accept.
+        staleTime : Optional[float]
+            The time (in seconds) after `cacheTime` has expired during which the expired cached data is returned
+            immediately, while it is refreshed in the background.
 
         Raises
         ------
@@ -1044,6 +2133,8 @@ class _YAMLKit:
             timeout=timeout,
             sleep=sleep,
             opener=None,  # todo
+            max_size=max_size,
+            stale_time=staleTime,
             follow_redirects=follow_redirects,
             method=method,
         ).content, max_size=max_size)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Compare the speed of the JSON backends available to ``parse_kit``.
+
+Usage::
+
+    python scripts/benchmark_json.py [path/to/file.json] [--number 100]
+
+By default, ``tests/data/dummy-data.json`` is decoded and encoded with every installed backend, and with demjson for
+reference.
+"""
+# future imports
+from __future__ import absolute_import, print_function
+
+# standard imports
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# local imports
+from plexhints import parse_kit  # noqa: E402
+
+default_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'tests', 'data', 'dummy-data.json')
+
+
+def benchmark(func, number):
+    # type: (callable, int) -> float
+    """
+    Get the best time of a function, in milliseconds per call.
+    """
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the speed of the JSON backends.')
+    parser.add_argument('file', nargs='?', default=default_file, help='the JSON file to decode and encode')
+    parser.add_argument('--number', type=int, default=100, help='the number of calls to time')
+    args = parser.parse_args()
+
+    with open(args.file, 'rb') as f:
+        json_bytes = f.read()
+    obj = parse_kit.simplejson.loads(json_bytes)
+
+    backends = list(parse_kit.json_backends.values())
+    backends.append(parse_kit._JSONBackend(name='demjson', loads=parse_kit.demjson.decode,
+                                           dumps=parse_kit.demjson.encode, errors=()))
+
+    print('%s (%d bytes), %d calls' % (args.file, len(json_bytes), args.number))
+    print('%-12s %12s %12s' % ('backend', 'decode (ms)', 'encode (ms)'))
+    for backend in backends:
+        number = max(1, args.number // 20) if backend.name == 'demjson' else args.number
+        decode = benchmark(lambda: backend.loads(json_bytes), number=number)
+        encode = benchmark(lambda: backend.dumps(obj), number=number)
+        print('%-12s %12.3f %12.3f' % (backend.name, decode, encode))
+
+
+if __name__ == '__main__':
+    main()
@@ -25,6 +25,7 @@ import requests
 
 # local imports
 import plexhints
+from plexhints.network_kit import HTTP
 
 # add Contents directory to the system path
 if os.path.isdir('Contents'):
@@ -41,6 +42,7 @@ SERVER_BASEURL = plexapi.CONFIG.get("auth.server_baseurl")
 # data directory setup
 DATA_DIRECTORY = os.path.join(os.path.dirname(__file__), 'data')
 TEMP_DIRECTORY = os.path.join(os.getcwd(), 'plexhints-tests-temp')
+CASSETTE_DIRECTORY = os.path.join(os.path.dirname(__file__), 'cassettes')
 
 
 def _wait_for_file(f):
@@ -190,6 +192,19 @@ def temp_dir():
         shutil.rmtree(TEMP_DIRECTORY)
 
 
+@pytest.fixture(scope='function')
+def cassette(request):
+    """
+    Replay the recorded network responses of the test, from ``tests/cassettes/<module>/<test>.json``.
+
+    Set the ``PLEXHINTS_CASSETTE_MODE`` environment variable to ``record`` to record them again, or to ``auto`` to only
+    record the missing ones.
+    """
+    path = os.path.join(CASSETTE_DIRECTORY, request.module.__name__.split('.')[-1], '{}.json'.format(request.node.name))
+    with HTTP.Cassette(path=path, mode=os.getenv('PLEXHINTS_CASSETTE_MODE', 'replay')) as cassette:
+        yield cassette
+
+
 class Handler(SimpleHTTPRequestHandler):
 
     def __init__(self, *args, **kwargs):
@@ -1,10 +1,16 @@
 # -*- coding: utf-8 -*-
 
+# standard imports
+import os
+
 # lib imports
 import pytest
+import requests
 
 # local imports
-from plexhints.agent_kit import _AgentKit, _Media, MediaObject
+import plexhints
+from plexhints.agent_kit import _AgentKit, _Media, MEDIA_TREE_TIMEOUT, MediaObject, MediaTree
+from plexhints.mock_pms import MockPlexServer
 
 
 @pytest.fixture(scope='function')
@@ -211,3 +217,78 @@ def test_tv_shows_agent(tv_shows_agent, media):
 
     assert tv_shows_agent.name == 'TV_Shows'
     assert tv_shows_agent.media_type == media.TV_Show
+
+
+@pytest.fixture(scope='function')
+def mock_pms():
+    with MockPlexServer(fixtures=os.path.join('tests', 'data', 'pms')) as server:
+        original_port = plexhints.PMS_PORT
+        plexhints.PMS_PORT = server.port
+        yield server
+        plexhints.PMS_PORT = original_port
+
+
+def test_tree_for_database_id(mock_pms):
+    tree = _Media.TreeForDatabaseID(dbid=1, level_names=['seasons', 'episodes'])
+    assert isinstance(tree, MediaTree)
+    assert tree.title == 'Test Show'
+    assert tree.items == []
+    assert len(tree.children) == 1
+
+    episode = tree.seasons['1'].episodes['2']
+    assert episode.title == 'Second'
+    assert episode.parent is tree.seasons['1']
+
+    part = tree.seasons['1'].episodes['1'].items[0].parts[0]
+    assert part.file.endswith('S01E01.mkv')
+    assert part.openSubtitleHash == '0123456789abcdef'
+    assert [stream.codec for stream in part.streams] == ['h264', 'aac']
+
+    # the children can be keyed by another attribute
+    tree = _Media.TreeForDatabaseID(dbid=1, level_names=['seasons'], level_attribute_keys=['id'],
+                                    host='127.0.0.1:%d' % mock_pms.port)
+    assert list(tree.seasons) == ['2']
+
+    # unknown ids are not found
+    assert _Media.TreeForDatabaseID(dbid=2) is None
+
+    mock_pms.add_route(path='/library/metadata/3/tree', body='<MediaContainer size="0"/>')
+    assert _Media.TreeForDatabaseID(dbid=3) is None
+
+
+def test_tree_for_database_id_timeout(monkeypatch, caplog):
+    timeouts = []
+
+    def fake_http_request(url, timeout):
+        timeouts.append(timeout)
+        raise requests.exceptions.ConnectTimeout(url)
+
+    monkeypatch.setattr('plexhints.agent_kit.http_request', fake_http_request)
+
+    with pytest.raises(requests.exceptions.ConnectTimeout):
+        _Media.TreeForDatabaseID(dbid=1, timeout=0.5)
+
+    # media objects use a short timeout, and do not raise
+    show = _Media.TV_Show(id='1')
+    assert show.tree is None
+    assert timeouts == [0.5, MEDIA_TREE_TIMEOUT]
+
+    # a server which is not running is not an error
+    assert 'Unable to get the media tree for database id 1' in caplog.text
+    assert 'Traceback' not in caplog.text
+
+    def refused(url, timeout):
+        raise requests.exceptions.ConnectionError(url)
+
+    monkeypatch.setattr('plexhints.agent_kit.http_request', refused)
+    caplog.clear()
+    assert _Media.TV_Show(id='1').tree is None
+    assert 'Traceback' not in caplog.text
+    assert 'Exception when constructing media object' not in caplog.text
+
+
+def test_media_object_tree(mock_pms):
+    show = _Media.TV_Show(id='1')
+    assert isinstance(show.tree, MediaTree)
+    assert show.seasons['1'].episodes['1'].title == 'Pilot'
+    assert show.children[0].id == '2'
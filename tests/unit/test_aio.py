@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# standard imports
+import sys
+
+# lib imports
+import pytest
+
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 6), reason="requires python 3.6 or newer")
+
+aio = pytest.importorskip('plexhints.aio')
+
+
+def _run(func, count=1):
+    # py2 compatible syntax, instead of an `async def` coroutine
+    import asyncio
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(asyncio.gather(*[func() for _ in range(count)]))
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+def test_json_object_from_url(http_server):
+    url = http_server.format('dummy-data.json')
+
+    json_objects = _run(lambda: aio.JSON.ObjectFromURL(url, cacheTime=1000), count=10)
+    assert len(json_objects) == 10
+    for json_object in json_objects:
+        assert json_object[0]['name'] == 'Adeel Solangi'
+
+
+def test_request(http_server):
+    url = http_server.format('dummy-data.txt')
+
+    request = _run(lambda: aio.HTTP.Request(url))[0]
+    assert request.loaded
+    assert request.content
+
+
+def test_max_size(http_server):
+    url = http_server.format('dummy-data.json')
+
+    with pytest.raises(Exception):
+        _run(lambda: aio.JSON.ObjectFromURL(url, max_size=1))
+
+
+def test_set_max_workers(http_server):
+    url = http_server.format('dummy-data.yml')
+
+    aio.set_max_workers(2)
+    try:
+        assert aio.get_executor()._max_workers == 2
+        assert len(_run(lambda: aio.YAML.ObjectFromURL(url), count=4)) == 4
+    finally:
+        aio.set_max_workers(aio.DEFAULT_AIO_WORKERS)
+
+
+def test_unknown_method():
+    with pytest.raises(AttributeError):
+        aio.JSON.ObjectFromString('{}')
+    assert dir(aio.XML) == ['ElementFromURL', 'ObjectFromURL']
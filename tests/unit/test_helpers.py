@@ -1,12 +1,28 @@
 # -*- coding: utf-8 -*-
+# standard imports
+import datetime
+import os
+import sys
+from threading import Event, Lock, Thread
+import time
 
 # lib imports
 import pytest
+import requests
 
 # local imports
 from plexhints import _helpers
 
 
+def _response(url, content):
+    response = requests.Response()
+    response._content = content
+    response.status_code = 200
+    response.url = url
+    response.request = requests.Request(method='GET', url=url).prepare()
+    return response
+
+
 def test_check_port_elevated(elevated_policy):
     # ensure no exception is raised
     _helpers.check_port(url='http://localhost:32400/')
@@ -17,7 +33,7 @@ def test_check_port_not_elevated(non_elevated_policy):
         _helpers.check_port(url='http://localhost:32400/')
 
 
-def test_http_request():
+def test_http_request(cassette):
     # test with method = None
     test_response = _helpers.http_request(
         url='https://github.com/LizardByte/plexhints',
@@ -40,3 +56,1010 @@ def test_http_request():
         cache_time=10,
         method='GET',
     )
+
+
+def test_get_session():
+    url = 'https://github.com/LizardByte/plexhints'
+
+    # the same host and cache time should reuse the same session
+    test_session = _helpers.get_session(url=url, cache_time=10)
+    assert test_session is _helpers.get_session(url='https://github.com/LizardByte', cache_time=10)
+    assert test_session.cache is _helpers.session.cache
+
+    # a different cache time or host should use a different session
+    assert test_session is not _helpers.get_session(url=url, cache_time=20)
+    assert test_session is not _helpers.get_session(url='https://www.plex.tv', cache_time=10)
+
+    # no cache time should use a session with the cache disabled
+    assert _helpers.get_session(url=url, cache_time=None)._is_cache_disabled
+    assert _helpers.get_session(url=url, cache_time=0) is _helpers.get_session(url=url, cache_time=None)
+
+
+def test_get_session_cookies():
+    url = 'http://cookies.example.com/login'
+    uncached = _helpers.get_session(url=url)
+    cached = _helpers.get_session(url=url, cache_time=60)
+    assert uncached.cookies is cached.cookies is _helpers.session.cookies
+
+    uncached.cookies.set('token', 'abc', domain='cookies.example.com')
+    try:
+        request = cached.prepare_request(_helpers.requests.Request('GET', url))
+        assert request.headers['Cookie'] == 'token=abc'
+    finally:
+        _helpers.session.cookies.clear()
+
+
+def test_get_session_pool_size(monkeypatch):
+    monkeypatch.setattr(_helpers, 'MAX_POOLED_SESSIONS', 3)
+    first = _helpers.get_session(url='http://pool.example.com', cache_time=1)
+    for cache_time in range(2, 5):
+        _helpers.get_session(url='http://pool.example.com', cache_time=cache_time)
+        assert len(_helpers._session_pool) <= 3
+
+    # the least recently used session was dropped
+    assert _helpers.get_session(url='http://pool.example.com', cache_time=1) is not first
+    assert _helpers.get_session(url='http://pool.example.com', cache_time=4) is \
+        _helpers.get_session(url='http://pool.example.com', cache_time=4)
+
+
+def test_http_request_threads(http_server):
+    url = http_server.format('dummy-data.txt')
+    responses = []
+
+    def request(cache_time):
+        responses.append(_helpers.http_request(url=url, cache_time=cache_time))
+
+    threads = [Thread(target=request, kwargs=dict(cache_time=cache_time)) for cache_time in [None, 10, 20, None, 10]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(responses) == len(threads)
+    for response in responses:
+        assert response.status_code == 200
+
+    # each session keeps its own cache time
+    assert _helpers.get_session(url=url, cache_time=10)._cache_expire_after.total_seconds() == 10
+    assert _helpers.get_session(url=url, cache_time=20)._cache_expire_after.total_seconds() == 20
+
+
+def test_memory_cache():
+    cache = _helpers.MemoryCache(max_size=10)
+    assert cache.name == 'memory'
+
+    cache.save_response('a', _response(url='http://localhost/a', content=b'1234'))
+    cache.save_response('b', _response(url='http://localhost/b', content=b'1234'))
+    assert cache.current_size == 8
+
+    # using a response makes it the most recently used
+    response, _ = cache.get_response_and_time('a')
+    assert response.content == b'1234'
+
+    # the least recently used response is evicted once the budget is exceeded
+    cache.save_response('c', _response(url='http://localhost/c', content=b'1234'))
+    assert cache.has_key('a')
+    assert not cache.has_key('b')
+    assert cache.has_key('c')
+    assert cache.current_size == 8
+
+    # shrinking the budget evicts responses
+    cache.resize(max_size=4)
+    assert not cache.has_key('a')
+    assert cache.current_size == 4
+
+    cache.clear()
+    assert cache.current_size == 0
+
+
+def test_sqlite_cache(temp_dir):
+    location = os.path.join(temp_dir, 'test_sqlite_cache')
+    if not os.path.isdir(temp_dir):
+        os.makedirs(temp_dir)
+
+    cache = _helpers.SQLiteCache(location=location, max_size=10)
+    assert cache.name == 'sqlite'
+    cache.save_response('a', _response(url='http://localhost/a', content=b'1234'))
+    assert os.path.isfile('%s.sqlite' % location)
+
+    # a new instance should load the persisted responses and their sizes
+    cache = _helpers.SQLiteCache(location=location, max_size=10)
+    response, _ = cache.get_response_and_time('a')
+    assert response.content == b'1234'
+    assert cache.current_size == 4
+
+    cache.save_response('b', _response(url='http://localhost/b', content=b'12345678'))
+    assert not cache.has_key('a')
+    assert cache.has_key('b')
+
+    cache.clear()
+
+
+def test_set_cache_backend(temp_dir):
+    url = 'https://github.com/LizardByte/plexhints'
+    if not os.path.isdir(temp_dir):
+        os.makedirs(temp_dir)
+
+    pooled_session = _helpers.get_session(url=url, cache_time=10)
+
+    try:
+        cache = _helpers.set_cache_backend(backend='sqlite', location=os.path.join(temp_dir, 'test_set_cache_backend'))
+        assert isinstance(cache, _helpers.SQLiteCache)
+        assert _helpers.session.cache is cache
+        assert pooled_session.cache is cache
+        assert cache.max_size == _helpers.DEFAULT_CACHE_MAX_SIZE
+
+        with pytest.raises(ValueError):
+            _helpers.set_cache_backend(backend='invalid')
+    finally:
+        cache = _helpers.set_cache_backend(backend='memory')
+
+    assert isinstance(cache, _helpers.MemoryCache)
+    assert pooled_session.cache is cache
+
+
+def test_http_request_object(http_server):
+    url = http_server.format('dummy-data.txt')
+
+    # the request is not made until the data is accessed
+    request = _helpers.HTTPRequest(url=url)
+    assert not request.loaded
+    assert request.url == url
+    assert request.content
+    assert request.loaded
+    assert request.status_code == 200
+    assert request.headers['Content-Length'] == str(len(request))
+    assert str(request) == request.text
+
+    # immediate requests are made when the object is created
+    request = _helpers.HTTPRequest(url=url, immediate=True)
+    assert request.loaded
+
+    # prefetch makes the request in a background thread
+    request = _helpers.HTTPRequest(url=url)
+    request.prefetch()
+    thread = request._prefetch_thread
+    request.prefetch()  # already prefetching, no second thread is started
+    assert request._prefetch_thread is thread
+    thread.join()
+    assert request.loaded
+
+    with pytest.raises(AttributeError):
+        getattr(request, '_missing')
+
+
+def test_map_urls():
+    urls = ['http://localhost/%d' % i for i in range(20)] + ['http://127.0.0.1/%d' % i for i in range(5)]
+    running = dict()
+    max_running = dict()
+    lock = Lock()
+
+    def func(url):
+        host = url.split('/')[2]
+        with lock:
+            running[host] = running.get(host, 0) + 1
+            max_running[host] = max(max_running.get(host, 0), running[host])
+        time.sleep(0.01)
+        with lock:
+            running[host] -= 1
+        return url
+
+    # results are returned in the same order as the urls
+    assert _helpers.map_urls(func=func, urls=urls, max_workers=8, per_host_limit=3) == urls
+    assert max_running['localhost'] <= 3
+    assert max_running['127.0.0.1'] <= 3
+
+    assert _helpers.map_urls(func=func, urls=[]) == []
+
+    def fail(url):
+        if url.endswith('/3'):
+            raise ValueError(url)
+        return url
+
+    with pytest.raises(ValueError):
+        _helpers.map_urls(func=fail, urls=urls)
+
+
+def test_http_request_sleep(http_server):
+    url = http_server.format('dummy-data.json')
+    _helpers.session.cache.clear()
+
+    # the first request is made over the network, so the thread is paused after it
+    start = time.time()
+    response = _helpers.http_request(url=url, cache_time=100, sleep=0.5)
+    assert not response.from_cache
+    assert time.time() - start >= 0.5
+
+    # the second request is served from the cache, so there is no pause
+    start = time.time()
+    response = _helpers.http_request(url=url, cache_time=100, sleep=0.5)
+    assert response.from_cache
+    assert time.time() - start < 0.5
+
+
+def test_rate_limiter():
+    limiter = _helpers.RateLimiter(requests_per_second=20, burst=2)
+
+    # the burst is allowed without waiting
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == 0
+
+    start = time.time()
+    assert limiter.acquire() > 0
+    assert limiter.acquire() > 0
+    assert time.time() - start >= 0.09
+
+    stats = limiter.stats()
+    assert stats['requests'] == 4
+    assert stats['waits'] == 2
+    assert stats['wait_time'] >= 0.09
+
+
+@pytest.mark.parametrize('requests_per_second', [0, -1, float('nan')])
+def test_rate_limiter_invalid_rate(requests_per_second):
+    with pytest.raises(ValueError):
+        _helpers.RateLimiter(requests_per_second=requests_per_second)
+
+    with pytest.raises(ValueError):
+        _helpers.set_rate_limit(host='localhost', requests_per_second=requests_per_second)
+    assert 'localhost' not in _helpers.rate_limiters
+
+
+def test_set_rate_limit(http_server):
+    url = http_server.format('dummy-data.txt')
+    host = url.split('/')[2]
+    _helpers.session.cache.clear()
+
+    _helpers.set_rate_limit(host=host, requests_per_second=10, burst=1)
+    try:
+        assert _helpers.get_rate_limiter(url=url) is _helpers.rate_limiters[host]
+        assert _helpers.get_rate_limiter(url='http://127.0.0.2/') is None
+
+        for _ in range(3):
+            _helpers.http_request(url=url)
+
+        # cached responses are not limited
+        _helpers.http_request(url=url, cache_time=100)
+        _helpers.http_request(url=url, cache_time=100)
+
+        stats = _helpers.rate_limiters[host].stats()
+        assert stats['requests'] == 4
+        assert stats['waits'] >= 2
+    finally:
+        _helpers.set_rate_limit(host=host, requests_per_second=None)
+
+    assert _helpers.get_rate_limiter(url=url) is None
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='the test server does not support conditional requests')
+def test_http_request_revalidation(http_server):
+    url = http_server.format('dummy-data.json')
+    _helpers.session.cache.clear()
+
+    response = _helpers.http_request(url=url, cache_time=0.1)
+    assert not response.from_cache
+    assert response.headers['Last-Modified']
+    content = response.content
+
+    # once expired, the cached response is revalidated with the server and its age is reset
+    time.sleep(0.2)
+    response = _helpers.http_request(url=url, cache_time=0.1)
+    assert response.from_cache
+    assert response.revalidated
+    assert response.content == content
+
+    response = _helpers.http_request(url=url, cache_time=0.1)
+    assert response.from_cache
+    assert not getattr(response, 'revalidated', False)
+
+
+def test_http_session_conditional_headers():
+    response = requests.Response()
+    assert _helpers.HTTPSession._conditional_headers(response) == {}
+
+    response.headers['ETag'] = '"abc"'
+    response.headers['Last-Modified'] = 'Wed, 21 Oct 2015 07:28:00 GMT'
+    assert _helpers.HTTPSession._conditional_headers(response) == {
+        'If-None-Match': '"abc"',
+        'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT',
+    }
+
+
+def test_iter_content(http_server):
+    url = http_server.format('dummy-data.json')
+    size = len(_helpers.http_request(url=url).content)
+
+    response = _helpers.http_request(url=url, stream=True)
+    assert len(b''.join(_helpers.iter_content(response=response, max_size=size, chunk_size=64))) == size
+
+    # the content length is checked before reading the body
+    response = _helpers.http_request(url=url, stream=True)
+    with pytest.raises(Exception):
+        next(_helpers.iter_content(response=response, max_size=size - 1))
+
+    # the size is checked while reading the body
+    response = _helpers.http_request(url=url, stream=True)
+    del response.headers['Content-Length']
+    chunks = _helpers.iter_content(response=response, max_size=100, chunk_size=64)
+    assert len(next(chunks)) == 64
+    with pytest.raises(Exception):
+        next(chunks)
+
+
+def test_response_reader(http_server):
+    url = http_server.format('dummy-data.json')
+    content = _helpers.http_request(url=url).content
+
+    reader = _helpers.ResponseReader(response=_helpers.http_request(url=url, stream=True), chunk_size=64)
+    assert reader.read(10) == content[:10]
+    assert reader.read(100) == content[10:110]
+    assert reader.read() == content[110:]
+    assert reader.read(10) == b''
+
+
+def test_response_reader_cache(http_server):
+    url = http_server.format('dummy-data.json?reader')
+    _helpers.session.cache.clear()
+
+    response = _helpers.http_request(url=url, cache_time=100, stream=True)
+    reader = _helpers.ResponseReader(response=response, chunk_size=64)
+    assert not _helpers.session.cache.has_url(url)
+
+    # the response is cached once the body has been read
+    content = reader.read()
+    assert _helpers.session.cache.has_url(url)
+    assert _helpers.http_request(url=url, cache_time=100).content == content
+
+
+def test_http_request_max_size(http_server):
+    url = http_server.format('dummy-data.json')
+    _helpers.session.cache.clear()
+    size = len(_helpers.http_request(url=url).content)
+
+    with pytest.raises(Exception):
+        _helpers.http_request(url=url, cache_time=100, max_size=size - 1)
+    assert not _helpers.session.cache.has_url(url)
+
+    # the response is cached once the body has been read
+    response = _helpers.http_request(url=url, cache_time=100, max_size=size)
+    assert len(response.content) == size
+    assert _helpers.session.cache.has_url(url)
+
+    response = _helpers.http_request(url=url, cache_time=100, max_size=size)
+    assert response.from_cache
+    assert len(response.content) == size
+
+
+def test_prefetch_queue():
+    queue = _helpers.PrefetchQueue(workers=2, max_size=2)
+    calls = []
+    event = Event()
+
+    def func(value):
+        event.wait(5)
+        calls.append(value)
+
+    assert queue.put('a', func=func, value='a')
+    assert not queue.put('a', func=func, value='a')  # duplicate
+    assert queue.put('b', func=func, value='b')
+
+    # the workers are blocked, so the queue fills up
+    time.sleep(0.1)
+    assert queue.put('c', func=func, value='c')
+    assert queue.put('d', func=func, value='d')
+    assert not queue.put('e', func=func, value='e')
+
+    assert not queue.join(timeout=0.1)
+    event.set()
+    assert queue.join(timeout=5)
+    assert sorted(calls) == ['a', 'b', 'c', 'd']
+
+    # a finished request can be queued again
+    assert queue.put('a', func=func, value='a')
+    assert queue.join(timeout=5)
+
+
+def test_percentile():
+    assert _helpers.percentile([], 50) is None
+    assert _helpers.percentile([3, 1, 2], 50) == 2
+    values = list(range(1, 101))
+    assert _helpers.percentile(values, 90) == 90
+    assert _helpers.percentile(values, 99) == 99
+    assert _helpers.percentile(values, 100) == 100
+
+
+def test_request_stats(http_server):
+    url = http_server.format('dummy-data.yml')
+    _helpers.session.cache.clear()
+    _helpers.request_stats.reset()
+    records = []
+    _helpers.request_stats.add_callback(records.append)
+    try:
+        _helpers.http_request(url=url, cache_time=1000)
+        _helpers.http_request(url=url, cache_time=1000)
+        _helpers.http_request(url=http_server.format('missing'), cache_time=1000)
+    finally:
+        _helpers.request_stats.remove_callback(records.append)
+
+    assert len(records) == 3
+    assert not records[0]['from_cache']
+    assert records[1]['from_cache']
+    assert records[0]['size'] == records[1]['size'] > 0
+    assert records[2]['status_code'] == 404
+
+    summary = _helpers.request_stats.summary()
+    host = summary[url.split('/')[2]]
+    assert host['requests'] == 3
+    assert host['cache_hits'] == 1
+    assert host['cache_misses'] == 2
+    assert host['errors'] == 0
+    assert host['status_codes'] == {200: 2, 404: 1}
+    assert host['bytes'] >= records[0]['size'] * 2
+    assert host['total_time']['max'] >= host['total_time']['p50']
+
+    _helpers.request_stats.reset()
+    assert _helpers.request_stats.summary() == dict()
+
+
+def test_request_stats_errors():
+    stats = _helpers.RequestStats(max_samples=2)
+
+    def callback(entry):
+        raise ValueError(entry)
+
+    stats.add_callback(callback)
+    for total_time in (1, 2, 3):
+        stats.record(url='http://example.com/', method='GET', response=None, total_time=total_time)
+
+    host = stats.summary()['example.com']
+    assert host['requests'] == 3
+    assert host['errors'] == 3
+    assert host['cache_misses'] == 0
+    assert host['total_time']['p50'] == 2  # only the last 2 samples are kept
+    assert host['elapsed']['max'] is None
+
+
+def test_configure_adapters(http_server):
+    pooled_session = _helpers.get_session(url=http_server.format(''), cache_time=1000)
+    try:
+        settings = _helpers.configure_adapters(pool_size=20, retries=2, retry_backoff=1, keep_alive=False)
+        assert settings == dict(pool_size=20, retries=2, retry_backoff=1, keep_alive=False)
+
+        for s in (_helpers.session, pooled_session):
+            adapter = s.get_adapter(http_server.format(''))
+            assert isinstance(adapter, _helpers.RateLimitedAdapter)
+            assert adapter._pool_maxsize == 20
+            assert adapter.max_retries.total == 2
+            assert adapter.max_retries.backoff_factor == 1
+            assert s.headers['Connection'] == 'close'
+
+        # unchanged settings are kept
+        assert _helpers.configure_adapters(keep_alive=True)['pool_size'] == 20
+        assert 'Connection' not in pooled_session.headers
+
+        response = _helpers.http_request(url=http_server.format('dummy-data.txt'))
+        assert response.status_code == 200
+    finally:
+        _helpers.configure_adapters(pool_size=_helpers.DEFAULT_POOL_SIZE, retries=_helpers.DEFAULT_RETRIES,
+                                    retry_backoff=_helpers.DEFAULT_RETRY_BACKOFF, keep_alive=True)
+
+    adapter = _helpers.session.get_adapter(http_server.format(''))
+    assert adapter._pool_maxsize == _helpers.DEFAULT_POOL_SIZE
+    assert adapter.max_retries.total == 0
+    assert adapter.max_retries.read is False
+
+
+def test_single_flight():
+    flight = _helpers.SingleFlight()
+    event = Event()
+    calls = []
+    results = []
+
+    def func():
+        calls.append(1)
+        event.wait(5)
+        return 'result'
+
+    def worker():
+        results.append(flight.do(key='key', func=func))
+
+    threads = [Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+
+    time.sleep(0.2)
+    assert len(flight) == 1
+    event.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results) == [('result', False)] + [('result', True)] * 4
+    assert len(flight) == 0
+
+    # the next call runs the function again
+    assert flight.do(key='key', func=func) == ('result', False)
+    assert len(calls) == 2
+
+
+def test_single_flight_error():
+    flight = _helpers.SingleFlight()
+    event = Event()
+    errors = []
+
+    def func():
+        event.wait(5)
+        raise ValueError('failed')
+
+    def worker():
+        try:
+            flight.do(key='key', func=func)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    event.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(errors) == 3
+    assert len(flight) == 0
+
+
+def test_http_request_coalescing(http_server, monkeypatch):
+    url = http_server.format('dummy-data.json')
+    _helpers.session.cache.clear()
+    _helpers.request_stats.reset()
+    sent = []
+    send = _helpers.RateLimitedAdapter.send
+
+    def slow_send(self, request, **kwargs):
+        sent.append(request.url)
+        time.sleep(0.3)
+        return send(self, request, **kwargs)
+
+    monkeypatch.setattr(_helpers.RateLimitedAdapter, 'send', slow_send)
+
+    responses = []
+    lock = Lock()
+
+    def worker():
+        response = _helpers.http_request(url=url, cache_time=1000)
+        with lock:
+            responses.append(response)
+
+    threads = [Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert len(sent) == 1
+    assert len(responses) == 4
+    assert len(set(response.content for response in responses)) == 1
+    assert sorted(getattr(response, 'coalesced', False) for response in responses) == [False, True, True, True]
+
+    host = _helpers.request_stats.summary()[url.split('/')[2]]
+    assert host['requests'] == 4
+    assert host['coalesced'] == 3
+    assert host['cache_misses'] == 1
+
+    # different headers are not coalesced
+    assert _helpers._flight_key('GET', url, None, {'Accept': 'a'}, None) != \
+        _helpers._flight_key('GET', url, None, {'Accept': 'b'}, None)
+    assert _helpers._flight_key('POST', url, {'b': 1, 'a': 2}, None, None) == \
+        _helpers._flight_key('POST', url, {'a': 2, 'b': 1}, None, None)
+
+
+def test_http_request_coalescing_options(http_server, monkeypatch):
+    # directories without a trailing slash are redirected by the test server
+    url = http_server.format('pms')
+    _helpers.session.cache.clear()
+    sent = []
+    send = _helpers.RateLimitedAdapter.send
+
+    def slow_send(self, request, **kwargs):
+        sent.append(request.url)
+        time.sleep(0.3)
+        return send(self, request, **kwargs)
+
+    monkeypatch.setattr(_helpers.RateLimitedAdapter, 'send', slow_send)
+
+    responses = dict()
+
+    def worker(name, **kwargs):
+        responses[name] = _helpers.http_request(url=url, **kwargs)
+
+    threads = [
+        Thread(target=worker, args=('followed',)),
+        Thread(target=worker, args=('not_followed',), kwargs=dict(follow_redirects=False)),
+        Thread(target=worker, args=('cached',), kwargs=dict(cache_time=3600)),
+        Thread(target=worker, args=('timeout',), kwargs=dict(timeout=5)),
+    ]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)  # start while the first request is in flight
+    for thread in threads:
+        thread.join(10)
+
+    assert responses['followed'].status_code == 200
+    assert responses['not_followed'].status_code == 301
+    assert responses['cached'].status_code == 200
+    assert responses['timeout'].status_code == 200
+    assert not any(getattr(response, 'coalesced', False) for response in responses.values())
+    assert sent.count(url) == 4
+
+    assert _helpers._flight_key('GET', url, None, None, None, cache_time=0) == \
+        _helpers._flight_key('GET', url, None, None, None, cache_time=None, stale_time=60)
+    assert _helpers._flight_key('GET', url, None, None, None, cache_time=10) != \
+        _helpers._flight_key('GET', url, None, None, None, cache_time=10, stale_time=60)
+
+
+def test_http_request_coalescing_methods(http_server, monkeypatch):
+    url = http_server.format('dummy-data.json')
+    sent = []
+    send = _helpers.RateLimitedAdapter.send
+
+    def slow_send(self, request, **kwargs):
+        sent.append(request.method)
+        time.sleep(0.3)
+        return send(self, request, **kwargs)
+
+    monkeypatch.setattr(_helpers.RateLimitedAdapter, 'send', slow_send)
+
+    responses = []
+
+    def worker(**kwargs):
+        responses.append(_helpers.http_request(url=url, **kwargs))
+
+    # requests which may change state on the server are never coalesced
+    threads = [Thread(target=worker, kwargs=kwargs) for kwargs in (
+        dict(method='POST'), dict(method='POST'),
+        dict(method='DELETE'), dict(method='DELETE'),
+        dict(values={'a': 1}), dict(values={'a': 1}),
+    )]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert sorted(sent) == ['DELETE', 'DELETE', 'GET', 'GET', 'POST', 'POST']
+    assert not any(getattr(response, 'coalesced', False) for response in responses)
+
+
+def test_http_request_stale(http_server, monkeypatch):
+    url = http_server.format('dummy-data.yml')
+    _helpers.session.cache.clear()
+    sent = []
+    send = _helpers.RateLimitedAdapter.send
+
+    def counting_send(self, request, **kwargs):
+        sent.append(request.url)
+        return send(self, request, **kwargs)
+
+    monkeypatch.setattr(_helpers.RateLimitedAdapter, 'send', counting_send)
+
+    response = _helpers.http_request(url=url, cache_time=1, stale_time=60)
+    assert not response.from_cache
+    assert len(sent) == 1
+
+    time.sleep(1.1)
+
+    # the expired response is returned immediately, and refreshed in the background
+    response = _helpers.http_request(url=url, cache_time=1, stale_time=60)
+    assert response.from_cache
+    assert response.stale
+    assert _helpers.precache_queue.join(timeout=10)
+    assert len(sent) == 2
+
+    response = _helpers.http_request(url=url, cache_time=1, stale_time=60)
+    assert response.from_cache
+    assert not getattr(response, 'stale', False)
+    assert len(sent) == 2
+
+    # without a stale time, the expired response is not used
+    time.sleep(1.1)
+    response = _helpers.http_request(url=url, cache_time=1)
+    assert not getattr(response, 'stale', False)
+    assert len(sent) == 3
+
+
+def test_get_session_stale_time():
+    url = 'http://example.com'
+    stale_session = _helpers.get_session(url=url, cache_time=10, stale_time=5)
+    assert stale_session._stale_time.total_seconds() == 5
+    assert stale_session is not _helpers.get_session(url=url, cache_time=10)
+    assert _helpers.get_session(url=url, cache_time=10)._stale_time is None
+
+    # a stale time has no effect without a cache time
+    assert _helpers.get_session(url=url, stale_time=5) is _helpers.get_session(url=url)
+
+
+def test_set_negative_cache_time():
+    try:
+        _helpers.set_negative_cache_time(status=404, cache_time=60)
+        _helpers.set_negative_cache_time(status='4XX', cache_time=10)
+        assert _helpers.get_negative_cache_time(status_code=404) == 60
+        assert _helpers.get_negative_cache_time(status_code=410) == 10
+        assert _helpers.get_negative_cache_time(status_code=500) is None
+
+        _helpers.set_negative_cache_time(status='404', cache_time=None)
+        assert _helpers.get_negative_cache_time(status_code=404) == 10
+
+        for status in ('4x', '6xx', 'abc', 'xx4'):
+            with pytest.raises(ValueError):
+                _helpers.set_negative_cache_time(status=status, cache_time=60)
+    finally:
+        _helpers.negative_cache_times.clear()
+
+
+def test_http_request_negative_cache(http_server):
+    url = http_server.format('missing-file')
+    _helpers.session.cache.clear()
+
+    # error responses are not cached by default
+    assert _helpers.http_request(url=url, cache_time=1000).status_code == 404
+    assert not _helpers.http_request(url=url, cache_time=1000).from_cache
+
+    try:
+        _helpers.set_negative_cache_time(status=404, cache_time=1)
+        assert not _helpers.http_request(url=url, cache_time=1000).from_cache
+        response = _helpers.http_request(url=url, cache_time=1000)
+        assert response.status_code == 404
+        assert response.from_cache
+
+        # requests without a cache time are not affected
+        assert not _helpers.http_request(url=url).from_cache
+
+        time.sleep(1.1)
+        assert not _helpers.http_request(url=url, cache_time=1000).from_cache
+
+        # the shorter of the cache times applies, and error responses are never served stale
+        assert _helpers.http_request(url=url, cache_time=0.5, stale_time=60).from_cache
+        time.sleep(0.6)
+        response = _helpers.http_request(url=url, cache_time=0.5, stale_time=60)
+        assert not response.from_cache
+        assert not getattr(response, 'stale', False)
+    finally:
+        _helpers.negative_cache_times.clear()
+
+    # cached error responses are discarded once negative caching is disabled
+    assert not _helpers.http_request(url=url, cache_time=1000).from_cache
+
+
+def _prepare(url, method='GET', headers=None, data=None):
+    return requests.Request(method=method, url=url, headers=headers, data=data).prepare()
+
+
+def test_create_cache_key():
+    key = _helpers.create_cache_key(_prepare('http://Example.com/path?b=2&a=1#fragment'))
+    assert key == _helpers.create_cache_key(_prepare('http://example.com/path?a=1&b=2'))
+    assert key != _helpers.create_cache_key(_prepare('http://example.com/path?a=1&b=3'))
+    assert key != _helpers.create_cache_key(_prepare('http://example.com/Path?a=1&b=2'))
+    assert key != _helpers.create_cache_key(_prepare('http://example.com/path?a=1&b=2', method='POST'))
+
+    # headers are ignored by default
+    assert key == _helpers.create_cache_key(_prepare('http://example.com/path?a=1&b=2', headers={'Accept': 'a'}))
+
+    # form encoded bodies are normalized like the query
+    assert _helpers.create_cache_key(_prepare('http://example.com', method='POST', data={'a': 1, 'b': 2})) == \
+        _helpers.create_cache_key(_prepare('http://example.com', method='POST', data=[('b', 2), ('a', 1)]))
+
+    try:
+        _helpers.set_cache_key_rules(ignored_params=['ts'], vary_headers=['Accept'])
+        assert key == _helpers.create_cache_key(_prepare('http://example.com/path?ts=123&a=1&b=2'))
+
+        json_key = _helpers.create_cache_key(_prepare('http://example.com/path?a=1&b=2',
+                                                      headers={'accept': 'application/json'}))
+        assert json_key != key
+        assert json_key == _helpers.create_cache_key(_prepare('http://example.com/path?a=1&b=2',
+                                                              headers={'Accept': 'application/json',
+                                                                       'User-Agent': 'random'}))
+        assert json_key != _helpers.create_cache_key(_prepare('http://example.com/path?a=1&b=2',
+                                                              headers={'Accept': 'text/xml'}))
+    finally:
+        _helpers.set_cache_key_rules(ignored_params=[], vary_headers=[])
+
+
+def test_http_request_normalized_cache_key(http_server):
+    _helpers.session.cache.clear()
+    url = http_server.format('dummy-data.txt')
+
+    try:
+        _helpers.set_cache_key_rules(ignored_params=['nonce'])
+        assert not _helpers.http_request(url=url + '?b=2&a=1&nonce=1', cache_time=1000).from_cache
+        assert _helpers.http_request(url=url + '?a=1&b=2&nonce=2', cache_time=1000,
+                                     headers={'User-Agent': 'random'}).from_cache
+        assert _helpers.session.cache.has_url(url + '?a=1&b=2')
+    finally:
+        _helpers.set_cache_key_rules(ignored_params=[], vary_headers=[])
+
+
+def test_cache_prune():
+    cache = _helpers.MemoryCache(max_size=None)
+    cache.save_response('a', _response(url='http://localhost/a', content=b'1234'))
+    cache.save_response('b', _response(url='http://localhost/b', content=b'12'))
+    cache.save_response('c', _response(url='http://localhost/c', content=b'1'))
+    assert cache.info() == dict(backend='memory', entries=3, bytes=7, max_size=None)
+
+    # make `a` old and recently used
+    response, _ = cache.responses['a']
+    cache.responses['a'] = response, datetime.datetime.utcnow() - datetime.timedelta(seconds=100)
+    cache.get_response_and_time('a')
+
+    assert cache.prune(older_than=50) == 1
+    assert not cache.has_key('a')
+    assert cache.info()['bytes'] == 3
+
+    # the least recently used responses are removed first
+    assert cache.prune(max_bytes=2) == 1
+    assert not cache.has_key('b')
+    assert cache.has_key('c')
+    assert cache.prune() == 0
+
+
+def test_cache_invalidate():
+    cache = _helpers.MemoryCache()
+    cache.save_response('a', _response(url='http://localhost/api/a', content=b'1'))
+    cache.save_response('b', _response(url='http://localhost/api/b', content=b'1'))
+    cache.save_response('c', _response(url='http://localhost/other', content=b'1'))
+
+    assert cache.invalidate(prefix='http://localhost/api/') == 2
+    assert cache.info()['entries'] == 1
+    assert cache.has_key('c')
+    assert cache.invalidate(prefix='http://example.com/') == 0
+
+
+def test_cache_compression(temp_dir):
+    content = b'{"name": "plexhints"}' * 1000
+
+    cache = _helpers.MemoryCache()
+    cache.save_response('large', _response(url='http://localhost/large', content=content))
+    cache.save_response('small', _response(url='http://localhost/small', content=b'1234'))
+
+    stored, _ = cache.responses['large']
+    assert stored.compression == 'zlib'
+    assert len(stored._content) < len(content)
+    assert cache.current_size == len(stored._content) + 4
+    assert getattr(cache.responses['small'][0], 'compression', None) is None
+
+    for _ in range(2):
+        response, _ = cache.get_response_and_time('large')
+        assert response.content == content
+    assert cache.responses['large'][0].compression == 'zlib'
+
+    # compression can be disabled
+    cache = _helpers.MemoryCache(compress_level=0)
+    cache.save_response('large', _response(url='http://localhost/large', content=content))
+    assert cache.current_size == len(content)
+
+    # compressed responses are persisted
+    if not os.path.isdir(temp_dir):
+        os.makedirs(temp_dir)
+    location = os.path.join(temp_dir, 'test_cache_compression')
+    cache = _helpers.SQLiteCache(location=location, compress_level=9)
+    cache.save_response('large', _response(url='http://localhost/large', content=content))
+    cache = _helpers.SQLiteCache(location=location)
+    assert cache.current_size < len(content)
+    assert cache.get_response_and_time('large')[0].content == content
+    cache.clear()
+
+
+def test_http_request_accept_encoding(http_server):
+    response = _helpers.http_request(url=http_server.format('dummy-data.txt'))
+    assert response.request.headers['Accept-Encoding'] == _helpers.ACCEPT_ENCODING
+    assert 'gzip' in _helpers.ACCEPT_ENCODING
+
+    response = _helpers.http_request(url=http_server.format('dummy-data.txt'), headers={'Accept-Encoding': 'identity'})
+    assert response.request.headers['Accept-Encoding'] == 'identity'
+
+
+def test_cassette(http_server, temp_dir, monkeypatch):
+    if not os.path.isdir(temp_dir):
+        os.makedirs(temp_dir)
+    path = os.path.join(temp_dir, 'cassettes', 'test_cassette.json')
+    if os.path.isfile(path):
+        os.remove(path)
+    text_url = http_server.format('dummy-data.txt')
+    image_url = http_server.format('cute_cat.jpg')
+
+    with pytest.raises(ValueError):
+        _helpers.Cassette(path=path, mode='invalid')
+
+    with _helpers.Cassette(path=path, mode='record') as cassette:
+        assert _helpers.active_cassette is cassette
+        text = _helpers.http_request(url=text_url).content
+        image = _helpers.http_request(url=image_url).content
+    assert _helpers.active_cassette is None
+    assert cassette.recordings == 2
+    assert os.path.isfile(path)
+
+    # replayed responses never reach the network
+    def no_network(*args, **kwargs):
+        raise AssertionError('network request')
+
+    monkeypatch.setattr(_helpers.HTTPAdapter, 'send', no_network)
+
+    with _helpers.Cassette(path=path, mode='replay') as cassette:
+        response = _helpers.http_request(url=text_url)
+        assert response.replayed
+        assert response.status_code == 200
+        assert response.content == text
+        assert int(response.headers['Content-Length']) == len(text)
+        assert _helpers.http_request(url=image_url).content == image
+
+        with pytest.raises(requests.exceptions.ConnectionError):
+            _helpers.http_request(url=http_server.format('dummy-data.json'))
+    assert cassette.plays == 2
+
+    # `auto` records the requests which are missing
+    monkeypatch.undo()
+    with _helpers.Cassette(path=path) as cassette:
+        _helpers.http_request(url=text_url)
+        _helpers.http_request(url=http_server.format('dummy-data.json'))
+    assert cassette.plays == 1
+    assert cassette.recordings == 1
+    assert len(_helpers.Cassette(path=path).entries) == 3
+
+
+def test_cassette_cookies(temp_dir):
+    path = os.path.join(temp_dir, 'cassettes', 'test_cassette_cookies.json')
+    request = requests.Request('POST', 'https://cookies.example.com/login').prepare()
+    response = requests.Response()
+    response.status_code = 200
+    response.url = request.url
+    response._content = b''
+    response.cookies.set('session', 'abc', domain='cookies.example.com', path='/')
+
+    cassette = _helpers.Cassette(path=path, mode='record')
+    cassette.record(request=request, response=response)
+    cassette.save()
+
+    replayed = _helpers.Cassette(path=path, mode='replay').play(request)
+    assert replayed.cookies.get('session', domain='cookies.example.com') == 'abc'
+
+
+def test_cassette_streamed(http_server, temp_dir, monkeypatch):
+    if not os.path.isdir(temp_dir):
+        os.makedirs(temp_dir)
+    path = os.path.join(temp_dir, 'cassettes', 'test_cassette_streamed.json')
+    if os.path.isfile(path):
+        os.remove(path)
+    url = http_server.format('dummy-data.json')
+    _helpers.session.cache.clear()
+
+    read = []
+    iter_content = requests.Response.iter_content
+
+    def counting_iter_content(self, *args, **kwargs):
+        for chunk in iter_content(self, *args, **kwargs):
+            read.append(len(chunk))
+            yield chunk
+
+    monkeypatch.setattr(requests.Response, 'iter_content', counting_iter_content)
+
+    with _helpers.Cassette(path=path, mode='record') as cassette:
+        # the maximum size is enforced before the body is read in full
+        with pytest.raises(Exception):
+            _helpers.http_request(url=url, max_size=10)
+        assert cassette.recordings == 0
+        assert sum(read) < 63790
+
+        # streamed responses are recorded once their body has been read
+        response = _helpers.http_request(url=url, stream=True)
+        assert cassette.recordings == 0
+        content = b''.join(_helpers.iter_streamed_content(response=response))
+        assert cassette.recordings == 1
+
+        # and when the body was read by the caller
+        response = _helpers.http_request(url=url + '?caller', stream=True)
+        assert response.content == content
+        assert _helpers.http_request(url=url, max_size=100000).content == content
+    assert cassette.recordings == 3
+
+    monkeypatch.undo()
+    with _helpers.Cassette(path=path, mode='replay'):
+        assert _helpers.http_request(url=url + '?caller', max_size=100000).content == content
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# standard imports
+import os
+
+# lib imports
+import pytest
+import requests
+
+# local imports
+from plexhints.mock_pms import MockPlexServer
+
+FIXTURES = os.path.join('tests', 'data', 'pms')
+
+
+@pytest.fixture(scope='function')
+def mock_pms():
+    with MockPlexServer(fixtures=FIXTURES) as server:
+        yield server
+
+
+def test_fixture(mock_pms):
+    assert mock_pms.port != 0
+    response = requests.get('%s/library/metadata/1/tree' % mock_pms.url)
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/xml'
+    with open(os.path.join(FIXTURES, 'library', 'metadata', '1', 'tree.xml'), 'rb') as f:
+        assert response.content == f.read()
+    assert mock_pms.requests == ['/library/metadata/1/tree']
+
+
+def test_route(mock_pms):
+    mock_pms.add_route(path='/library/sections', body=u'<MediaContainer size="0"/>')
+    mock_pms.add_tree(dbid=5, xml=b'<MediaContainer/>')
+    assert requests.get('%s/library/sections?X-Plex-Token=abc' % mock_pms.url).content == b'<MediaContainer size="0"/>'
+    assert requests.get('%s/library/metadata/5/tree' % mock_pms.url).content == b'<MediaContainer/>'
+
+
+def test_not_found(mock_pms):
+    assert requests.get('%s/library/metadata/2/tree' % mock_pms.url).status_code == 404
+    # files outside the fixtures directory are not served
+    assert requests.get('%s/../pms/library/metadata/1/tree' % mock_pms.url).status_code == 404
+
+
+def test_stop():
+    server = MockPlexServer()
+    server.start()
+    url = server.url
+    server.stop()
+    with pytest.raises(requests.exceptions.ConnectionError):
+        requests.get(url, timeout=1)
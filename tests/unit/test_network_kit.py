@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
 
+# standard imports
+import os
+import time
+
 # lib imports
 import pytest
 from requests.cookies import RequestsCookieJar
 
 # local imports
-from plexhints import network_kit
+from plexhints import _helpers, network_kit
 
 
 @pytest.fixture(scope='function')
@@ -27,6 +31,64 @@ def test_http_kit_cache_time_setter(http_kit):
     assert http_kit.CacheTime == 10
 
 
+def test_http_kit_cache_backend(http_kit):
+    assert http_kit.CacheBackend == 'memory'
+
+
+def test_http_kit_cache_backend_setter(http_kit, monkeypatch, temp_dir):
+    # keep the database out of the working tree
+    if not os.path.isdir(temp_dir):
+        os.makedirs(temp_dir)
+    monkeypatch.setattr(network_kit.Core.storage, 'data_path', temp_dir)
+
+    try:
+        http_kit.CacheBackend = 'sqlite'
+        assert http_kit.CacheBackend == 'sqlite'
+        assert os.path.isfile(os.path.join(temp_dir, 'HTTPCache.sqlite'))
+    finally:
+        http_kit.CacheBackend = 'memory'
+    assert http_kit.CacheBackend == 'memory'
+
+    with pytest.raises(ValueError):
+        http_kit.CacheBackend = 'invalid'
+
+
+def test_http_kit_cache_max_size(http_kit):
+    assert http_kit.CacheMaxSize == 52428800
+
+
+def test_http_kit_cache_max_size_setter(http_kit):
+    try:
+        http_kit.CacheMaxSize = 1024
+        assert http_kit.CacheMaxSize == 1024
+    finally:
+        http_kit.CacheMaxSize = 52428800
+
+
+@pytest.mark.parametrize('name, value, default', [
+    ('PoolSize', 20, 10),
+    ('Retries', 3, 0),
+    ('RetryBackoff', 1.0, 0.5),
+    ('KeepAlive', False, True),
+])
+def test_http_kit_connection_settings(http_kit, name, value, default):
+    assert getattr(http_kit, name) == default
+    try:
+        setattr(http_kit, name, value)
+        assert getattr(http_kit, name) == value
+    finally:
+        setattr(http_kit, name, default)
+
+
+def test_http_kit_cache_compress_level(http_kit):
+    assert http_kit.CacheCompressLevel == 6
+    try:
+        http_kit.CacheCompressLevel = 9
+        assert _helpers.session.cache.compress_level == 9
+    finally:
+        http_kit.CacheCompressLevel = 6
+
+
 def test_http_kit_headers(http_kit):
     assert isinstance(http_kit.Headers, dict)
 
@@ -36,16 +98,66 @@ def test_http_kit_headers_setter(http_kit):
     assert http_kit.Headers['User-Agent'] == 'My Plug-in'
 
 
-def test_request(http_kit):
+def test_request(http_kit, cassette):
     response = http_kit.Request(url='https://github.com/LizardByte/plexhints')
     assert response.status_code == 200
 
 
-def test_cookies_for_url(http_kit):
+def test_request_immediate(http_kit, http_server):
+    url = http_server.format('dummy-data.txt')
+
+    request = http_kit.Request(url=url)
+    assert not request.loaded
+
+    request = http_kit.Request(url=url, immediate=True)
+    assert request.loaded
+    assert request.status_code == 200
+
+
+def test_request_many(http_kit, http_server):
+    files = ['dummy-data.txt', 'dummy-data.json', 'dummy-data.xml', 'dummy-data.yml']
+    requests = http_kit.RequestMany(urls=[http_server.format(f) for f in files], max_workers=3, per_host_limit=2)
+    assert len(requests) == len(files)
+    for request, f in zip(requests, files):
+        assert request.loaded
+        assert request.url.endswith(f)
+        assert request.status_code == 200
+
+
+def test_set_rate_limit(http_kit):
+    http_kit.SetRateLimit(host='api.example.com', requests_per_second=2, burst=4)
+    stats = http_kit.RateLimitStats['api.example.com']
+    assert stats['requests_per_second'] == 2
+    assert stats['burst'] == 4
+    assert stats['requests'] == 0
+    assert stats['wait_time'] == 0
+
+    http_kit.SetRateLimit(host='api.example.com', requests_per_second=None)
+    assert 'api.example.com' not in http_kit.RateLimitStats
+
+
+def test_cookies_for_url(http_kit, cassette):
     cookies = http_kit.CookiesForURL(url='https://github.com/LizardByte/plexhints')
     assert cookies
 
 
+def test_cassette(http_kit, http_server, temp_dir):
+    path = os.path.join(temp_dir, 'cassettes', 'test_http_kit_cassette.json')
+    if os.path.isfile(path):
+        os.remove(path)
+    url = http_server.format('dummy-data.txt')
+
+    with http_kit.Cassette(path=path, mode='record') as cassette:
+        content = http_kit.Request(url=url).content
+    assert cassette.recordings == 1
+
+    with http_kit.Cassette(path=path, mode='replay') as cassette:
+        request = http_kit.Request(url=url)
+        assert request.content == content
+        assert request.replayed
+    assert cassette.plays == 1
+
+
 def test_set_password(http_kit, password_manager):
     username = 'username'
     password = 'password'
@@ -71,6 +183,33 @@ def test_pre_cache(http_kit):
     # this function does not return anything
 
 
+def test_pre_cache_flush(http_kit, http_server):
+    url = http_server.format('dummy-data.yml')
+    _helpers.session.cache.clear()
+
+    http_kit.PreCache(url=url, cacheTime=1000)
+    assert http_kit.FlushPreCache(timeout=10)
+    assert _helpers.session.cache.has_url(url)
+
+    request = http_kit.Request(url=url, cacheTime=1000)
+    assert request.from_cache
+
+
+def test_pre_cache_key(http_kit, monkeypatch):
+    keys = []
+    monkeypatch.setattr(network_kit.precache_queue, 'put', lambda key, func, **kwargs: keys.append(key))
+
+    url = 'http://localhost:8000/dummy-data.yml'
+    http_kit.PreCache(url=url, cacheTime=1000)
+    http_kit.PreCache(url=url, cacheTime=1000)
+    http_kit.PreCache(url=url, cacheTime=10)
+    http_kit.PreCache(url=url, cacheTime=1000, headers={'Accept-Language': 'fr'})
+    http_kit.PreCache(url=url, cacheTime=1000, values={'q': 'test'})
+
+    assert keys[0] == keys[1]
+    assert len(set(keys)) == 4
+
+
 def test_cookies(http_kit):
     cookies = http_kit.Cookies
     assert isinstance(cookies, RequestsCookieJar)
@@ -85,9 +224,46 @@ def test_clear_cookies(http_kit):
     assert len(http_kit.Cookies) == 0
 
 
-def test_clear_cache(http_kit):
-    # this function does nothing
+def test_clear_cache(http_kit, http_server):
+    url = http_server.format('dummy-data.txt')
+    http_kit.Request(url=url, cacheTime=1000, immediate=True)
+    assert _helpers.session.cache.has_url(url)
+
+    http_kit.ClearCache()
+    assert not _helpers.session.cache.has_url(url)
+    assert http_kit.CacheInfo()['entries'] == 0
+
+
+def test_cache_info(http_kit, http_server):
+    url = http_server.format('dummy-data.txt')
+    http_kit.ClearCache()
+    http_kit.Stats.reset()
+
+    http_kit.Request(url=url, cacheTime=1000, immediate=True)
+    http_kit.Request(url=url, cacheTime=1000, immediate=True)
+
+    info = http_kit.CacheInfo()
+    assert info['backend'] == 'memory'
+    assert info['entries'] == 1
+    assert info['bytes'] == os.path.getsize(os.path.join('tests', 'data', 'dummy-data.txt'))
+    assert info['max_size'] == 52428800
+    assert info['requests'] == 2
+    assert info['cache_hits'] == 1
+    assert info['hit_ratio'] == 0.5
+
+
+def test_prune_and_invalidate_cache(http_kit, http_server):
     http_kit.ClearCache()
+    for name in ('dummy-data.txt', 'dummy-data.json', 'dummy-data.yml'):
+        http_kit.Request(url=http_server.format(name), cacheTime=1000, immediate=True)
+
+    assert http_kit.InvalidateCache(prefix=http_server.format('dummy-data.j')) == 1
+    assert not _helpers.session.cache.has_url(http_server.format('dummy-data.json'))
+    assert http_kit.CacheInfo()['entries'] == 2
+
+    assert http_kit.PruneCache(older_than=1000) == 0
+    assert http_kit.PruneCache(max_bytes=0) == 2
+    assert http_kit.CacheInfo()['entries'] == 0
 
 
 def test_set_cache_time_depreciated(http_kit, caplog):
@@ -114,7 +290,7 @@ def test_set_timeout_depreciated(http_kit, caplog):
     assert 'The HTTP.SetTimeout() function is deprecated.' in caplog.text
 
 
-def test_get_cookies_for_url_depreciated(http_kit, caplog):
+def test_get_cookies_for_url_depreciated(http_kit, caplog, cassette):
     cookies = http_kit.GetCookiesForURL(url='https://github.com/LizardByte/plexhints')
     assert cookies
 
@@ -125,3 +301,48 @@ def test_get_cookies_for_url_depreciated(http_kit, caplog):
 def test_randomize_user_agent_depreciated(http_kit, caplog):
     http_kit.RandomizeUserAgent()
     assert 'Randomized user agent strings are no longer supported.' in caplog.text
+
+
+def test_stats(http_kit, http_server):
+    url = http_server.format('dummy-data.yml')
+    http_kit.Stats.reset()
+
+    http_kit.Request(url=url, cacheTime=0, immediate=True)
+    summary = http_kit.Stats.summary()
+    assert summary[url.split('/')[2]]['requests'] == 1
+
+
+def test_request_stale(http_kit, http_server):
+    url = http_server.format('dummy-data.txt')
+    _helpers.session.cache.clear()
+
+    assert not http_kit.Request(url=url, cacheTime=1, staleTime=60).from_cache
+    time.sleep(1.1)
+    request = http_kit.Request(url=url, cacheTime=1, staleTime=60)
+    assert request.from_cache
+    assert request.stale
+    assert http_kit.FlushPreCache(timeout=10)
+
+
+def test_set_negative_cache_time(http_kit):
+    try:
+        http_kit.SetNegativeCacheTime(status='5xx', cacheTime=30)
+        assert _helpers.get_negative_cache_time(status_code=503) == 30
+
+        http_kit.SetNegativeCacheTime(status='5xx', cacheTime=None)
+        assert _helpers.get_negative_cache_time(status_code=503) is None
+    finally:
+        _helpers.negative_cache_times.clear()
+
+
+def test_http_kit_cache_key_rules(http_kit):
+    assert http_kit.CacheIgnoredParams == []
+    assert http_kit.CacheVaryHeaders == []
+    try:
+        http_kit.CacheIgnoredParams = ['timestamp', '_']
+        http_kit.CacheVaryHeaders = ['Accept-Language']
+        assert http_kit.CacheIgnoredParams == ['_', 'timestamp']
+        assert http_kit.CacheVaryHeaders == ['accept-language']
+    finally:
+        http_kit.CacheIgnoredParams = []
+        http_kit.CacheVaryHeaders = []
@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
 
 # standard imports
+import decimal
 import os
 import sys
+import threading
+import time
 
 # lib imports
 import pytest
+import requests
 
 # conditional imports
 if sys.version_info.major < 3:
@@ -46,6 +50,132 @@ def test_json_to_string():
         parse_kit.json_to_string(obj=object())
 
 
+@pytest.fixture()
+def json_backend():
+    settings = dict(parse_kit.json_settings)
+    yield
+    parse_kit.json_settings.update(settings)
+
+
+@pytest.mark.parametrize('name', list(parse_kit.json_backends))
+def test_json_backends(json_backend, name):
+    parse_kit.set_json_backend(decoder=name, encoder=name, strict=True)
+    assert parse_kit.get_json_backend().name == name
+    assert parse_kit.get_json_backend(encoder=True).name == name
+
+    with open(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'dummy-data.json'), 'rb') as f:
+        json_bytes = f.read()
+    json_object = parse_kit.json_from_string(json_string=json_bytes)
+    assert json_object[0]['name'] == 'Adeel Solangi'
+    assert parse_kit.json_from_string(json_string=parse_kit.json_to_string(obj=json_object)) == json_object
+    assert parse_kit.json_from_string(json_string=u'{"caf\u00e9": 1}'.encode('latin-1'), encoding='latin-1') == \
+        {u'caf\u00e9': 1}
+
+    # values the backend may not support are handled by simplejson
+    assert parse_kit.json_from_string(json_string='[%d]' % 2 ** 70) == [2 ** 70]
+    assert parse_kit.json_to_string(obj=decimal.Decimal('1.5')) == '1.5'
+
+
+def test_set_json_backend(json_backend):
+    assert parse_kit.get_json_backend().name == list(parse_kit.json_backends)[0]
+    assert parse_kit.get_json_backend(encoder=True).name == 'simplejson'
+
+    with pytest.raises(ValueError):
+        parse_kit.set_json_backend(decoder='missing')
+
+    parse_kit.set_json_backend(decoder='simplejson', encoder='auto')
+    assert parse_kit.get_json_backend().name == 'simplejson'
+    assert parse_kit.get_json_backend(encoder=True).name == list(parse_kit.json_backends)[0]
+
+    parse_kit.set_json_backend(decoder='auto')
+    assert parse_kit.get_json_backend().name == list(parse_kit.json_backends)[0]
+
+
+def test_json_strict(json_backend):
+    assert parse_kit.json_from_string(json_string="{'foo': 'bar'}") == {'foo': 'bar'}  # parsed by demjson
+
+    parse_kit.JSON.SetBackend(strict=True)
+    with pytest.raises(ValueError):
+        parse_kit.json_from_string(json_string="{'foo': 'bar'}")
+    with pytest.raises(TypeError):
+        parse_kit.json_to_string(obj=object())
+
+
+def test_iter_json_items():
+    json_string = b'{"total": 3, "results": [{"id": 1}, {"id": 2, "tags": ["a"]}, {"id": 3}], "page": {"next": null}}'
+    items = list(parse_kit.iter_json_items(chunks=[json_string], path='results.item'))
+    assert items == [{'id': 1}, {'id': 2, 'tags': ['a']}, {'id': 3}]
+
+    # feed a byte at a time, splitting numbers and multi-byte characters
+    chunks = [json_string[i:i + 1] for i in range(len(json_string))]
+    assert list(parse_kit.iter_json_items(chunks=chunks, path='results.item')) == items
+    chunks = [c for c in u'[12345, "\u00e9t\u00e9"]'.encode('utf-8')]
+    chunks = [bytes(bytearray([c])) if isinstance(c, int) else c for c in chunks]
+    assert list(parse_kit.iter_json_items(chunks=chunks)) == [12345, u'\u00e9t\u00e9']
+
+    assert list(parse_kit.iter_json_items(chunks=[json_string], path='total')) == [3]
+    assert list(parse_kit.iter_json_items(chunks=[json_string], path='missing.item')) == []
+    assert list(parse_kit.iter_json_items(chunks=[b'[]'])) == []
+    assert list(parse_kit.iter_json_items(chunks=[b' {"a": [] } '], path='')) == [{'a': []}]
+
+    with pytest.raises(ValueError):
+        list(parse_kit.iter_json_items(chunks=[b'[1, 2'], path='item'))
+    with pytest.raises(ValueError):
+        list(parse_kit.iter_json_items(chunks=[b'[1 2]'], path='item'))
+    with pytest.raises(ValueError):
+        list(parse_kit.iter_json_items(chunks=[b'[1]', b' [2]'], path='item'))
+
+
+def test_iter_json_items_chunk_boundaries():
+    json_string = u'{"skip": {"a": "x\\"]}\\\\", "b": [1, [true, null], {"c": "\u00e9{"}]}, ' \
+                  u'"results": [{"s": "\\"[", "n": -1.5e3}, "y\\\\", 12345, false], "tail": "}"}'
+    expected = [{'s': '"[', 'n': -1500.0}, 'y\\', 12345, False]
+    json_bytes = json_string.encode('utf-8')
+    for size in range(1, 8):
+        chunks = [json_bytes[i:i + size] for i in range(0, len(json_bytes), size)]
+        assert list(parse_kit.iter_json_items(chunks=chunks, path='results.item')) == expected
+
+
+def test_iter_json_items_error_position():
+    json_bytes = b'{"skip": ["' + b'x' * 100 + b'"], "results": [1 2]}'
+    position = json_bytes.index(b'2]')
+    for size in (1, 7, len(json_bytes)):
+        chunks = [json_bytes[i:i + size] for i in range(0, len(json_bytes), size)]
+        with pytest.raises(ValueError, match='character %d of the JSON stream' % position):
+            list(parse_kit.iter_json_items(chunks=chunks, path='results.item'))
+
+    json_bytes = b'[1, 2] ' + b' ' * 50 + b'[3]'
+    with pytest.raises(ValueError, match='character %d of the JSON stream' % json_bytes.index(b'[3]')):
+        list(parse_kit.iter_json_items(chunks=[json_bytes[i:i + 4] for i in range(0, len(json_bytes), 4)]))
+
+
+def test_iter_json_items_large_skipped_value():
+    item = u'{"id": 1, "name": "a \\"quoted\\" [name]", "tags": ["x", {"y": null}]}'
+    json_string = u'{"skip": [%s], "results": [1, 2]}' % u', '.join([item] * 20000)
+    json_bytes = json_string.encode('utf-8')
+    chunk_size = 4096
+
+    buffers = []
+
+    def chunks():
+        for i in range(0, len(json_bytes), chunk_size):
+            buffers.append(len(reader._buffer))
+            yield json_bytes[i:i + chunk_size]
+
+    # the skipped value is not kept in memory
+    reader = parse_kit._JSONStreamReader(chunks=chunks())
+    assert list(reader.iter_path(segments=['results', 'item'])) == [1, 2]
+    reader.end()
+    assert len(json_bytes) > 1000000
+    assert max(buffers) <= chunk_size
+
+    # values on the path are decoded once, whatever their size
+    items = list(parse_kit.iter_json_items(chunks=[json_bytes[i:i + chunk_size]
+                                                   for i in range(0, len(json_bytes), chunk_size)], path='skip'))
+    assert len(items[0]) == 20000
+    assert items[0][0]['name'] == 'a "quoted" [name]'
+
+
 def test_html_element():
     name = 'foo'
     text = 'bar'
@@ -98,6 +228,78 @@ def test_xml_element_from_string_html():
     assert element.find('car').text == 'caz'
 
 
+@pytest.mark.parametrize('data, is_html, expected', [
+    (b'<foo>bar</foo>', False, 'utf-8'),
+    (b'<?xml version="1.0" encoding="ISO-8859-1"?><foo/>', False, ''),
+    (u'<foo>caf\u00e9</foo>'.encode('utf-16'), False, ''),
+    (b'<p>caf\xc3\xa9</p>', True, 'utf-8'),
+    (b'<head><meta charset="iso-8859-1"></head><p>caf\xe9</p>', True, ''),
+    (b'<p>caf\xe9</p>', True, None),
+    # characters split between the chunks which are validated
+    (b'<p>' + b'a' * 65532 + b'\xc3\xa9</p>', True, 'utf-8'),
+    (b'<p>' + b'a' * 100000 + b'caf\xe9</p>', True, None),
+    (b'<p>caf\xc3', True, None),
+])
+def test_markup_encoding(data, is_html, expected):
+    assert parse_kit.markup_encoding(data=data, is_html=is_html) == expected
+
+
+@pytest.mark.parametrize('string, is_html, encoding', [
+    (u'<foo>caf\u00e9</foo>', False, None),
+    (u'<foo>caf\u00e9</foo>'.encode('utf-8'), False, None),
+    (u'<?xml version="1.0" encoding="ISO-8859-1"?><foo>caf\u00e9</foo>', False, None),
+    (u'<?xml version="1.0" encoding="ISO-8859-1"?><foo>caf\u00e9</foo>'.encode('latin-1'), False, None),
+    (u'<?xml version="1.0" encoding="UTF-8"?><foo>caf\u00e9</foo>'.encode('latin-1'), False, None),  # wrong
+    (u'<foo>caf\u00e9</foo>'.encode('utf-16'), False, None),
+    (u'<foo>caf\u00e9</foo>'.encode('latin-1'), False, 'latin-1'),
+    (u'<foo>caf\u00e9</foo>'.encode('cp1252'), True, 'cp1252'),
+    (u'<p>caf\u00e9</p>'.encode('utf-8'), True, None),
+    (u'<head><meta charset="iso-8859-1"></head><p>caf\u00e9</p>'.encode('latin-1'), True, None),
+    (u'<p>caf\u00e9 au lait, tr\u00e8s bien</p>'.encode('cp1252'), True, None),  # guessed
+])
+def test_xml_element_from_string_encoding(string, is_html, encoding):
+    element = parse_kit.xml_element_from_string(string=string, is_html=is_html, encoding=encoding)
+    assert u'caf\u00e9' in element.xpath('string()')
+
+
+def test_get_parser():
+    parser = parse_kit.get_parser()
+    assert parse_kit.get_parser() is parser
+    assert parse_kit.get_parser(remove_blank_text=True) is not parser
+    assert parse_kit.get_parser(kind='html') is parse_kit.get_parser(kind='html')
+    assert parse_kit.get_parser(kind='objectify') is not parser
+
+    parsers = []
+    thread = threading.Thread(target=lambda: parsers.append(parse_kit.get_parser()))
+    thread.start()
+    thread.join()
+    assert parsers[0] is not parser
+
+    with pytest.raises(ValueError):
+        parse_kit.get_parser(kind='yaml')
+
+
+def test_get_parser_reused():
+    first = parse_kit.xml_element_from_string(string='<foo><bar>baz</bar></foo>')
+    second = parse_kit.xml_element_from_string(string='<foo><bar>qux</bar></foo>')
+    assert first.find('bar').text == 'baz'
+    assert second.find('bar').text == 'qux'
+
+    element = parse_kit.xml_element_from_string(string='<foo>\n  <bar/>\n</foo>', remove_blank_text=True)
+    assert element.text is None
+    element = parse_kit.xml_element_from_string(string='<foo>\n  <bar/>\n</foo>')
+    assert element.text == '\n  '
+
+
+def test_response_charset():
+    response = requests.Response()
+    assert parse_kit.response_charset(response=response) is None
+    response.headers['Content-Type'] = 'text/html'
+    assert parse_kit.response_charset(response=response) is None
+    response.headers['Content-Type'] = 'text/html; charset="ISO-8859-1"'
+    assert parse_kit.response_charset(response=response) == 'ISO-8859-1'
+
+
 def test_xml_element_to_string():
     element = parse_kit.xml_element(name='foo', text='bar')
     xml_string = parse_kit.xml_element_to_string(el=element, method=None)
@@ -207,6 +409,52 @@ def test_json_kit_object_from_url(http_server, json_kit):
     assert json_object[1]['version'] == 1.88
 
 
+def test_json_kit_object_from_url_max_size(http_server, json_kit):
+    with pytest.raises(Exception):
+        json_kit.ObjectFromURL(url=http_server.format('dummy-data.json'), max_size=10)
+
+
+def test_json_kit_objects_from_urls(http_server, json_kit):
+    urls = [http_server.format('dummy-data.json'), http_server.format('dummy-data.yml')] * 3
+    json_objects = json_kit.ObjectsFromURLs(urls=urls[::2], max_workers=4, per_host_limit=2)
+    assert len(json_objects) == 3
+    for json_object in json_objects:
+        assert json_object[0]['name'] == 'Adeel Solangi'
+
+    with pytest.raises(Exception):
+        json_kit.ObjectsFromURLs(urls=urls, max_size=1)
+
+
+def test_json_kit_iter_items_from_string(json_kit):
+    json_string = '{"results": [{"foo": "bar"}, {"foo": "baz"}]}'
+    items = json_kit.IterItemsFromString(string=json_string, path='results.item')
+    assert [item['foo'] for item in items] == ['bar', 'baz']
+
+    with pytest.raises(Exception):
+        json_kit.IterItemsFromString(string=json_string, max_size=1)
+
+
+def test_json_kit_iter_items_from_url(http_server, json_kit):
+    url = http_server.format('dummy-data.json')
+    items = json_kit.IterItemsFromURL(url=url)
+    first = next(items)
+    assert first['name'] == 'Adeel Solangi'
+    assert list(items) == json_kit.ObjectFromURL(url=url)[1:]
+
+    with pytest.raises(Exception):
+        list(json_kit.IterItemsFromURL(url=url, max_size=10))
+
+
+def test_json_kit_iter_items_from_url_cached(http_server, json_kit):
+    url = http_server.format('dummy-data.json?iter')
+    items = list(json_kit.IterItemsFromURL(url=url, cacheTime=60))
+    assert items[1]['version'] == 1.88
+
+    response = parse_kit.http_request(url=url, cache_time=60)
+    assert response.from_cache
+    assert list(json_kit.IterItemsFromURL(url=url, cacheTime=60)) == items
+
+
 def test_json_kit_string_from_object(json_kit):
     json_object = {'foo': 'bar'}
     json_string = json_kit.StringFromObject(obj=json_object)
@@ -306,6 +554,62 @@ def test_xml_kit_element_from_url(http_server, xml_kit):
     assert xml_element.find('book[2]').find('title').text == 'Midnight Rain'
 
 
+def test_xml_kit_elements_from_urls(http_server, xml_kit):
+    urls = [http_server.format('dummy-data.xml')] * 3
+    xml_elements = xml_kit.ElementsFromURLs(urls=urls)
+    assert len(xml_elements) == 3
+    for xml_element in xml_elements:
+        assert xml_element.tag == 'catalog'
+
+
+def test_iter_xml_elements():
+    xml_string = u'<?xml version="1.0" encoding="ISO-8859-1"?><a><meta/><b>caf\u00e9</b><b>th\u00e9</b></a>'
+    chunks = [xml_string.encode('latin-1')[i:i + 7] for i in range(0, len(xml_string), 7)]
+    elements = parse_kit.iter_xml_elements(chunks=chunks, tag='b')
+
+    first = next(elements)
+    assert first.text == u'caf\u00e9'
+    parent = first.getparent()
+    assert parent[0].tag == 'meta'
+
+    second = next(elements)
+    assert second.text == u'th\u00e9'
+    assert first.text is None  # cleared
+    assert [el.tag for el in parent] == ['b', 'b']  # siblings before the first element removed
+    assert list(elements) == []
+    assert len(parent) == 1
+
+    texts = [el.text for el in parse_kit.iter_xml_elements(chunks=[u'<a><b>caf\u00e9</b></a>'.encode('cp1252')],
+                                                           tag='b', encoding='windows-1252')]
+    assert texts == [u'caf\u00e9']
+
+    with pytest.raises(parse_kit.etree.XMLSyntaxError):
+        list(parse_kit.iter_xml_elements(chunks=[b'<a><b/>', b'<c></a>'], tag='b'))
+
+
+def test_xml_kit_iter_elements_from_string(xml_kit):
+    xml_string = u'<?xml version="1.0" encoding="ISO-8859-1"?><a><b>caf\u00e9</b><c><b>x</b></c></a>'
+    assert [el.text for el in xml_kit.IterElementsFromString(string=xml_string, tag='b')] == [u'caf\u00e9', 'x']
+    assert [el.tag for el in xml_kit.IterElementsFromString(string=xml_string, tag=['b', 'c'])] == ['b', 'b', 'c']
+
+    with pytest.raises(Exception):
+        xml_kit.IterElementsFromString(string=xml_string, tag='b', max_size=1)
+
+
+def test_xml_kit_iter_elements_from_url(http_server, xml_kit):
+    url = http_server.format('dummy-data.xml')
+    ids = [book.get('id') for book in xml_kit.IterElementsFromURL(url=url, tag='book')]
+    assert ids == [book.get('id') for book in xml_kit.ElementFromURL(url=url).findall('book')]
+    assert ids[:2] == ['bk101', 'bk102']
+
+    authors = [author.text for author in xml_kit.IterElementsFromURL(url=url, tag='author', cacheTime=60)]
+    assert authors[1] == 'Ralls, Kim'
+    assert parse_kit.http_request(url=url, cache_time=60).from_cache
+
+    with pytest.raises(Exception):
+        list(xml_kit.IterElementsFromURL(url=url, tag='book', max_size=10))
+
+
 def test_xml_kit_object_from_string(xml_kit):
     # read dummy file
     with open(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'dummy-data.xml'), 'r') as f:
@@ -355,3 +659,10 @@ def test_yaml_kit_object_from_url(http_server, yaml_kit):
     assert yaml_object['info']['name'] == 'John Doe'
     assert yaml_object['info']['age'] == 30
     assert 'English' in yaml_object['languages']
+
+
+def test_json_kit_object_from_url_stale(http_server, json_kit):
+    url = http_server.format('dummy-data.json')
+    json_object = json_kit.ObjectFromURL(url=url, cacheTime=1, staleTime=60)
+    time.sleep(1.1)
+    assert json_kit.ObjectFromURL(url=url, cacheTime=1, staleTime=60) == json_object